@@ -0,0 +1,318 @@
+# Backend API istemcisi
+#
+# Tüm backend çağrıları süreç genelinde tek bir requests.Session üzerinden
+# yapılır: bağlantılar havuzda tutulur (keep-alive), her uç nokta için ayrı
+# bağlantı/okuma zaman aşımı vardır ve idempotent GET istekleri rastgele
+# gecikmeli (jitter) olarak yeniden denenir.
+#
+# Toplu fotoğraf yüklemesinde her öğün ayrı bir parça olarak sınırlı bir
+# havuzda eş zamanlı gönderilir. Bağlantı hataları ve geçici sunucu hataları
+# parça bazında, üstel bekleme ile yeniden denenir; her parça sabit bir
+# Idempotency-Key taşıdığından tekrar gönderim öğünü çoğaltmaz.
+#
+# Fotoğraflar içerik adreslidir: find_image, verilen SHA-256 özetine sahip
+# bir fotoğrafın backend'de zaten saklanıp saklanmadığını sorar. Saklıysa
+# öğün yalnızca bilgileri ve var olan imageKey ile (fotoğrafsız) gönderilir.
+#
+# Giriş, öğün ve rapor uçları devre kesiciyle (breaker.CircuitBreaker)
+# korunur: art arda hata ya da gecikme hedefi aşımında devre açılır ve
+# bekleme süresince istekler backend'e gönderilmeden hemen reddedilir.
+import bisect
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from breaker import BREAKER_SLOW_MS, CircuitBreaker
+
+# Havuz boyutu: aynı anda istek yapabilecek Streamlit betik iş parçacığı sayısı
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_GET_RETRIES = int(os.environ.get("HTTP_GET_RETRIES", "2"))
+# urllib3 2.x bağlantı zaman aşımını istek gövdesi gönderilirken her yazmaya da
+# uygular; fotoğraf yüklemesi yavaş bağlantıda 3 sn'den uzun sürebileceğinden
+# yükleme ucunun bağlantı/gönderim süresi ayrıdır
+UPLOAD_SEND_TIMEOUT = float(os.environ.get("UPLOAD_SEND_TIMEOUT", "30"))
+
+# Toplu yükleme: aynı anda gönderilen en fazla parça ve parça başına yeniden deneme
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "10"))
+UPLOAD_RETRIES = int(os.environ.get("UPLOAD_RETRIES", "2"))
+UPLOAD_RETRY_BACKOFF = 0.5
+UPLOAD_RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+
+# Uç nokta -> okuma zaman aşımı (saniye)
+READ_TIMEOUTS = {
+    "auth": 10,
+    "meals": 15,
+    "report": 60,
+    "upload": 30,
+    "image": 15,
+}
+
+# Uç nokta -> bağlantı ve gövde gönderim zaman aşımı (saniye); yoksa HTTP_CONNECT_TIMEOUT
+SEND_TIMEOUTS = {
+    "upload": UPLOAD_SEND_TIMEOUT,
+}
+
+# Devre kesiciyle korunan uç nokta -> gecikme hedefi (ms); hedefi aşan yanıt hata sayılır
+BREAKER_SLO_MS = {
+    "auth": BREAKER_SLOW_MS,
+    "meals": BREAKER_SLOW_MS,
+    "report": 4 * BREAKER_SLOW_MS,  # backend raporu yanıtlamadan önce üretir
+}
+
+# Gecikme histogramı kova üst sınırları (milisaniye)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Uç nokta başına gecikme histogramı (Prometheus tarzı kovalar)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # son kova: +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, elapsed_ms, error=False):
+        self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Kovalardan yaklaşık yüzdelik değeri (kova üst sınırı) döndür"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class UploadPart:
+    """Toplu yüklemedeki tek bir öğün ve gönderim durumu"""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, data, files, idempotency_key=None):
+        self.data = data
+        self.files = files
+        self.idempotency_key = idempotency_key or uuid.uuid4().hex
+        self.status = self.PENDING
+        self.attempts = 0
+        self.response = None
+        self.error = None
+        self.elapsed_ms = 0.0
+
+    @property
+    def size(self):
+        return sum(len(f[1]) for f in self.files.values())
+
+
+class BackendClient:
+    """Havuzlu, zaman aşımlı ve yeniden denemeli backend istemcisi"""
+
+    def __init__(self, base_url, pool_size=HTTP_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                 read_timeouts=None, get_retries=HTTP_GET_RETRIES, send_timeouts=None):
+        self.base_url = base_url.rstrip("/")
+        self._origin = _origin(self.base_url)
+        self.connect_timeout = connect_timeout
+        self.send_timeouts = dict(SEND_TIMEOUTS, **(send_timeouts or {}))
+        self.read_timeouts = dict(READ_TIMEOUTS, **(read_timeouts or {}))
+        self.session = requests.Session()
+        retry = Retry(
+            total=get_retries,
+            backoff_factor=0.2,
+            backoff_jitter=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._upload_executor = None
+        self.breakers = {endpoint: CircuitBreaker(endpoint, slow_ms=slo) for endpoint, slo in BREAKER_SLO_MS.items()}
+
+    def url(self, path):
+        if path.lower().startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}{path}"
+
+    def timeout(self, endpoint):
+        return (self.send_timeouts.get(endpoint, self.connect_timeout), self.read_timeouts.get(endpoint, 30))
+
+    def request(self, endpoint, method, path, **kwargs):
+        """İsteği havuzlu oturumla gönder ve gecikmeyi kaydet
+
+        Uç noktanın devresi açıksa istek gönderilmez, BackendUnavailable yükselir.
+        """
+        breaker = self.breakers.get(endpoint)
+        probe = breaker.allow() if breaker is not None else None
+        kwargs.setdefault("timeout", self.timeout(endpoint))
+        started = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._observe(endpoint, elapsed_ms, error)
+            if breaker is not None:
+                breaker.record(elapsed_ms, error, probe)
+
+    def login(self, code, pin):
+        return self.request("auth", "POST", "/api/auth/login", json={"code": code, "pin": pin})
+
+    def get_meals(self, token, params, headers=None):
+        return self.request("meals", "GET", "/api/meals", headers=dict(_auth(token), **(headers or {})), params=params)
+
+    def get_report(self, token, params):
+        return self.request("report", "GET", "/api/report/pdf", headers=_auth(token), params=params, stream=True)
+
+    def get_image(self, token, image_key, image_url=None):
+        """Öğün fotoğrafını indir; backend imageUrl verdiyse onu kullan"""
+        url = self.url(image_url or f"/api/images/{image_key}")
+        # Kimlik bilgisi yalnızca kendi backend'imize gönderilir
+        headers = _auth(token) if _origin(url) == self._origin else {}
+        return self.request("image", "GET", url, headers=headers)
+
+    def find_image(self, token, content_hash):
+        """Bu özete sahip fotoğraf backend'de saklıysa image_key'ini, değilse None döndür
+
+        Ucu desteklemeyen backend'ler 404 döndüreceğinden "saklı değil" sayılır.
+        """
+        response = self.request("image", "GET", f"/api/images/hash/{content_hash}", headers=_auth(token))
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json().get("image_key")
+        except ValueError:
+            return None
+
+    def upload_meal(self, token, data, files, idempotency_key=None):
+        headers = _auth(token)
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        return self.request("upload", "POST", "/api/upload", headers=headers, data=data, files=files)
+
+    def upload_meals(self, token, parts, retries=UPLOAD_RETRIES):
+        """UploadPart listesini sınırlı havuzda eş zamanlı gönder; parça başına bir Future döndür
+
+        Her Future, gönderim bittiğinde (DONE ya da FAILED) aynı UploadPart'ı
+        döndürür. Bağlantı hataları ve geçici HTTP hataları en fazla retries
+        kez yeniden denenir; diğer hatalar parçayı hemen FAILED yapar.
+        """
+        with self._lock:
+            if self._upload_executor is None:
+                self._upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+            executor = self._upload_executor
+        return [executor.submit(self._send_part, token, part, retries) for part in parts]
+
+    def _send_part(self, token, part, retries):
+        part.status = UploadPart.SENDING
+        part.error = None
+        started = time.perf_counter()
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(UPLOAD_RETRY_BACKOFF * 2 ** (attempt - 1) * (1 + random.random()))
+            part.attempts += 1
+            try:
+                part.response = self.upload_meal(token, part.data, part.files, part.idempotency_key)
+            except requests.exceptions.RequestException as e:
+                part.response, part.error = None, str(e)
+                continue
+            if part.response.status_code in (200, 201):
+                part.status = UploadPart.DONE
+                break
+            part.error = error_message(part.response)
+            if part.response.status_code not in UPLOAD_RETRY_STATUSES:
+                break
+        if part.status != UploadPart.DONE:
+            part.status = UploadPart.FAILED
+        part.elapsed_ms = (time.perf_counter() - started) * 1000
+        return part
+
+    def latency_summary(self):
+        """Uç nokta başına gecikme özetleri"""
+        with self._lock:
+            return {endpoint: hist.summary() for endpoint, hist in sorted(self._histograms.items())}
+
+    def breaker_stats(self):
+        """Uç nokta başına devre kesici durumu ve sayaçları"""
+        return {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()}
+
+    def latency_histograms(self):
+        """Uç nokta başına ham kova sayaçları: (kovalar, sayaçlar, toplam_ms)"""
+        with self._lock:
+            return {
+                endpoint: (hist.buckets, list(hist.counts), hist.total_ms)
+                for endpoint, hist in self._histograms.items()
+            }
+
+    def _observe(self, endpoint, elapsed_ms, error):
+        with self._lock:
+            hist = self._histograms.get(endpoint)
+            if hist is None:
+                hist = self._histograms[endpoint] = LatencyHistogram()
+            hist.observe(elapsed_ms, error)
+
+
+def _origin(url):
+    """Adresin (şema, konum) çifti; konum kullanıcı bilgisi dahil host:port'tur"""
+    parsed = urlparse(url)
+    return parsed.scheme.lower(), parsed.netloc.lower()
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def error_message(response):
+    """Backend hata yanıtındaki mesaj (JSON "error" alanı, yoksa HTTP durum kodu)"""
+    try:
+        return response.json().get("error", "Bilinmeyen hata")
+    except ValueError:
+        return f"HTTP {response.status_code}"
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url):
+    """Verilen API adresi için süreç genelindeki tek istemciyi döndür"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = BackendClient(base_url)
+        return client
@@ -1,12 +1,32 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import requests
-import pandas as pd
-import base64
-from io import BytesIO
+from concurrent.futures import wait
 from datetime import datetime, timedelta
+import functools
 import pytz
 import os
-import json
+import secrets
+import sqlite3
+import uuid
+from api_client import UploadPart, get_client
+from breaker import BREAKER_FAILURES, CircuitBreaker
+from cache import (MEAL_CACHE_TTL, STALE_WHILE_REVALIDATE, meal_cache, meal_cache_key, invalidate_meal, revalidator,
+                   search_cache_key, summary_cache_key)
+from exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_meals
+from images import submit_prepare
+from meal_frame import LOCAL_TZ, group_by_day, meal_cursor, select_meals, to_frame
+from meal_store import get_store
+from meal_sync import MEAL_SYNC, meal_sync
+from outbox import UploadOutbox, get_outbox
+from pdf_report import render_report
+from prefetch import PREFETCH, adjacent_windows, prefetcher
+from rollups import DailyRollups
+from perf import PERF_TRACING, add_to_span, metrics as perf_metrics, rerun_trace, span, traced
+from reports import REPORT_ENGINE, REPORT_PAGE_SIZE, REPORT_POLL_INTERVAL, fetch_report, iter_backend_meals, report_jobs
+from search import filter_meals, search_terms
+from state import SESSION_RESTORE, SESSION_TTL, STATE_BACKEND, SHARED_STATE, drop_session, load_session, save_session
+from thumbnails import placeholder_image, thumbnail_store
 
 # Streamlit uygulama başlığı ve konfigürasyonu
 st.set_page_config(
@@ -16,15 +36,30 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Saatlerin gösterildiği yerel saat dilimi (bir kez oluşturulur)
+LOCAL_TIMEZONE = pytz.timezone(LOCAL_TZ)
+
 # Demo mod kontrolü
 DEMO_MODE = os.environ.get("STREAMLIT_DEMO_MODE", "true").lower() == "true"
 
+# Diyetisyen görünümünde sayfa başına gösterilecek öğün sayısı
+MEALS_PAGE_SIZE = int(os.environ.get("MEALS_PAGE_SIZE", "30"))
+
+# Fotoğraf ön işlemesi için EXIF tarihini beklerken en fazla beklenecek süre (saniye)
+IMAGE_PREFILL_WAIT = float(os.environ.get("IMAGE_PREFILL_WAIT", "1.0"))
+
 # API URL'leri
 API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:3001")
 AUTH_URL = f"{API_BASE_URL}/api/auth/login"
 MEALS_URL = f"{API_BASE_URL}/api/meals"
 REPORT_URL = f"{API_BASE_URL}/api/report/pdf"
 
+# Süreç genelinde paylaşılan, havuzlu backend istemcisi
+api = get_client(API_BASE_URL)
+perf_metrics.register(
+    "diyet_backend_request_duration_seconds", "endpoint", api.latency_histograms, "Backend isteği süresi"
+)
+
 # Demo veriler
 DEMO_USERS = {
     "A": {"name": "Ben", "pin": "1234"},
@@ -50,78 +85,88 @@ DEMO_MEALS = [
     }
 ]
 
-# CSS styling
-st.markdown("""
-<style>
-    .main {
-        padding: 1rem;
-    }
-    .block-container {
-        padding-top: 1rem;
-    }
-    h1 {
-        color: #22c55e;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 10px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 4px;
-        padding: 10px 16px;
-        background-color: #f3f4f6;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #dcfce7 !important;
-        color: #166534;
-    }
-    .card {
-        background-color: white;
-        border-radius: 10px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24);
-        padding: 1rem;
-        margin-bottom: 1rem;
-    }
-    .card img {
-        border-radius: 5px;
-        width: 100%;
-    }
-    .meal-meta {
-        display: flex;
-        justify-content: space-between;
-        margin: 10px 0;
-        color: #4b5563;
-        font-size: 0.9rem;
-    }
-    .date-header {
-        margin: 20px 0 10px 0;
-        background: #f3f4f6;
-        padding: 8px 12px;
-        border-radius: 5px;
-        font-weight: 500;
-    }
-    .login-container {
-        max-width: 400px;
-        margin: 2rem auto;
-        padding: 2rem;
-        background: white;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-</style>
-""", unsafe_allow_html=True)
+def rebase_to_today(meals):
+    """Demo öğünlerini saatlerini koruyarak bugünün tarihine taşı"""
+    today = datetime.now(pytz.utc).date()
+    rebased = []
+    for meal in meals:
+        taken_at = datetime.fromisoformat(meal["taken_at"].replace('Z', '+00:00'))
+        rebased.append(dict(meal, taken_at=taken_at.replace(year=today.year, month=today.month, day=today.day)))
+    return rebased
+
+# Demo modunda backend yerine yerel SQLite deposu kullanılır
+@st.cache_resource
+def demo_store():
+    """Demo deposunu süreç başına bir kez aç ve boşsa örnek öğünlerle doldur"""
+    store = get_store()
+    store.seed_if_empty(rebase_to_today(DEMO_MEALS))
+    return store
+
+meal_store = demo_store() if DEMO_MODE else None
+
+def meal_sent(entry):
+    """Kuyruktaki öğün backend'e ulaşınca onu göstermesi gereken önbellek kayıtlarını sil"""
+    invalidate_meal(entry["user_code"], entry["taken_at"][:10])
+    if MEAL_SYNC:
+        meal_sync.mark_stale(entry["user_code"])
+
+# Gerçek modda kayıtlar önce yerel kuyruğa yazılır ve arka planda gönderilir
+@st.cache_resource
+def upload_outbox():
+    """Gönderim kuyruğunu süreç başına bir kez aç ve boşaltıcıyı başlat"""
+    outbox = get_outbox()
+    outbox.start(api, on_sent=meal_sent)
+    return outbox
+
+outbox = upload_outbox() if not DEMO_MODE else None
+
+def isolated(fn):
+    """Fonksiyonu kendi başına yeniden çalışan bir fragment yap
+
+    İçindeki bir etkileşim sayfanın tamamını değil yalnızca bu fonksiyonu
+    yeniden çalıştırır; tek başına çalıştığında süresi ayrı bir performans
+    kaydı olarak tutulur. Streamlit bir fragment'ı ilk çağrıdaki argümanlarla
+    sakladığından fragment'lar argüman almaz, değerleri oturum durumundan okur.
+    """
+    @functools.wraps(fn)
+    def run():
+        with rerun_trace(st.session_state, scope=fn.__name__):
+            result = fn()
+        remember_session()
+        return result
+    return st.fragment(run)
+
+# CSS: süreç başına bir kez okunur; Streamlit çizilmeyen öğeleri sildiği için her çalıştırmada eklenir
+@st.cache_resource
+def page_style():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(page_style(), unsafe_allow_html=True)
 
 def format_date(dt_str):
-    """Tarihi formatla: YYYY-MM-DD -> DD.MM.YYYY"""
+    """Tarihi formatla: YYYY-MM-DD -> DD.MM.YYYY (saat içeriyorsa yerel güne göre)"""
     dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(LOCAL_TIMEZONE)
     return dt.strftime('%d.%m.%Y')
 
 def format_time(dt_str):
     """Saati formatla: YYYY-MM-DDTHH:MM:SS -> HH:MM"""
     dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-    vienna_tz = pytz.timezone('Europe/Vienna')
-    dt = dt.astimezone(vienna_tz)
+    dt = dt.astimezone(LOCAL_TIMEZONE)
     return dt.strftime('%H:%M')
 
+def format_span(s):
+    """Performans panelinde bir span özeti: süre • öğe • bayt"""
+    parts = [f"{s['ms']:.1f} ms"]
+    if s["items"]:
+        parts.append(f"{s['items']} öğe")
+    if s["bytes"]:
+        parts.append(f"{s['bytes'] / 1024:.0f} KB")
+    return " • ".join(parts)
+
+@traced("login")
 def login():
     """Kullanıcı girişi için form"""
     st.markdown('<div class="login-container">', unsafe_allow_html=True)
@@ -162,11 +207,8 @@ def login():
         # Gerçek API girişi
         with st.spinner("Giriş yapılıyor..."):
             try:
-                response = requests.post(
-                    AUTH_URL,
-                    json={"code": user_code, "pin": pin},
-                    timeout=10
-                )
+                response = api.login(user_code, pin)
+                add_to_span(bytes=len(response.content))
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -187,34 +229,117 @@ def login():
     st.markdown('</div>', unsafe_allow_html=True)
     return False
 
-def get_meals(start_date, end_date, user_id="all"):
-    """Belirtilen tarih aralığı ve kullanıcıya göre öğünleri getir"""
+# Oturum geri yükleme (SESSION_RESTORE): giriş ve görünüm durumu, tarayıcı
+# çerezindeki gizli değerle şifrelenip durum deposuna (state.py) yazılır; sayfa
+# yenilenince, başka bir süreçte ya da yeniden dağıtımdan sonra yeniden giriş
+# yapmadan geri yüklenir. Gizli değer adreste taşınmaz, her girişte yenilenir.
+SESSION_COOKIE = "diyet_session"
+SESSION_KEYS = ("token", "user", "active_section", "dietitian_filter", "report_job_id", "export_job_id")
+
+def session_snapshot():
+    return {key: st.session_state.get(key) for key in SESSION_KEYS}
+
+def set_session_cookie(secret):
+    """Oturum çerezini tarayıcıya yazdır (Streamlit sunucudan çerez yazamaz)"""
+    components.html(
+        "<script>parent.document.cookie = "
+        f"'{SESSION_COOKIE}={secret}; Max-Age={int(SESSION_TTL)}; Path=/; SameSite=Strict'"
+        " + (parent.location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height=0
+    )
+
+def remember_session():
+    """Girişli oturumun geri yükleme verisi değiştiyse depoya yaz"""
+    if not SESSION_RESTORE or not st.session_state.get("logged_in"):
+        return
+    snapshot = session_snapshot()
+    if st.session_state.get("saved_session") == snapshot:
+        return
+    secret = st.session_state.get("session_secret")
+    if secret is None:
+        # Tarayıcıdan gelen değer benimsenmez: her giriş yeni bir gizli değer alır
+        secret = secrets.token_urlsafe(32)
+        set_session_cookie(secret)
+    save_session(secret, snapshot)
+    st.session_state.session_secret = secret
+    st.session_state.saved_session = snapshot
+
+def restore_session():
+    """Çerezdeki gizli değerle saklanan oturumu geri yükle; yoksa False"""
+    if not SESSION_RESTORE:
+        return False
+    secret = st.context.cookies.get(SESSION_COOKIE)
+    data = load_session(secret) if secret else None
+    if not data or not data.get("token"):
+        return False
+    for key, value in data.items():
+        if key == "active_section" and value not in SECTIONS:
+            continue
+        st.session_state[key] = value
+    if data.get("dietitian_filter"):
+        start_date, end_date, user_id = data["dietitian_filter"]
+        st.session_state.dietitian_filter = (start_date, end_date, user_id)
+        st.session_state.filter_start = datetime.fromisoformat(start_date).date()
+        st.session_state.filter_end = datetime.fromisoformat(end_date).date()
+        st.session_state.filter_user = next(
+            option for option in USER_FILTER_OPTIONS if filter_user_id(option) == user_id
+        )
+    st.session_state.session_secret = secret
+    st.session_state.saved_session = session_snapshot()
+    st.session_state.logged_in = True
+    return True
+
+def forget_session():
+    """Çıkışta saklanan oturumu sil"""
+    secret = st.session_state.get("session_secret")
+    if secret:
+        drop_session(secret)
+    st.session_state.session_secret = None
+    st.session_state.saved_session = None
+
+@traced("get_meals", items=len)
+def get_meals(start_date, end_date, user_id="all", limit=None, cursor=None):
+    """Belirtilen tarih aralığı ve kullanıcıya göre öğünleri getir
+
+    limit verilirse en yeniden eskiye en fazla limit öğün döner; cursor,
+    önceki sayfanın son öğünü için meal_cursor() değeridir.
+    """
     if DEMO_MODE:
-        # Demo verilerini al
-        all_meals = DEMO_MEALS.copy()
-        
-        # Kullanıcının eklediği öğünleri ekle
-        if 'user_meals' in st.session_state:
-            all_meals.extend(st.session_state.user_meals)
-        
-        # Filtreleme
-        filtered_meals = []
-        for meal in all_meals:
-            if user_id == "all" or meal["User"]["code"] == user_id:
-                filtered_meals.append(meal)
-        return filtered_meals
-    
-    headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    params = {
-        "startDate": start_date,
-        "endDate": end_date,
-        "userId": user_id
-    }
+        # Yerel depodan (tarih aralığı, kullanıcı ve sayfa filtresiyle) al
+        return meal_store.get_meals(start_date, end_date, user_id, limit, cursor)
+    
+    # Artımlı senkronizasyon modu: yalnızca değişiklikler indirilir, sorgu yerelden cevaplanır
+    if MEAL_SYNC:
+        try:
+            meals = meal_sync.query(api, st.session_state.token, st.session_state.user["code"],
+                                    start_date, end_date, user_id, limit, cursor)
+        except Exception as e:
+            st.error(f"Bağlantı hatası: {str(e)}")
+            return []
+        stale_notice(meal_sync.stale_since(st.session_state.user["code"], user_id, MEAL_CACHE_TTL))
+        return meals
+    
+    # Süreç genelindeki önbellekten dene
+    cache_key = meal_cache_key(start_date, end_date, user_id, st.session_state.user["code"], limit, cursor)
+    cached = meal_cache.get(cache_key)
+    if cached is not None:
+        prefetcher.touch("meals", [cache_key])
+        return cached
+    
+    # Süresi dolmuş ama son bilinen sayfa hemen gösterilir, arka planda yenilenir
+    stale = meal_cache.get_stale(cache_key)
+    if stale is not None:
+        meals, stored_at = stale
+        revalidate_meals(cache_key, start_date, end_date, user_id, limit, cursor)
+        stale_notice(stored_at)
+        return meals
     
     try:
-        response = requests.get(MEALS_URL, headers=headers, params=params)
-        if response.status_code == 200:
-            return response.json()
+        response, meals = fetch_meals_page(st.session_state.token, start_date, end_date, user_id, limit, cursor)
+        add_to_span(bytes=len(response.content))
+        if meals is not None:
+            meal_cache.set(cache_key, meals)
+            return meals
         else:
             st.error(f"Veri alınamadı: {response.json().get('error', 'Bilinmeyen hata')}")
             return []
@@ -222,73 +347,325 @@ def get_meals(start_date, end_date, user_id="all"):
         st.error(f"Bağlantı hatası: {str(e)}")
         return []
 
-def download_pdf_report(start_date, end_date, user_id="all"):
-    """PDF raporu indir"""
-    if DEMO_MODE:
-        st.info("🎯 Demo modunda PDF raporu özelliği simülasyonu")
-        st.download_button(
-            label="📥 Demo PDF Raporunu İndir",
-            data="Demo PDF içeriği - Gerçek implementasyonda PDF oluşturulacak",
-            file_name=f"demo-diyet-rapor-{start_date}-{end_date}.txt",
-            mime="text/plain"
-        )
-        return
+def revalidate_meals(cache_key, start_date, end_date, user_id="all", limit=None, cursor=None):
+    """Bayat öğün sayfasını arka planda yeniden iste; sayfa başına aynı anda tek istek"""
+    token = st.session_state.token
     
-    headers = {"Authorization": f"Bearer {st.session_state.token}"}
+    def refresh():
+        _, meals = fetch_meals_page(token, start_date, end_date, user_id, limit, cursor)
+        return meals is not None and meal_cache.set(cache_key, meals)
+    revalidator.submit(cache_key, refresh)
+
+def stale_notice(since):
+    """Son bilinen (bayat) veriler gösteriliyorsa hangi andan kaldığını belirt"""
+    if since is None:
+        return
+    at = datetime.fromtimestamp(since, LOCAL_TIMEZONE).strftime("%d.%m.%Y %H:%M:%S")
+    st.caption(f"🕒 Son bilinen veriler gösteriliyor ({at} itibarıyla); arka planda yenileniyor")
+
+def fetch_meals_page(token, start_date, end_date, user_id="all", limit=None, cursor=None):
+    """Backend'den bir öğün sayfası iste; (yanıt, öğünler) döndürür, hata yanıtında öğünler None
+
+    Oturum durumuna dokunmaz, arka plan iş parçacıklarında da çalışır.
+    """
     params = {
         "startDate": start_date,
         "endDate": end_date,
         "userId": user_id
     }
+    if limit:
+        params["limit"] = limit
+    if cursor:
+        params["cursor"] = cursor
+    
+    response = api.get_meals(token, params)
+    if response.status_code != 200:
+        return response, None
+    meals = response.json()
+    if limit or cursor:
+        # Sayfalamayı desteklemeyen backend'lerde de yalnızca bu sayfa tutulur
+        meals = select_meals(meals, "all", limit, cursor)
+    return response, meals
+
+@traced("search_meals", items=len)
+def search_meals(query, user_id="all", limit=None, cursor=None):
+    """Öğün notu, öğün türü ve kullanıcı adında tam metin arama (en yeniden eskiye)
+
+    Demo ve senkronizasyon modlarında tüm tarihler, aksi halde filtrelenen
+    tarih aralığı aranır; aralık henüz seçilmemişse None döner.
+    """
+    if DEMO_MODE:
+        return meal_store.search(query, user_id, limit, cursor)
+    
+    # Artımlı senkronizasyon modunda arama, kümenin bellek içi indeksinden yapılır
+    if MEAL_SYNC:
+        try:
+            meals = meal_sync.search(api, st.session_state.token, st.session_state.user["code"],
+                                     query, user_id, limit, cursor)
+        except Exception as e:
+            st.error(f"Bağlantı hatası: {str(e)}")
+            return []
+        stale_notice(meal_sync.stale_since(st.session_state.user["code"], user_id, MEAL_CACHE_TTL))
+        return meals
+    
+    # Aksi halde filtrelenen aralığın sayfaları, arama sayfası dolana kadar okunup süzülür
+    if not st.session_state.get("dietitian_filter"):
+        st.info("Arama, filtrelenen tarih aralığında yapılır; önce 🔍 Filtrele ile bir aralık seçin")
+        return None
+    start_date, end_date, _ = st.session_state.dietitian_filter
+    token = st.session_state.token
+    terms = search_terms(query)
+    cache_key = search_cache_key(start_date, end_date, user_id, st.session_state.user["code"], terms, limit, cursor)
+    
+    def search():
+        pages = iter_backend_meals(api, token, start_date, end_date, user_id, page_size=limit or REPORT_PAGE_SIZE,
+                                   cursor=cursor)
+        return filter_meals(pages, query, limit)
+    return cached_result(cache_key, search, "Aranıyor...") or []
+
+@traced("get_summary")
+def get_summary(start_date, end_date, user_id="all"):
+    """Aralığın özetini (günlük, öğün türü, kullanıcı, boş günler) getir"""
+    if DEMO_MODE:
+        return meal_store.summary(start_date, end_date, user_id)
+    
+    # Artımlı senkronizasyon modunda özet, kümenin günlük özetlerinden gelir
+    if MEAL_SYNC:
+        try:
+            with st.spinner("Özet hazırlanıyor..."):
+                summary = meal_sync.summary(api, st.session_state.token, st.session_state.user["code"],
+                                            start_date, end_date, user_id)
+        except Exception as e:
+            st.error(f"Bağlantı hatası: {str(e)}")
+            return None
+        stale_notice(meal_sync.stale_since(st.session_state.user["code"], user_id, MEAL_CACHE_TTL))
+        return summary
+    
+    # Aksi halde yalnızca aralığın öğünleri sayfa sayfa okunup özetlenir
+    token = st.session_state.token
+    cache_key = summary_cache_key(start_date, end_date, user_id, st.session_state.user["code"])
+    return cached_result(cache_key, lambda: fetch_summary(token, start_date, end_date, user_id),
+                         "Özet hazırlanıyor...", kind="summary")
+
+def fetch_summary(token, start_date, end_date, user_id="all", on_response=None):
+    """Aralığın özetini backend'den sayfa sayfa okunan öğünlerden hesapla
+
+    Oturum durumuna dokunmaz, arka plan iş parçacıklarında da çalışır.
+    """
+    rollups = DailyRollups()
+    for meal in iter_backend_meals(api, token, start_date, end_date, user_id, on_response=on_response):
+        rollups.add(meal)
+    return rollups.summary(start_date, end_date, user_id)
+
+def cached_result(cache_key, compute, spinner, kind=None):
+    """compute() sonucunu süreç genelindeki öğün önbelleğinden sun
+
+    Taze kayıt yoksa son bilinen (bayat) değer gösterilip arka planda
+    yenilenir, o da yoksa sonuç hesaplanıp önbelleğe yazılır. kind verilirse
+    isabet ön yüklemenin isabet oranına sayılır. Hata olursa None döner.
+    """
+    cached = meal_cache.get(cache_key)
+    if cached is not None:
+        if kind:
+            prefetcher.touch(kind, [cache_key])
+        return cached
+    
+    stale = meal_cache.get_stale(cache_key)
+    if stale is not None:
+        value, stored_at = stale
+        revalidator.submit(cache_key, lambda: meal_cache.set(cache_key, compute()))
+        stale_notice(stored_at)
+        return value
     
     try:
-        response = requests.get(REPORT_URL, headers=headers, params=params, stream=True)
-        
-        if response.status_code == 200:
-            # PDF dosyasını base64 formatına çevir
-            pdf_data = BytesIO(response.content)
-            base64_pdf = base64.b64encode(pdf_data.read()).decode('utf-8')
-            
-            # Dosya adı oluştur
-            file_name = f"diyet-rapor-{start_date}-{end_date}.pdf"
-            
-            # İndirme bağlantısı
-            pdf_display = f'<a href="data:application/pdf;base64,{base64_pdf}" download="{file_name}" target="_blank">📥 PDF Raporunu İndir</a>'
-            st.markdown(pdf_display, unsafe_allow_html=True)
-        else:
-            st.error(f"PDF oluşturulamadı: {response.json().get('error', 'Bilinmeyen hata')}")
+        with st.spinner(spinner):
+            value = compute()
     except Exception as e:
-        st.error(f"PDF indirme hatası: {str(e)}")
+        st.error(f"Bağlantı hatası: {str(e)}")
+        return None
+    meal_cache.set(cache_key, value)
+    return value
+
+def report_job_key(start_date, end_date, user_id, *extra):
+    """Rapor / dışa aktarma işinin anahtarı; meal_cache_key gibi çağıranı içerir
+
+    Böylece bir kullanıcının hazırladığı çıktı başka bir kullanıcıya verilmez.
+    """
+    return (start_date, end_date, user_id, st.session_state.user["code"], *extra)
+
+def submit_report(start_date, end_date, user_id):
+    """Rapor işini arka plan kuyruğuna gönder ve oturuma kaydet"""
+    if DEMO_MODE:
+        fetch_image = meal_image_fetcher()
+        produce = lambda: render_report(meal_store.iter_meals(start_date, end_date, user_id, REPORT_PAGE_SIZE),
+                                        fetch_image, start_date, end_date, user_id)
+    elif REPORT_ENGINE == "local":
+        token = st.session_state.token
+        fetch_image = meal_image_fetcher()
+        produce = lambda: render_report(iter_backend_meals(api, token, start_date, end_date, user_id),
+                                        fetch_image, start_date, end_date, user_id)
+    else:
+        token = st.session_state.token
+        produce = lambda: fetch_report(api, token, start_date, end_date, user_id)
+    job = report_jobs.submit(report_job_key(start_date, end_date, user_id), produce)
+    st.session_state.report_job_id = job.id
+    return job
+
+def submit_export(start_date, end_date, user_id, fmt):
+    """Dışa aktarma işini arka plan kuyruğuna gönder; öğünler kaynaktan parça parça okunur"""
+    if DEMO_MODE:
+        meals = lambda: meal_store.iter_meals(start_date, end_date, user_id, EXPORT_CHUNK_SIZE)
+    else:
+        token = st.session_state.token
+        meals = lambda: iter_backend_meals(api, token, start_date, end_date, user_id)
+    job = report_jobs.submit(
+        report_job_key(start_date, end_date, user_id, fmt),
+        lambda: export_meals(meals(), fmt, start_date, end_date, user_id)
+    )
+    st.session_state.export_job_id = job.id
+    return job
+
+def session_jobs():
+    """Bu oturumun rapor ve dışa aktarma işleri (süresi dolanlar hariç)"""
+    jobs = (report_jobs.get(st.session_state.get(key)) for key in ("report_job_id", "export_job_id"))
+    return [job for job in jobs if job is not None]
+
+@traced("download_pdf_report")
+def download_pdf_report(start_date, end_date, user_id="all"):
+    """PDF raporu indir"""
+    # Bu oturumun rapor işi (farklı bir filtre içinse yok say)
+    job = report_jobs.get(st.session_state.get("report_job_id"))
+    if job is not None and job.key != report_job_key(start_date, end_date, user_id):
+        job = None
+    
+    # Rapor yalnızca kullanıcı istediğinde arka planda üretilir; yoklama
+    # (report_panel) sayfa bir kez tamamen çizildiğinde başlar
+    if job is None:
+        if st.button("📄 PDF Raporu Hazırla"):
+            submit_report(start_date, end_date, user_id)
+            st.rerun()
+        return
+    
+    if job.pending:
+        st.info("⏳ PDF raporu hazırlanıyor, öğünler aşağıda gösteriliyor...")
+    elif job.status == job.FAILED:
+        st.error(f"PDF oluşturulamadı: {job.error}")
+        if st.button("🔁 Tekrar Dene"):
+            submit_report(start_date, end_date, user_id)
+            st.rerun()
+    else:
+        artifact_download(
+            job, "report_job_id",
+            ask_label="📄 PDF Dosyasını Al",
+            label="📥 PDF Raporunu İndir",
+            mime="application/pdf",
+            expired="⌛ Raporun süresi doldu, yeniden hazırlayın"
+        )
+
+@traced("download_export")
+def download_export(start_date, end_date, user_id="all"):
+    """Ham öğün verisini CSV / JSON Lines / Parquet olarak indir"""
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox(
+            "📦 Veri Biçimi",
+            list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f].label,
+            key="export_format",
+            label_visibility="collapsed"
+        )
+    
+    job = report_jobs.get(st.session_state.get("export_job_id"))
+    if job is not None and job.key != report_job_key(start_date, end_date, user_id, fmt):
+        job = None
+    
+    with col2:
+        if job is None:
+            if st.button("📦 Veriyi Dışa Aktar"):
+                submit_export(start_date, end_date, user_id, fmt)
+                st.rerun()
+        elif job.pending:
+            st.info("⏳ Veri dışa aktarılıyor...")
+        elif job.status == job.FAILED:
+            st.error(f"Dışa aktarma başarısız: {job.error}")
+            if st.button("🔁 Dışa Aktarmayı Tekrar Dene"):
+                submit_export(start_date, end_date, user_id, fmt)
+                st.rerun()
+        else:
+            artifact_download(
+                job, "export_job_id",
+                ask_label=f"📦 {EXPORT_FORMATS[fmt].label} Dosyasını Al",
+                label=f"📥 {EXPORT_FORMATS[fmt].label} İndir",
+                mime=EXPORT_FORMATS[fmt].mime,
+                expired="⌛ Dışa aktarmanın süresi doldu, yeniden hazırlayın"
+            )
+
+def artifact_download(job, job_state_key, ask_label, label, mime, expired):
+    """Biten işin çıktısını iki adımda indir
 
-def display_meals_by_date(meals):
-    """Öğünleri tarihe göre grupla ve görüntüle"""
+    Çıktı (50 MB'a kadar) her yeniden çalıştırmada ve yoklamada okunmaz:
+    önce ask_label düğmesi gösterilir, dosya yalnızca ona basılan
+    çalıştırmada okunup indirme düğmesine verilir.
+    """
+    if not st.button(ask_label, key=f"{job_state_key}_ask"):
+        return
+    data = job.artifact.read()
+    if data is None:
+        st.session_state[job_state_key] = None
+        st.warning(expired)
+        return
+    add_to_span(bytes=len(data))
+    st.download_button(label=label, data=data, file_name=job.artifact.file_name, mime=mime)
+
+def image_fetcher(frame, token=None):
+    """Öğün fotoğraflarını image_key ile indiren fonksiyonu döndür (arka plan iş parçacıklarında çalışır)"""
+    if DEMO_MODE:
+        meal_types = dict(zip(frame["image_key"], frame["meal_type"]))
+        return lambda image_key: placeholder_image(meal_types.get(image_key, "Demo"))
+    
+    token = token or st.session_state.token
+    image_urls = dict(zip(frame["image_key"], frame["image_url"]))
+    
+    def fetch(image_key):
+        response = api.get_image(token, image_key, image_urls.get(image_key))
+        response.raise_for_status()
+        return response.content
+    return fetch
+
+def meal_image_fetcher():
+    """Rapor için öğün sözlüğünden fotoğraf indiren fonksiyonu döndür (arka plan iş parçacıklarında çalışır)"""
+    if DEMO_MODE:
+        return lambda meal: placeholder_image(meal.get("meal_type") or "Demo")
+    
+    token = st.session_state.token
+    
+    def fetch(meal):
+        response = api.get_image(token, meal["image_key"], meal.get("imageUrl"))
+        response.raise_for_status()
+        return response.content
+    return fetch
+
+@traced("display_meals_by_date")
+def display_meals_by_date(meals, key_prefix="full"):
+    """Öğünleri tarihe göre grupla ve görüntüle (key_prefix: aynı öğün iki listede olabilir)"""
     if not meals:
         st.info("📭 Seçilen kriterlerde öğün bulunamadı")
         return
     
-    # Tarihe göre grupla
-    meals_by_date = {}
-    for meal in meals:
-        # taken_at'tan tarih çıkar
-        taken_at = meal["taken_at"]
-        if isinstance(taken_at, str):
-            # ISO formatından datetime'a çevir
-            dt = datetime.fromisoformat(taken_at.replace('Z', '+00:00'))
-            date_str = dt.strftime('%d.%m.%Y')
-        else:
-            date_str = taken_at.strftime('%d.%m.%Y')
-            
-        if date_str not in meals_by_date:
-            meals_by_date[date_str] = []
-        meals_by_date[date_str].append(meal)
+    # Öğünleri bir kez sütunlu çerçeveye çevir (saatler yerel saat diliminde)
+    frame = to_frame(meals)
     
-    # Tarihleri sırala (en yeni önce)
-    sorted_dates = sorted(meals_by_date.keys(), key=lambda x: datetime.strptime(x, '%d.%m.%Y'), reverse=True)
+    # Tüm kartların küçük resimlerini tek seferde (eksikleri eş zamanlı) getir
+    fetch_image = image_fetcher(frame)
+    image_keys = frame["image_key"].tolist()
+    thumbnails = thumbnail_store.get_thumbnails(image_keys, fetch_image)
+    prefetcher.touch("thumbnail", image_keys)
+    add_to_span(bytes=sum(map(len, thumbnails.values())), items=len(meals))
     
-    for date in sorted_dates:
+    # Yerel takvim gününe göre grupla (en yeni gün önce)
+    for date, day_meals in group_by_day(frame):
         st.markdown(f'<div class="date-header">📅 {date}</div>', unsafe_allow_html=True)
         
-        day_meals = meals_by_date[date]
         cols = st.columns(min(len(day_meals), 3))  # Maksimum 3 sütun
         
         for i, meal in enumerate(day_meals):
@@ -296,264 +673,723 @@ def display_meals_by_date(meals):
                 with st.container():
                     st.markdown('<div class="card">', unsafe_allow_html=True)
                     
-                    # Demo modu için placeholder resim
-                    if DEMO_MODE:
-                        st.image("https://via.placeholder.com/300x200/22c55e/ffffff?text=Demo+Meal", use_container_width=True)
+                    # Küçük resim; tam boy fotoğraf yalnızca kart büyütülünce indirilir
+                    thumbnail = thumbnails.get(meal.image_key)
+                    if thumbnail is not None:
+                        st.image(thumbnail, use_column_width=True)
                     else:
-                        # Gerçek resim URL'si (implement edilecek)
-                        st.image("https://via.placeholder.com/300x200/e5e7eb/6b7280?text=Food+Image", use_container_width=True)
+                        st.image("https://via.placeholder.com/300x200/e5e7eb/6b7280?text=Food+Image", use_column_width=True)
+                    if st.toggle("🔍 Büyüt", key=f"{key_prefix}_{meal.id}"):
+                        full_image = thumbnail_store.get_full(meal.image_key, fetch_image)
+                        if full_image is not None:
+                            st.image(full_image, use_column_width=True)
+                        else:
+                            st.warning("Fotoğraf yüklenemedi")
                     
                     # Öğün detayları
-                    st.markdown(f'<div class="meal-meta"><span><strong>{meal["meal_type"]}</strong></span><span>{format_time(meal["taken_at"])}</span></div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="meal-meta"><span><strong>{meal.meal_type}</strong></span><span>{meal.local_time}</span></div>', unsafe_allow_html=True)
                     
-                    if meal.get("note"):
-                        st.write(f"💭 {meal['note']}")
+                    if meal.note:
+                        st.write(f"💭 {meal.note}")
                     
-                    st.markdown(f"👤 **{meal['User']['name']}**")
+                    st.markdown(f"👤 **{meal.user_name}**")
                     st.markdown('</div>', unsafe_allow_html=True)
-        date = meal["taken_at"].split("T")[0]
-        if date not in meals_by_date:
-            meals_by_date[date] = []
-        meals_by_date[date].append(meal)
-    
-    # Her tarih için öğünleri göster
-    for date in sorted(meals_by_date.keys()):
-        formatted_date = format_date(date)
-        st.markdown(f"<div class='date-header'>{formatted_date}</div>", unsafe_allow_html=True)
-        
-        # Her gün için bir grid oluştur
-        cols = st.columns(3)
-        
-        for i, meal in enumerate(meals_by_date[date]):
-            with cols[i % 3]:
-                st.markdown(f"""
-                <div class='card'>
-                    <img src="{meal['imageUrl']}" alt="{meal['meal_type']}">
-                    <div class='meal-meta'>
-                        <span>{meal['User']['name']} • {meal['meal_type']}</span>
-                        <span>{format_time(meal['taken_at'])}</span>
-                    </div>
-                    <div>{meal['note'] or ''}</div>
-                </div>
-                """, unsafe_allow_html=True)
 
-def main():
-    """Ana uygulama"""
-    # Oturum kontrolü
-    if "logged_in" not in st.session_state or not st.session_state.logged_in:
-        login()
+def format_day(day):
+    """YYYY-MM-DD -> DD.MM.YYYY"""
+    return f"{day[8:10]}.{day[5:7]}.{day[:4]}"
+
+def display_summary(summary):
+    """Aralık özeti: toplamlar, günlük öğün grafiği, öğün türleri, kullanıcılar ve boş günler"""
+    import pandas as pd
+    
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    col_m1.metric("Toplam Öğün", summary["total"])
+    col_m2.metric("Öğün Girilen Gün", f"{summary['logged_days']} / {summary['day_count']}")
+    col_m3.metric("Günlük Ortalama", f"{summary['total'] / max(summary['logged_days'], 1):.1f}")
+    col_m4.metric("En Uzun Boşluk", f"{max((gap[2] for gap in summary['gaps']), default=0)} gün")
+    
+    days = pd.DataFrame(summary["days"], columns=["Gün", "Öğün"])
+    days["Gün"] = pd.to_datetime(days["Gün"])
+    st.bar_chart(days.set_index("Gün"), height=220)
+    
+    col_types, col_users = st.columns(2)
+    with col_types:
+        st.markdown("**🍴 Öğün Türleri**")
+        st.table([
+            {"Öğün Türü": meal_type, "Sayı": count, "Ortalama Saat": avg_time}
+            for meal_type, count, avg_time in summary["meal_types"]
+        ])
+    with col_users:
+        st.markdown("**👤 Kullanıcılar**")
+        st.table([{"Kullanıcı": name, "Öğün": count} for _, name, count in summary["users"]])
+    
+    if summary["gaps"]:
+        gaps = [
+            format_day(first) if length == 1 else f"{format_day(first)} – {format_day(last)} ({length} gün)"
+            for first, last, length in summary["gaps"][:10]
+        ]
+        more = len(summary["gaps"]) - len(gaps)
+        st.caption("📭 Öğün girilmeyen günler: " + ", ".join(gaps) + (f" ve {more} aralık daha" if more > 0 else ""))
+
+def report_panel():
+    """PDF raporu ve veri dışa aktarma düğmeleri; iş hazırlanırken yalnızca bu bölüm yoklanır"""
+    if st.session_state.get("report_polling") and not any(job.pending for job in session_jobs()):
+        # Yoklama bitti: tam çalıştırma tarayıcıdaki yoklama zamanlayıcısını da durdurur
+        st.session_state.report_polling = False
+        st.rerun()
+    download_pdf_report(*st.session_state.dietitian_filter)
+    download_export(*st.session_state.dietitian_filter)
+
+def display_range(start_date, end_date, user_id):
+    """Aralık özetini göster; ham öğünler yalnızca seçilen gün için çizilir"""
+    summary = get_summary(start_date, end_date, user_id)
+    if summary is None:
+        cancel_prefetch()
+        return
+    if not summary["total"]:
+        cancel_prefetch()
+        st.info("📭 Seçilen aralıkta kayıt bulunamadı.")
         return
     
-    # Ana uygulama arayüzü
-    st.title(f"🍽️ Diyet Foto Günlüğü - Hoş geldin {st.session_state.user['name']}!")
+    # PDF raporu ve ham veri (istenirse) indir; bekleyen iş varsa panel kendi başına yoklanır
+    st.session_state.report_polling = any(job.pending for job in session_jobs())
+    st.fragment(report_panel, run_every=REPORT_POLL_INTERVAL if st.session_state.report_polling else None)()
     
+    display_summary(summary)
+    
+    # Gün detayı: ham öğün kartları yalnızca bir güne inildiğinde getirilir
+    day_counts = {day: count for day, count in reversed(summary["days"]) if count}
+    schedule_prefetch(start_date, end_date, user_id)
+    day = st.selectbox(
+        "🔎 Gün Detayı",
+        [None] + list(day_counts),
+        format_func=lambda d: "Gün seçin" if d is None else f"{format_day(d)} ({day_counts[d]} öğün)",
+        key="summary_day"
+    )
+    if day is None:
+        return
+    meals = get_meals(
+        day,
+        day,
+        user_id,
+        limit=MEALS_PAGE_SIZE,
+        cursor=current_page_cursor(day, day, user_id)
+    )
+    display_meals_by_date(meals)
+    meal_page_controls(meals)
+
+def window_days(job, token, caller, start_date, end_date, user_id):
+    """Pencerede öğün olan günler, en yeniden eskiye (arka plan iş parçacığında çalışır)"""
     if DEMO_MODE:
-        st.info("🎯 Demo Modu - Örnek verilerle çalışıyor")
+        summary = meal_store.summary(start_date, end_date, user_id)
+    elif MEAL_SYNC:
+        summary = meal_sync.summary(api, token, caller, start_date, end_date, user_id)
+    else:
+        # get_summary() ile aynı anahtar: pencereye geçince özet önbellekten okunur
+        cache_key = summary_cache_key(start_date, end_date, user_id, caller)
+        summary = meal_cache.peek(cache_key)
+        if summary is None:
+            summary = fetch_summary(token, start_date, end_date, user_id,
+                                    on_response=lambda response: job.add_bytes(len(response.content)))
+            meal_cache.set(cache_key, summary)
+            prefetcher.loaded("summary", [cache_key])
+    return [day for day, count in reversed(summary["days"]) if count]
+
+def prefetch_day(job, token, caller, day, user_id):
+    """Gün detayının ilk sayfasını önbelleğe yükle; küçük resimlerini yükleyen birimleri döndür
+
+    Arka plan iş parçacığında çalışır.
+    """
+    if DEMO_MODE:
+        meals = meal_store.get_meals(day, day, user_id, MEALS_PAGE_SIZE)
+    elif MEAL_SYNC:
+        meals = meal_sync.query(api, token, caller, day, day, user_id, MEALS_PAGE_SIZE)
+    else:
+        # get_meals() ile aynı anahtar: gün detayı bu kaydı önbellekten okur
+        cache_key = meal_cache_key(day, day, user_id, caller, MEALS_PAGE_SIZE, None)
+        meals = meal_cache.peek(cache_key)
+        if meals is None:
+            response, meals = fetch_meals_page(token, day, day, user_id, MEALS_PAGE_SIZE)
+            job.add_bytes(len(response.content))
+            if meals is None:
+                return []
+            meal_cache.set(cache_key, meals)
+            prefetcher.loaded("meals", [cache_key])
+    if not meals or job.cancelled:
+        return []
     
-    # Sekmeler
-    tabs = st.tabs(["� Veri Girişi", "�📊 Diyetisyen Görünümü", "⚙️ Ayarlar"])
+    # Küçük resimler ayrı birimlerdir: ön yükleme havuzunda eş zamanlı indirilir
+    frame = to_frame(meals)
+    fetch = prefetcher.fetcher(job, image_fetcher(frame, token))
     
-    with tabs[0]:
-        st.subheader("🍽️ Yeni Öğün Ekle")
-        
-        # Veri girişi formu
-        with st.form("meal_form", clear_on_submit=True):
-            col1, col2 = st.columns([2, 1])
+    def thumbnail_unit(image_key):
+        def load(job):
+            if thumbnail_store.prefetch(image_key, fetch):
+                prefetcher.loaded("thumbnail", [image_key])
+        return load
+    return [thumbnail_unit(key) for key in frame["image_key"].tolist()]
+
+def schedule_prefetch(start_date, end_date, user_id):
+    """Önce önceki, sonra sonraki pencereyi arka planda yükle (oturum başına tek iş)
+
+    Gösterilen aralığın günleri yüklenmez: geriye gezinirken bunlar bir
+    önceki ekranın "önceki penceresi" olarak zaten yüklenmiştir. Az önce
+    gösterilen pencere (gelinen yön) de yeniden yüklenmez.
+    """
+    if not PREFETCH:
+        return
+    key = (start_date, end_date, user_id)
+    job = st.session_state.get("prefetch_job")
+    if job is not None and job.key == key and not job.cancelled:
+        return
+    prefetcher.cancel(job)
+    
+    token = st.session_state.token
+    caller = st.session_state.user["code"]
+    
+    def day_unit(day):
+        return lambda job: prefetch_day(job, token, caller, day, user_id)
+    
+    def window_unit(first, last):
+        return lambda job: [day_unit(day) for day in window_days(job, token, caller, first, last, user_id)]
+    
+    windows = adjacent_windows(start_date, end_date)[1:]
+    if job is not None and job.key[2] == user_id and job.key[:2] in windows:
+        windows.remove(job.key[:2])
+    units = [window_unit(first, last) for first, last in windows]
+    st.session_state.prefetch_job = prefetcher.submit(key, units)
+
+def cancel_prefetch():
+    """Oturumun ön yükleme işini durdur (başka aralığa ya da bölüme geçildi)"""
+    prefetcher.cancel(st.session_state.get("prefetch_job"))
+    st.session_state.prefetch_job = None
+
+def current_page_cursor(*page_filter, pager="meals"):
+    """Filtre için geçerli sayfanın imleci; filtre değişince ilk sayfaya dön
+
+    pager, aynı ekrandaki ayrı sayfalamaları (gün detayı, arama) ayırır.
+    """
+    if st.session_state.get(f"{pager}_page_filter") != page_filter:
+        st.session_state[f"{pager}_page_filter"] = page_filter
+        st.session_state[f"{pager}_page_cursors"] = [None]
+    return st.session_state[f"{pager}_page_cursors"][-1]
+
+def meal_page_controls(meals, pager="meals"):
+    """Daha yeni / daha eski sayfa düğmeleri"""
+    cursors = st.session_state[f"{pager}_page_cursors"]
+    col_newer, col_page, col_older = st.columns([1, 2, 1])
+    with col_newer:
+        if len(cursors) > 1:
+            st.button("⬅️ Daha yeni", on_click=cursors.pop, key=f"{pager}_newer")
+    with col_page:
+        st.caption(f"📄 Sayfa {len(cursors)}")
+    with col_older:
+        if len(meals) == MEALS_PAGE_SIZE:
+            st.button("Daha eski ➡️", on_click=cursors.append, args=(meal_cursor(meals[-1]),), key=f"{pager}_older")
+
+MEAL_TYPES = ["Kahvaltı", "Öğle", "Akşam", "Atıştırma"]
+
+# Toplu yüklemede parça durumu -> kartta gösterilen etiket
+UPLOAD_STATUS_LABELS = {
+    UploadPart.PENDING: "⏸️ Bekliyor",
+    UploadPart.SENDING: "⏳ Gönderiliyor...",
+    UploadPart.DONE: "✅ Kaydedildi",
+    UploadPart.FAILED: "❌ Gönderilemedi",
+}
+
+# Gönderim kuyruğundaki öğünün durumu -> "Son Eklenen Öğünlerim" etiketi
+OUTBOX_STATUS_LABELS = {
+    UploadOutbox.PENDING: "⏳ Gönderilmeyi bekliyor",
+    UploadOutbox.SENDING: "📤 Gönderiliyor",
+    UploadOutbox.SENT: "✅ Gönderildi",
+    UploadOutbox.FAILED: "❌ Gönderilemedi",
+}
+
+# Devre kesici durumu -> Ayarlar'daki etiket
+BREAKER_STATE_LABELS = {
+    CircuitBreaker.CLOSED: "🟢 Kapalı",
+    CircuitBreaker.OPEN: "🔴 Açık",
+    CircuitBreaker.HALF_OPEN: "🟡 Yarı açık",
+}
+
+def prepared_images(uploaded_files):
+    """Her yeni fotoğrafı arka planda bir kez çöz/küçült; file_id -> Future"""
+    previous = st.session_state.get("prepared_images") or {}
+    futures = {}
+    for uploaded_file in uploaded_files:
+        future = previous.get(uploaded_file.file_id)
+        if future is None:
+            future = submit_prepare(uploaded_file.getvalue())
+        futures[uploaded_file.file_id] = future
+    st.session_state.prepared_images = futures
+    return futures
+
+def upload_status_text(status):
+    """(durum, deneme, hata) -> kartta gösterilen kısa metin"""
+    state, attempts, error = status
+    text = UPLOAD_STATUS_LABELS[state]
+    if attempts > 1:
+        text += f" ({attempts}. deneme)"
+    if error and state == UploadPart.FAILED:
+        text += f": {error}"
+    return text
+
+def save_meals_demo(entries):
+    """Demo: öğünleri yerel depoya tek işlemde ekle; küçük resimler doğrudan önbelleğe girer"""
+    meals = []
+    with span("upload") as upload_span:
+        for entry in entries:
+            prepared = entry["future"].result()
+            # İçerik adresli anahtar: aynı fotoğraf ikinci kez küçük resme çevrilmez
+            image_key = f"user_upload_{prepared.content_hash[:24]}.jpg"
+            thumbnail_store.put(image_key, prepared.data)
+            meals.append({
+                "meal_type": entry["meal_type"],
+                "note": entry["note"],
+                "taken_at": LOCAL_TIMEZONE.localize(entry["taken_at"]),
+                "image_key": image_key,
+                "User": st.session_state.user,
+            })
+            upload_span.add(bytes=len(prepared.data), items=1)
+        meal_store.insert_meals(meals)
+    for entry in entries:
+        st.session_state.upload_status[entry["file_id"]] = (UploadPart.DONE, 1, None)
+        entry["slot"].caption(upload_status_text(st.session_state.upload_status[entry["file_id"]]))
+
+def save_meals_outbox(entries):
+    """Öğünleri kalıcı gönderim kuyruğuna yaz; backend'e gönderim arka planda yapılır"""
+    with span("upload") as upload_span:
+        for entry in entries:
+            prepared = entry["future"].result()
+            file_name = os.path.splitext(entry["file_name"])[0] + ".jpg"
+            # Aynı fotoğraf ikinci kez kaydedilirse kuyrukta ve backend'de tek öğün kalsın
+            idempotency_key = st.session_state.upload_keys.setdefault(entry["file_id"], uuid.uuid4().hex)
+            try:
+                outbox.enqueue(
+                    st.session_state.token,
+                    st.session_state.user,
+                    entry["meal_type"],
+                    entry["note"],
+                    entry["taken_at"].isoformat(),
+                    file_name,
+                    prepared.data,
+                    prepared.mime,
+                    idempotency_key,
+                    prepared.content_hash,
+                )
+                status = (UploadPart.DONE, 1, None)
+                upload_span.add(bytes=len(prepared.data), items=1)
+            except (OSError, sqlite3.Error) as e:
+                status = (UploadPart.FAILED, 1, str(e))
+            st.session_state.upload_status[entry["file_id"]] = status
+            entry["slot"].caption(upload_status_text(status))
+
+def recent_outbox_meals():
+    """Kuyruktaki (ve yakın zamanda gönderilmiş) son öğünler, durumlarıyla"""
+    for entry in outbox.recent(st.session_state.user["code"], 3):
+        taken_at = datetime.fromisoformat(entry["taken_at"]).strftime('%d.%m.%Y %H:%M')
+        label = OUTBOX_STATUS_LABELS[entry["status"]]
+        with st.expander(f"{entry['meal_type']} - {taken_at} • {label}"):
+            if entry["note"]:
+                st.write(f"📝 {entry['note']}")
+            st.write(f"👤 {entry['user_name']}")
+            if entry["status"] == UploadOutbox.FAILED:
+                st.error(f"❌ {entry['last_error']}")
+                st.button(
+                    "🔁 Tekrar Dene",
+                    key=f"outbox_retry_{entry['id']}",
+                    on_click=outbox.retry,
+                    args=(entry["id"],),
+                )
+            elif entry["status"] == UploadOutbox.PENDING and entry["attempts"]:
+                st.caption(f"🔄 {entry['attempts']} deneme • son hata: {entry['last_error']}")
+        yield entry
+
+@isolated
+def meal_entry_section():
+    """Veri girişi: fotoğraf yükleme, öğün formu ve son eklenen öğünler"""
+    st.subheader("🍽️ Yeni Öğün Ekle")
+    
+    # Fotoğraf yükleme (EXIF tarihini forma aktarabilmek için form dışında)
+    st.session_state.setdefault("upload_nonce", 0)
+    st.session_state.setdefault("upload_status", {})  # file_id -> (durum, deneme, hata)
+    st.session_state.setdefault("upload_keys", {})  # file_id -> Idempotency-Key
+    nonce = st.session_state.upload_nonce
+    uploaded_files = st.file_uploader(
+        "📸 Yemek Fotoğrafları Yükle",
+        type=['png', 'jpg', 'jpeg'],
+        accept_multiple_files=True,
+        help="Bir günün öğünlerini tek seferde ekleyebilirsiniz; her fotoğraf ayrı bir öğün olarak kaydedilir",
+        key=f"meal_photo_{nonce}"
+    )
+    
+    # Yeni fotoğrafları arka planda bir kez çöz, küçült ve EXIF zamanlarını oku
+    futures = prepared_images(uploaded_files)
+    if futures:
+        wait(list(futures.values()), timeout=IMAGE_PREFILL_WAIT)
+    
+    # Veri girişi formu: fotoğraf başına öğün türü, not ve zaman
+    with st.form("meal_form"):
+        entries = []
+        for i, uploaded_file in enumerate(uploaded_files):
+            future = futures[uploaded_file.file_id]
+            prepared = future.result() if future.done() and future.exception() is None else None
+            exif_taken_at = prepared.taken_at if prepared else None
+            
+            col_image, col1, col2 = st.columns([1, 2, 1])
+            
+            with col_image:
+                # Fotoğraf önizlemesi
+                st.image(uploaded_file, width=160)
+                if prepared:
+                    st.caption(
+                        f"🗜️ {prepared.original_size / 1024:.0f} KB → {len(prepared.data) / 1024:.0f} KB"
+                        + (f" • 📷 {exif_taken_at.strftime('%d.%m.%Y %H:%M')}" if exif_taken_at else "")
+                    )
+                slot = st.empty()
+                status = st.session_state.upload_status.get(uploaded_file.file_id)
+                if status:
+                    slot.caption(upload_status_text(status))
             
             with col1:
                 meal_type = st.selectbox(
                     "🍴 Öğün Türü",
-                    ["Kahvaltı", "Öğle", "Akşam", "Atıştırma"],
-                    index=0
+                    MEAL_TYPES,
+                    index=0,
+                    key=f"meal_type_{nonce}_{i}"
                 )
                 
                 note = st.text_area(
                     "📝 Not (Opsiyonel)",
                     placeholder="Örn: Sağlıklı kahvaltı, az yağlı yemek...",
-                    height=100
+                    height=68,
+                    key=f"meal_note_{nonce}_{i}"
                 )
             
             with col2:
-                taken_at_date = st.date_input("📅 Tarih", value=datetime.now().date())
-                taken_at_time = st.time_input("🕐 Saat", value=datetime.now().time())
-            
-            # Fotoğraf yükleme
-            uploaded_file = st.file_uploader(
-                "📸 Yemek Fotoğrafı Yükle",
-                type=['png', 'jpg', 'jpeg'],
-                help="PNG, JPG veya JPEG formatında fotoğraf yükleyebilirsiniz"
-            )
-            
-            # Fotoğraf önizlemesi
-            if uploaded_file is not None:
-                st.image(uploaded_file, caption="Yüklenen Fotoğraf", width=300)
+                # EXIF çekim zamanı varsa varsayılan olarak onu kullan
+                default_taken_at = exif_taken_at or datetime.now()
+                taken_at_date = st.date_input("📅 Tarih", value=default_taken_at.date(), key=f"meal_date_{nonce}_{i}")
+                taken_at_time = st.time_input("🕐 Saat", value=default_taken_at.time(), key=f"meal_time_{nonce}_{i}")
             
-            # Form gönderme butonu
-            submitted = st.form_submit_button("💾 Öğünü Kaydet", type="primary")
-            
-            if submitted:
-                if uploaded_file is None:
-                    st.error("❌ Lütfen bir fotoğraf yükleyin!")
-                else:
-                    # Tarih ve saati birleştir
-                    taken_at = datetime.combine(taken_at_date, taken_at_time)
-                    
-                    if DEMO_MODE:
-                        # Demo modunda sadece başarı mesajı göster
-                        st.success(f"✅ {meal_type} öğünü başarıyla kaydedildi!")
-                        st.info(f"👤 Kullanıcı: {st.session_state.user['name']}")
-                        st.info(f"📅 Tarih: {taken_at.strftime('%d.%m.%Y %H:%M')}")
-                        if note:
-                            st.info(f"📝 Not: {note}")
-                        
-                        # Demo veriye ekle (session state'te tutabiliriz)
-                        if 'user_meals' not in st.session_state:
-                            st.session_state.user_meals = []
-                        
-                        new_meal = {
-                            "id": f"user_{len(st.session_state.user_meals)}",
-                            "meal_type": meal_type,
-                            "note": note,
-                            "taken_at": taken_at.isoformat() + "Z",
-                            "image_key": f"user_upload_{len(st.session_state.user_meals)}.jpg",
-                            "User": st.session_state.user
-                        }
-                        st.session_state.user_meals.append(new_meal)
-                        
-                    else:
-                        # Gerçek API'ye gönder
-                        with st.spinner("Öğün kaydediliyor..."):
-                            try:
-                                # Multipart form data hazırla
-                                files = {'image': uploaded_file.getvalue()}
-                                data = {
-                                    'mealType': meal_type,
-                                    'note': note,
-                                    'takenAt': taken_at.isoformat()
-                                }
-                                headers = {"Authorization": f"Bearer {st.session_state.token}"}
-                                
-                                response = requests.post(
-                                    f"{API_BASE_URL}/api/upload",
-                                    files=files,
-                                    data=data,
-                                    headers=headers,
-                                    timeout=30
-                                )
-                                
-                                if response.status_code == 201:
-                                    st.success("✅ Öğün başarıyla kaydedildi!")
-                                else:
-                                    st.error(f"❌ Kayıt başarısız: {response.json().get('error', 'Bilinmeyen hata')}")
-                                    
-                            except Exception as e:
-                                st.error(f"❌ Bağlantı hatası: {str(e)}")
-        
-        # Kullanıcının son öğünlerini göster
-        st.subheader("📋 Son Eklenen Öğünlerim")
-        
-        if DEMO_MODE and 'user_meals' in st.session_state and st.session_state.user_meals:
-            for meal in reversed(st.session_state.user_meals[-3:]):  # Son 3 öğün
-                with st.expander(f"{meal['meal_type']} - {format_date(meal['taken_at'])} {format_time(meal['taken_at'])}"):
-                    if meal.get('note'):
-                        st.write(f"📝 {meal['note']}")
-                    st.write(f"👤 {meal['User']['name']}")
-        else:
-            st.info("🍽️ Henüz öğün eklenmemiş. Yukarıdaki formu kullanarak ilk öğününüzü ekleyin!")
-
-    with tabs[1]:
-        st.subheader("Diyetisyen Görünümü")
+            entries.append({
+                "file_id": uploaded_file.file_id,
+                "file_name": uploaded_file.name,
+                "future": future,
+                "meal_type": meal_type,
+                "note": note,
+                # Tarih ve saati birleştir
+                "taken_at": datetime.combine(taken_at_date, taken_at_time),
+                "slot": slot,
+            })
         
-        # Filtreler
-        col1, col2, col3 = st.columns([2, 2, 1])
+        # Form gönderme butonu
+        label = "💾 Öğünü Kaydet" if len(entries) <= 1 else f"💾 {len(entries)} Öğünü Kaydet"
+        submitted = st.form_submit_button(label, type="primary")
         
-        # Son 7 günü varsayılan olarak ayarla
-        default_end = datetime.now().date()
-        default_start = default_end - timedelta(days=7)
-        
-        with col1:
-            start_date = st.date_input("📅 Başlangıç Tarihi", value=default_start)
-        
-        with col2:
-            end_date = st.date_input("📅 Bitiş Tarihi", value=default_end)
-        
-        with col3:
-            user_filter = st.selectbox(
-                "👤 Kullanıcı",
-                ["Tümü", "A (Ben)", "B (Eşim)"],
-                index=0
-            )
-            
-            # Kullanıcı filtresi değerini hazırla
-            if user_filter == "Tümü":
-                user_id = "all"
-            else:
-                user_id = user_filter[0]  # İlk karakteri al (A veya B)
-        
-        # Otomatik veri yükleme (Demo modunda)
-        if DEMO_MODE:
-            st.write("🔄 Demo veriler otomatik yükleniyor...")
-            meals = get_meals(
-                start_date.isoformat(),
-                end_date.isoformat(),
-                user_id
-            )
-            
-            if meals:
-                # PDF raporu indir butonu
-                col_pdf1, col_pdf2 = st.columns([1, 2])
-                with col_pdf1:
-                    download_pdf_report(
-                        start_date.isoformat(),
-                        end_date.isoformat(),
-                        user_id
-                    )
+        if submitted:
+            # Daha önce kaydedilenler atlanır; yalnızca bekleyen ve başarısız olanlar gönderilir
+            entries = [
+                entry for entry in entries
+                if st.session_state.upload_status.get(entry["file_id"], (None,))[0] != UploadPart.DONE
+            ]
+            failed_prepare = [entry for entry in entries if entry["future"].exception() is not None]
+            if not uploaded_files:
+                st.error("❌ Lütfen en az bir fotoğraf yükleyin!")
+            elif failed_prepare:
+                for entry in failed_prepare:
+                    st.error(f"❌ {entry['file_name']} işlenemedi: {str(entry['future'].exception())}")
+            elif entries:
+                if DEMO_MODE:
+                    save_meals_demo(entries)
+                else:
+                    save_meals_outbox(entries)
                 
-                # Öğünleri görüntüle
-                display_meals_by_date(meals)
-            else:
-                st.info("📭 Seçilen aralıkta kayıt bulunamadı.")
-        else:
-            # Gerçek mod - filtreleme butonu ile
-            if st.button("🔍 Filtrele", type="primary"):
-                with st.spinner("Yemekler getiriliyor..."):
-                    meals = get_meals(
-                        start_date.isoformat(),
-                        end_date.isoformat(),
-                        user_id
+                statuses = [st.session_state.upload_status[entry["file_id"]][0] for entry in entries]
+                failed = statuses.count(UploadPart.FAILED)
+                if failed:
+                    st.error(
+                        f"❌ {failed} öğün kaydedilemedi. Tekrar kaydettiğinizde yalnızca "
+                        "başarısız olanlar gönderilir."
                     )
-                    
-                    if meals:
-                        # PDF raporu indir
-                        with st.spinner("PDF raporu hazırlanıyor..."):
-                            download_pdf_report(
-                                start_date.isoformat(),
-                                end_date.isoformat(),
-                                user_id
-                            )
-                        
-                        # Öğünleri görüntüle
-                        display_meals_by_date(meals)
-                    else:
-                        st.info("📭 Seçilen aralıkta kayıt bulunamadı.")
+                else:
+                    st.success(f"✅ {len(entries)} öğün başarıyla kaydedildi!")
+                    if not DEMO_MODE:
+                        st.info("📤 Öğünler arka planda gönderiliyor; durumları aşağıda görünür")
+                    st.info(f"👤 Kullanıcı: {st.session_state.user['name']}")
+                    # Yeni toplu yükleme için formu sıfırla
+                    st.session_state.upload_nonce += 1
+                    st.session_state.upload_status = {}
+                    st.session_state.upload_keys = {}
+    
+    # Kullanıcının son öğünlerini göster
+    st.subheader("📋 Son Eklenen Öğünlerim")
+    
+    if DEMO_MODE:
+        recent_meals = meal_store.recent_meals(st.session_state.user["code"], 3)
+        for meal in recent_meals:  # Son 3 öğün
+            with st.expander(f"{meal['meal_type']} - {format_date(meal['taken_at'])} {format_time(meal['taken_at'])}"):
+                if meal.get('note'):
+                    st.write(f"📝 {meal['note']}")
+                st.write(f"👤 {meal['User']['name']}")
+    else:
+        # Gerçek modda kayıtlar gönderim kuyruğundan, bekleyen/gönderildi durumuyla gösterilir
+        recent_meals = list(recent_outbox_meals())
+    if not recent_meals:
+        st.info("🍽️ Henüz öğün eklenmemiş. Yukarıdaki formu kullanarak ilk öğününüzü ekleyin!")
+
+@isolated
+def dietitian_section():
+    """Diyetisyen görünümü: filtreler, rapor ve tarihe göre öğünler"""
+    st.subheader("Diyetisyen Görünümü")
+    
+    # Filtreler
+    col1, col2, col3 = st.columns([2, 2, 1])
+    
+    # Son 7 günü varsayılan olarak ayarla (bölümler arasında gezerken korunur)
+    default_end = datetime.now().date()
+    st.session_state.setdefault("filter_start", default_end - timedelta(days=7))
+    st.session_state.setdefault("filter_end", default_end)
+    
+    with col1:
+        start_date = st.date_input("📅 Başlangıç Tarihi", key="filter_start")
+    
+    with col2:
+        end_date = st.date_input("📅 Bitiş Tarihi", key="filter_end")
+    
+    with col3:
+        user_filter = st.selectbox(
+            "👤 Kullanıcı",
+            USER_FILTER_OPTIONS,
+            key="filter_user"
+        )
+        user_id = filter_user_id(user_filter)
+    
+    # Otomatik veri yükleme (Demo modunda)
+    if DEMO_MODE:
+        st.write("🔄 Demo veriler otomatik yükleniyor...")
+        st.session_state.dietitian_filter = (start_date.isoformat(), end_date.isoformat(), user_id)
+    else:
+        # Gerçek mod - filtreleme butonu ile
+        if st.button("🔍 Filtrele", type="primary"):
+            st.session_state.dietitian_filter = (start_date.isoformat(), end_date.isoformat(), user_id)
+    
+    meal_search()
+    dietitian_results()
+
+USER_FILTER_OPTIONS = ["Tümü", "A (Ben)", "B (Eşim)"]
+
+def filter_user_id(user_filter):
+    """Kullanıcı filtresi seçeneği -> all, A ya da B"""
+    if user_filter == "Tümü":
+        return "all"
+    return user_filter[0]  # İlk karakteri al (A veya B)
+
+@isolated
+def meal_search():
+    """Öğün arama (bkz. search_meals); sorgu ve sayfalama yalnızca bu bölümü yeniden çalıştırır"""
+    user_id = filter_user_id(st.session_state.get("filter_user", "Tümü"))
+    query = st.text_input(
+        "🔎 Öğün Ara",
+        key="search_query",
+        placeholder="Not, öğün türü ya da kişi (ör. tatlı, fast food, Eşim)"
+    )
+    if not query.strip():
+        return
+    meals = search_meals(
+        query,
+        user_id,
+        limit=MEALS_PAGE_SIZE,
+        cursor=current_page_cursor(query, user_id, st.session_state.get("dietitian_filter"), pager="search")
+    )
+    if meals is None:
+        return
+    display_meals_by_date(meals, key_prefix="search_full")
+    meal_page_controls(meals, pager="search")
+    st.divider()
+
+@isolated
+def dietitian_results():
+    """Uygulanan filtrenin sonuçları; gün seçimi ve sayfalama yalnızca bu bölümü yeniden çalıştırır"""
+    # Son uygulanan filtre sonraki etkileşimlerde de geçerli kalır
+    if st.session_state.get("dietitian_filter"):
+        display_range(*st.session_state.dietitian_filter)
+
+@isolated
+def settings_section():
+    """Ayarlar: önbellek ve performans metrikleri, demo modu, çıkış"""
+    st.subheader("⚙️ Ayarlar")
+    
+    # API URL bilgisi
+    st.info(f"🔗 API URL: {API_BASE_URL}")
+    st.info(f"🎯 Demo Modu: {'Aktif' if DEMO_MODE else 'Pasif'}")
+    st.info(
+        f"🗄️ Durum Deposu: {STATE_BACKEND} "
+        f"({'öğün önbelleği, raporlar ve oturumlar süreçler arasında paylaşılıyor' if SHARED_STATE else 'yalnızca bu süreç'})"
+    )
+    
+    # Öğün önbelleği istatistikleri
+    st.markdown("**🗃️ Öğün Önbelleği**")
+    cache_stats = meal_cache.stats()
+    col_c1, col_c2, col_c3, col_c4 = st.columns(4)
+    col_c1.metric("İsabet", cache_stats["hits"])
+    col_c2.metric("Iskalama", cache_stats["misses"])
+    col_c3.metric("İsabet Oranı", f"{cache_stats['hit_rate']:.0%}")
+    col_c4.metric("Boyut", f"{cache_stats['bytes'] / 1024:.0f} KB")
+    st.caption(
+        f"{cache_stats['entries']} kayıt • {cache_stats['evictions']} çıkarma • "
+        f"{cache_stats['invalidations']} geçersiz kılma"
+    )
+    if STALE_WHILE_REVALIDATE and not DEMO_MODE:
+        revalidate_stats = revalidator.stats()
+        st.caption(
+            f"🕒 Son bilinen veri: {cache_stats['stale_hits']} sayfa bayatken gösterildi • "
+            f"{revalidate_stats['refreshes']} arka plan yenilemesi ({revalidate_stats['failures']} hata) • "
+            f"{revalidate_stats['in_flight']} süren"
+        )
+    if MEAL_SYNC:
+        sync_stats = meal_sync.stats()
+        st.caption(
+            f"🔄 Artımlı senkronizasyon: {sync_stats['syncs']} eşitleme • {sync_stats['not_modified']} × 304 • "
+            f"{sync_stats['meals']} yerel öğün • alınan {sync_stats['bytes_received'] / 1024:.0f} KB • "
+            f"kazanılan {sync_stats['bytes_saved'] / 1024:.0f} KB (son: {sync_stats['last_bytes_saved'] / 1024:.0f} KB)"
+        )
+    thumb_stats = thumbnail_store.stats()
+    st.caption(
+        f"🖼️ Küçük resimler: {thumb_stats['entries']} kayıt • {thumb_stats['bytes'] / 1024:.0f} KB • "
+        f"isabet {thumb_stats['hit_rate']:.0%} • disk {thumb_stats['disk_hits']} • "
+        f"indirme {thumb_stats['fetches']} ({thumb_stats['fetch_errors']} hata)"
+    )
+    if outbox is not None:
+        outbox_stats = outbox.stats()
+        st.caption(
+            f"📤 Gönderim kuyruğu: {outbox_stats['pending'] + outbox_stats['sending']} bekleyen • "
+            f"{outbox_stats['failed']} hatalı • {outbox_stats['sent_total']} gönderildi "
+            f"({outbox_stats['bytes_sent'] / 1024:.0f} KB) • {outbox_stats['retries']} yeniden deneme • "
+            f"♻️ {outbox_stats['deduplicated']} tekrar fotoğraf gönderilmedi "
+            f"({outbox_stats['bytes_saved'] / 1024:.0f} KB tasarruf)"
+        )
+    if PREFETCH:
+        prefetch_stats = prefetcher.stats()
+        st.caption(
+            f"🔮 Ön yükleme: {prefetch_stats['prefetched']} öğe ({prefetch_stats['bytes'] / 1024:.0f} KB) • "
+            f"{prefetch_stats['used']} gösterildi • isabet {prefetch_stats['hit_rate']:.0%} • "
+            f"{prefetch_stats['pending']} bekleyen • {prefetch_stats['cancelled']} iptal • "
+            f"{prefetch_stats['budget_stops']} bütçe sınırı"
+        )
+    if st.button("🧹 Önbelleği Temizle"):
+        meal_cache.clear()
+        thumbnail_store.clear()
+        st.success("✅ Önbellek temizlendi")
+    
+    # Backend gecikme histogramları
+    latency = api.latency_summary()
+    if latency:
+        st.markdown("**⏱️ Backend Gecikmeleri (ms)**")
+        st.table([
+            {"Uç nokta": endpoint, "İstek": s["count"], "Hata": s["errors"],
+             "Ort.": round(s["avg_ms"], 1), "p50": s["p50_ms"], "p95": s["p95_ms"], "p99": s["p99_ms"]}
+            for endpoint, s in latency.items()
+        ])
+    
+    # Devre kesiciler: backend çökünce istekler bekleme süresince gönderilmez
+    if not DEMO_MODE:
+        st.markdown("**🛡️ Devre Kesiciler**")
+        if BREAKER_FAILURES > 0:
+            st.table([
+                {"Uç nokta": endpoint, "Durum": BREAKER_STATE_LABELS[s["state"]], "Açılma": s["trips"],
+                 "Reddedilen": s["short_circuited"], "Art arda hata": s["consecutive"], "Yavaş": s["slow_calls"],
+                 "Son neden": s["last_reason"] or "-",
+                 "Son açılma": datetime.fromtimestamp(s["last_trip"], LOCAL_TIMEZONE).strftime("%H:%M:%S")
+                 if s["last_trip"] else "-"}
+                for endpoint, s in api.breaker_stats().items()
+            ])
+        else:
+            st.caption("Devre kesici kapalı (BREAKER_FAILURES=0)")
+    
+    # Performans paneli (PERF_TRACING=true ile açılır)
+    if PERF_TRACING:
+        st.markdown("**📈 Performans (son çalıştırmalar)**")
+        history = st.session_state.get("perf_history") or []
+        if history:
+            st.table([
+                dict(
+                    {"Zaman": datetime.fromisoformat(record["at"]).astimezone(LOCAL_TIMEZONE).strftime("%H:%M:%S"),
+                     "Kapsam": record.get("scope", "app"),
+                     "Toplam (ms)": round(record["total_ms"], 1)},
+                    **{name: format_span(s) for name, s in record["spans"].items()}
+                )
+                for record in reversed(history)
+            ])
+        st.download_button(
+            label="📥 Prometheus Metrikleri",
+            data=perf_metrics.prometheus_text(),
+            file_name="diyet-metrics.prom",
+            mime="text/plain"
+        )
+    
+    # Demo modu toggle
+    demo_toggle = st.toggle("Demo Modu", value=DEMO_MODE)
+    if demo_toggle != DEMO_MODE:
+        os.environ["STREAMLIT_DEMO_MODE"] = "true" if demo_toggle else "false"
+        st.info("🔄 Değişikliklerin geçerli olması için sayfayı yenileyin")
+    
+    # Çıkış yap
+    if st.button("🚪 Çıkış Yap", type="secondary"):
+        cancel_prefetch()
+        forget_session()
+        st.session_state.logged_in = False
+        st.session_state.token = None
+        st.session_state.user = None
+        st.session_state.dietitian_filter = None
+        st.session_state.report_job_id = None
+        st.session_state.export_job_id = None
+        st.rerun()
+
+# Gezinme bölümleri (etiket -> çizim fonksiyonu)
+SECTIONS = {
+    "📸 Veri Girişi": meal_entry_section,
+    "📊 Diyetisyen Görünümü": dietitian_section,
+    "⚙️ Ayarlar": settings_section,
+}
+
+# Bölüm değiştirince kaybolmaması gereken widget değerleri
+FILTER_KEYS = ("filter_start", "filter_end", "filter_user")
+
+def keep_filter_state():
+    """Görünmeyen bölümün filtre değerlerini koru (Streamlit çizilmeyen widget'ların durumunu siler)"""
+    for key in FILTER_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+def main():
+    """Ana uygulama"""
+    # Oturum kontrolü
+    if "logged_in" not in st.session_state or not st.session_state.logged_in:
+        if not restore_session():
+            login()
+            return
+    
+    # Ana uygulama arayüzü
+    st.title(f"🍽️ Diyet Foto Günlüğü - Hoş geldin {st.session_state.user['name']}!")
+    
+    if DEMO_MODE:
+        st.info("🎯 Demo Modu - Örnek verilerle çalışıyor")
+    else:
+        # Kuyruktaki öğünler diske yazılmayan, bu oturumun geçerli jetonuyla gönderilir
+        outbox.set_token(st.session_state.user["code"], st.session_state.token)
+    
+    # Bölümler: yalnızca seçili bölüm çalıştırılır (st.tabs her seferinde tüm sekmeleri çizer).
+    # Her bölüm bir fragment'tır; bölüm içindeki etkileşimler yalnızca o bölümü yeniden çalıştırır.
+    keep_filter_state()
+    section = st.radio("Bölüm", SECTIONS, horizontal=True, key="active_section", label_visibility="collapsed")
+    if SECTIONS[section] is not dietitian_section:
+        # Diyetisyen görünümünden çıkıldı: komşu aralıkların ön yüklemesi artık gereksiz
+        cancel_prefetch()
+    SECTIONS[section]()
+    remember_session()
 
-    with tabs[2]:
-        st.subheader("⚙️ Ayarlar")
-        
-        # API URL bilgisi
-        st.info(f"🔗 API URL: {API_BASE_URL}")
-        st.info(f"🎯 Demo Modu: {'Aktif' if DEMO_MODE else 'Pasif'}")
-        
-        # Demo modu toggle
-        demo_toggle = st.toggle("Demo Modu", value=DEMO_MODE)
-        if demo_toggle != DEMO_MODE:
-            os.environ["STREAMLIT_DEMO_MODE"] = "true" if demo_toggle else "false"
-            st.info("🔄 Değişikliklerin geçerli olması için sayfayı yenileyin")
-        
-        # Çıkış yap
-        if st.button("🚪 Çıkış Yap", type="secondary"):
-            st.session_state.logged_in = False
-            st.session_state.token = None
-            st.session_state.user = None
 if __name__ == "__main__":
-    main()
+    with rerun_trace(st.session_state):
+        main()
@@ -0,0 +1,100 @@
+# Toplu fotoğraf yüklemesi: sıralı gönderim ile eş zamanlı gönderim karşılaştırması
+#
+# Kullanım:
+#   python benchmarks/bench_bulk_upload.py --photos 10 --bandwidth-mbit 10
+#   python benchmarks/bench_bulk_upload.py --photos 10 --error-rate 0.2
+#
+# Fotoğraflar bir kez prepare_image ile hazırlanır, sonra sahte backend'e iki
+# kez gönderilir: tek tek upload_meal ile (önce) ve upload_meals ile eş
+# zamanlı (sonra). Bant genişliği bağlantı başınadır, yani telefonun tek bir
+# yükleme akışında gördüğü hızı taklit eder. --error-rate ile yüklemelerin
+# bir kısmı 503 ile reddedilir ve parça bazında yeniden denemeler ölçülür.
+# Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import UPLOAD_WORKERS, BackendClient, UploadPart  # noqa: E402
+from bench_image_upload import synthetic_photos  # noqa: E402
+from images import prepare_image  # noqa: E402
+from mock_backend import MockBackend  # noqa: E402
+
+
+def parts_for(photos):
+    return [
+        UploadPart(
+            {"mealType": "Öğle", "note": "", "takenAt": f"2025-08-17T{8 + i % 12:02d}:00:00"},
+            {"image": (name, data, "image/jpeg")},
+        )
+        for i, (name, data) in enumerate(photos)
+    ]
+
+
+def sequential(client, parts):
+    """Eski yol: her öğün ayrı ve sırayla; hata olursa yeniden denenmez"""
+    latencies = []
+    failed = 0
+    started = time.perf_counter()
+    for part in parts:
+        part_started = time.perf_counter()
+        response = client.upload_meal("bench", part.data, part.files)
+        latencies.append(time.perf_counter() - part_started)
+        failed += response.status_code != 201
+    return {
+        "wall_s": round(time.perf_counter() - started, 3),
+        "slowest_part_s": round(max(latencies), 3),
+        "failed": failed,
+    }
+
+
+def concurrent(client, parts):
+    started = time.perf_counter()
+    futures = client.upload_meals("bench", parts)
+    results = [future.result() for future in futures]
+    return {
+        "wall_s": round(time.perf_counter() - started, 3),
+        "slowest_part_s": round(max(part.elapsed_ms for part in results) / 1000, 3),
+        "failed": sum(part.status == UploadPart.FAILED for part in results),
+        "attempts": sum(part.attempts for part in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toplu fotoğraf yükleme benchmarkı")
+    parser.add_argument("--photos", type=int, default=10)
+    parser.add_argument("--bandwidth-mbit", type=float, default=10.0, help="Bağlantı başına yükleme hızı")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 ile reddedilen yükleme oranı")
+    args = parser.parse_args()
+
+    photos = [(name, prepare_image(data).data)
+              for name, data in synthetic_photos(args.photos, size=(2016, 1512))]
+
+    with MockBackend(latency_ms=args.latency_ms, upload_bandwidth=args.bandwidth_mbit * 125_000,
+                     upload_error_rate=args.error_rate) as backend:
+        client = BackendClient(backend.base_url)
+        before = sequential(client, parts_for(photos))
+        after = concurrent(client, parts_for(photos))
+        stored = len(backend.uploads)
+
+    result = {
+        "photos": args.photos,
+        "bytes_total": sum(len(data) for _, data in photos),
+        "bandwidth_mbit": args.bandwidth_mbit,
+        "error_rate": args.error_rate,
+        "upload_workers": UPLOAD_WORKERS,
+        "sequential": before,
+        "concurrent": after,
+        "speedup": round(before["wall_s"] / after["wall_s"], 2),
+        "concurrent_vs_slowest": round(after["wall_s"] / after["slowest_part_s"], 2),
+        "meals_stored": stored,
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
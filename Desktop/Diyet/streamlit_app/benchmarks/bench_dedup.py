@@ -0,0 +1,98 @@
+# İçerik adresli yükleme: tekrar gönderilen fotoğraflarda aktarılan bayt ve süre
+#
+# Kullanım:
+#   python benchmarks/bench_dedup.py --photos 10 --shared 0.5 --resubmit 0.3
+#   python benchmarks/bench_dedup.py --photos 20 --bandwidth-mbit 2 --latency-ms 80
+#
+# Fotoğraflar bir kez prepare_image ile hazırlanır. Senaryo gönderim kuyruğu
+# (UploadOutbox) üzerinden sahte backend'e iki tur halinde gönderilir:
+#   1. A kullanıcısı her fotoğrafı kaydeder; --shared oranındaki fotoğraflar
+#      ortak öğün olarak B kullanıcısı için de kaydedilir.
+#   2. --resubmit oranındaki fotoğraflar (ör. zaman aşımından sonra) yeniden
+#      kaydedilir. Bu tur ayrı bir kuyruk dizininden gönderilir, yani yerel
+#      özet dizini boştur ve tekrarlar backend sorgusuyla (find_image) bulunur.
+# Aynı senaryo tekilleştirme kapalı (önce) ve açık (sonra) çalıştırılır.
+# Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import BackendClient  # noqa: E402
+from bench_image_upload import synthetic_photos  # noqa: E402
+from images import prepare_image  # noqa: E402
+from mock_backend import MockBackend  # noqa: E402
+from outbox import UploadOutbox  # noqa: E402
+
+USERS = {"A": {"code": "A", "name": "Ben"}, "B": {"code": "B", "name": "Eşim"}}
+
+
+def drain(outbox, client):
+    while outbox.drain_once(client):
+        pass
+
+
+def run(photos, shared, resubmit, dedup, args):
+    first = [("A", i) for i in range(len(photos))] + [("B", i) for i in range(shared)]
+    second = [("A", i) for i in range(resubmit)]
+    with MockBackend(latency_ms=args.latency_ms, upload_bandwidth=args.bandwidth_mbit * 125_000) as backend:
+        client = BackendClient(backend.base_url)
+        started = time.perf_counter()
+        stats = {}
+        for batch in (first, second):
+            outbox = UploadOutbox(tempfile.mkdtemp(prefix="diyet-dedup-"), dedup=dedup)
+            for code, i in batch:
+                prepared = photos[i]
+                outbox.enqueue(f"mock-{code}", USERS[code], "Öğle", "", f"2025-08-17T{8 + i % 12:02d}:00:00",
+                               f"photo_{i}.jpg", prepared.data, prepared.mime, content_hash=prepared.content_hash)
+            drain(outbox, client)
+            for key, value in outbox.stats().items():
+                stats[key] = stats.get(key, 0) + value
+        wall_s = time.perf_counter() - started
+        backend_stats = backend.stats()
+    return {
+        "wall_s": round(wall_s, 3),
+        "meals_stored": len(backend.uploads),
+        "images_stored": backend_stats["images_stored"],
+        "image_kb_uploaded": round(backend_stats["image_bytes_received"] / 1024),
+        "request_kb_uploaded": round(backend_stats["bytes_received"] / 1024),
+        "hash_lookups": backend_stats["request_counts"].get("/api/images/hash", 0),
+        "deduplicated": stats["deduplicated"],
+        "kb_saved": round(stats["bytes_saved"] / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İçerik adresli yükleme benchmarkı")
+    parser.add_argument("--photos", type=int, default=10)
+    parser.add_argument("--shared", type=float, default=0.5, help="B için de kaydedilen fotoğraf oranı")
+    parser.add_argument("--resubmit", type=float, default=0.3, help="Yeniden kaydedilen fotoğraf oranı")
+    parser.add_argument("--bandwidth-mbit", type=float, default=10.0, help="Bağlantı başına yükleme hızı")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    photos = [prepare_image(data) for _, data in synthetic_photos(args.photos, size=(2016, 1512))]
+    shared = int(args.photos * args.shared)
+    resubmit = int(args.photos * args.resubmit)
+
+    before = run(photos, shared, resubmit, False, args)
+    after = run(photos, shared, resubmit, True, args)
+    result = {
+        "photos": args.photos,
+        "meals": args.photos + shared + resubmit,
+        "photo_kb": round(sum(len(p.data) for p in photos) / 1024),
+        "bandwidth_mbit": args.bandwidth_mbit,
+        "without_dedup": before,
+        "with_dedup": after,
+        "upload_reduction": round(1 - after["image_kb_uploaded"] / max(before["image_kb_uploaded"], 1), 2),
+        "speedup": round(before["wall_s"] / after["wall_s"], 2),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Ham veri dışa aktarma: CSV / JSON Lines / Parquet hızı ve tepe belleği
+#
+# Kullanım:
+#   python benchmarks/bench_export.py --users 20 --days 365
+#   python benchmarks/bench_export.py --users 50 --formats parquet --chunk 10000
+#
+# Geçici bir veritabanı seed_meals ile doldurulur ve son --days günün tüm
+# kullanıcılarının öğünleri iki yoldan dışa aktarılır: export_meals ile
+# iter_meals'ten parça parça yazan akış yolu ve tüm aralığı tek listede
+# okuyup pandas ile yazan yol (to_frame + to_csv / to_json / to_parquet).
+# Her (biçim, yol) ayrı bir süreçte ölçülür, böylece tepe RSS (ru_maxrss)
+# önceki ölçümlerden etkilenmez. Süre tracemalloc kapalıyken ölçülür;
+# Python tepe belleği (tracemalloc) ayrı bir çalıştırmadadır. pyarrow'un
+# kendi bellek havuzu tracemalloc'a görünmediğinden yalnızca RSS'te yer
+# alır. Sonuç JSON olarak yazdırılır.
+import argparse
+import importlib
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def peak_rss_mb():
+    # Linux'ta ru_maxrss kilobayttır
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def materialized_export(store, fmt, start, end):
+    """Eski yol: aralığın tüm öğünlerini bir listede topla ve pandas ile yaz"""
+    from meal_frame import to_frame
+
+    meals = store.get_meals(start, end)
+    frame = to_frame(meals)
+    frame["user_name"] = [(meal.get("User") or {}).get("name") for meal in meals]
+    frame = frame.drop(columns=["image_url"])
+    out = io.BytesIO()
+    if fmt == "csv":
+        out.write(frame.to_csv(index=False).encode("utf-8-sig"))
+    elif fmt == "jsonl":
+        out.write(frame.to_json(orient="records", lines=True, force_ascii=False, date_format="iso").encode("utf-8"))
+    else:
+        frame.to_parquet(out, index=False, compression="zstd")
+    return out.tell()
+
+
+def child(db_path, days, fmt, path, chunk_size, repeat):
+    # İçe aktarma maliyeti (süre ve bellek) ölçüme girmesin
+    for module in ("pandas", "pyarrow.parquet"):
+        importlib.import_module(module)
+
+    from exports import export_meals
+    from meal_store import SqliteMealStore
+
+    store = SqliteMealStore(db_path)
+    end = date.today().isoformat()
+    start = (date.today() - timedelta(days=days - 1)).isoformat()
+
+    def streaming():
+        artifact = export_meals(store.iter_meals(start, end, batch_size=chunk_size), fmt, start, end,
+                                max_bytes=1 << 40, chunk_size=chunk_size)
+        artifact.close()
+        return artifact.size
+
+    run = streaming if path == "streaming" else lambda: materialized_export(store, fmt, start, end)
+    baseline = peak_rss_mb()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = run()
+        times.append(time.perf_counter() - started)
+    rss = peak_rss_mb()
+    tracemalloc.start()
+    run()
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    meals = store.count(start, end)
+    seconds = statistics.median(times)
+    return {
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(meals / seconds),
+        "mb_per_s": round(size / seconds / 1024 / 1024, 1),
+        "output_kb": round(size / 1024),
+        "python_peak_kb": round(python_peak / 1024),
+        "rss_growth_mb": round(rss - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ham veri dışa aktarma benchmarkı")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "parquet"])
+    parser.add_argument("--chunk", type=int, default=5000, help="Parça başına öğün sayısı")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.db, args.days, args.formats[0], args.path, args.chunk, args.repeat)))
+        return
+
+    from meal_store import SqliteMealStore
+    from seed_meals import generate_rows, synthetic_users
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="diyet-export-"), "bench.db")
+    store = SqliteMealStore(db_path)
+    store.insert_rows(list(generate_rows(
+        synthetic_users(args.users), args.days, datetime.now(timezone.utc), random.Random(42))))
+
+    result = {"users": args.users, "days": args.days, "meals": store.count(), "chunk": args.chunk}
+    for fmt in args.formats:
+        result[fmt] = {}
+        for path in ("streaming", "materialized"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--db", db_path, "--days", str(args.days),
+                 "--formats", fmt, "--path", path, "--chunk", str(args.chunk), "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result[fmt][path] = json.loads(output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
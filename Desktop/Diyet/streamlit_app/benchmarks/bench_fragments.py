@@ -0,0 +1,269 @@
+# Etkileşim başına yeniden çalıştırma (rerun) süresi: tam sayfa ve fragment
+#
+# Kullanım:
+#   python benchmarks/bench_fragments.py --repeat 20
+#   python benchmarks/bench_fragments.py --users 5 --days 365 --output sonuc.json
+#
+# AppTest her etkileşimde betiğin tamamını çalıştırdığından (fragment
+# kapsamlı yeniden çalıştırmayı taklit etmez) bu betik gerçek bir
+# "streamlit run" sunucusu başlatır ve tarayıcının yaptığı gibi websocket
+# üzerinden konuşur: widget değerlerini BackMsg olarak gönderir, widget bir
+# fragment içindeyse isteğe fragment kimliğini ekler ve script_finished
+# mesajına kadar geçen süreyi ve gelen öğe (delta) sayısını ölçer.
+#
+# wall_ms tarayıcının gördüğü süredir; yerel bağlantıda Streamlit'in küçük
+# mesajlarındaki TCP gecikmeleri (Nagle + gecikmeli ACK, ~40 ms) bunun
+# büyük kısmını oluşturur. script_ms sunucuda betiğin (ya da yalnızca
+# fragment'ın) çalışma süresidir ve PERF_LOG_PATH kayıtlarından okunur;
+# main() dışındaki modül düzeyi kod tam çalıştırmalarda buna dahil değildir.
+#
+# Senaryo demo modunda, seed_meals ile doldurulmuş geçici bir veritabanında
+# çalışır: giriş, diyetisyen filtresinde başlangıç tarihini değiştirme, gün
+# detayında gün seçme, Ayarlar'da önbelleği temizleme ve Veri Girişi
+# formunu gönderme. Aynı betik öncesi/sonrası karşılaştırması için farklı
+# commit'lerde çalıştırılabilir. Sonuç JSON olarak yazdırılır.
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date, datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+from seed_meals import generate_rows, synthetic_users  # noqa: E402
+
+SECTION_RADIO = "Bölüm"
+SECTIONS = ["📸 Veri Girişi", "📊 Diyetisyen Görünümü", "⚙️ Ayarlar"]
+# components.html ile çerez yazan betik: document.cookie = 'ad=değer; ...'
+COOKIE_SCRIPT = re.compile(r"document\.cookie = '(\w+)=([^;']*)")
+# Widget türü -> WidgetState değer alanı
+VALUE_FIELDS = {
+    "button": "trigger_value",
+    "checkbox": "bool_value",
+    "date_input": "string_array_value",
+    "radio": "int_value",
+    "selectbox": "int_value",
+    "text_input": "string_value",
+}
+
+
+class BrowserSession:
+    """Streamlit sunucusuyla websocket üzerinden konuşan başsız tarayıcı oturumu"""
+
+    def __init__(self, port, perf_log):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.perf_log = perf_log
+        self.perf_offset = 0
+        self.widgets = {}  # etiket -> (tür, widget kimliği, fragment kimliği)
+        self.values = {}  # widget kimliği -> (alan, değer)
+        self.query_string = ""  # adres çubuğundaki sorgu (uygulama st.query_params ile değiştirir)
+        self.cookies = {}  # uygulamanın bileşen betiğiyle yazdığı çerezler
+        self.connection = None
+
+    async def connect(self):
+        from tornado.httpclient import HTTPRequest
+        from tornado.websocket import websocket_connect
+
+        headers = {"Cookie": "; ".join(f"{name}={value}" for name, value in self.cookies.items())}
+        self.connection = await websocket_connect(HTTPRequest(self.url, headers=headers if self.cookies else None))
+
+    async def rerun(self, label=None, value=None):
+        """Widget değerini değiştirip (ya da düğmeye basıp) çalıştırmanın bitmesini bekle"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        fragment_id = ""
+        trigger = None
+        if label is not None:
+            kind, widget_id, fragment_id = self.widgets[label]
+            field = VALUE_FIELDS[kind]
+            if field == "trigger_value":
+                trigger = widget_id
+            else:
+                self.values[widget_id] = (field, value)
+        for widget_id, (field, stored) in self.values.items():
+            self._set_state(client_state.widget_states.widgets.add(), widget_id, field, stored)
+        if trigger is not None:
+            self._set_state(client_state.widget_states.widgets.add(), trigger, "trigger_value", True)
+        client_state.fragment_id = fragment_id
+        client_state.query_string = self.query_string
+
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        deltas, size, status = await self._read_until_finished()
+        return {
+            "ms": (time.perf_counter() - started) * 1000,
+            "script_ms": sum(record["total_ms"] for record in self._perf_records()),
+            "deltas": deltas,
+            "bytes": size,
+            "fragment": status == "FINISHED_FRAGMENT_RUN_SUCCESSFULLY",
+        }
+
+    def _perf_records(self):
+        """Son ölçümden bu yana sunucunun yazdığı çalıştırma kayıtları"""
+        if not os.path.exists(self.perf_log):
+            return []
+        with open(self.perf_log, encoding="utf-8") as f:
+            f.seek(self.perf_offset)
+            lines = f.read().splitlines()
+            self.perf_offset = f.tell()
+        return [json.loads(line) for line in lines if line]
+
+    async def _read_until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        deltas = size = 0
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise RuntimeError("Sunucu bağlantıyı kapattı")
+            size += len(data)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                self._track_widget(msg.delta)
+            elif kind == "page_info_changed":
+                self.query_string = msg.page_info_changed.query_string
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+                if status != "FINISHED_EARLY_FOR_RERUN":
+                    return deltas, size, status
+
+    def _track_widget(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        kind = delta.new_element.WhichOneof("type")
+        if kind == "iframe":
+            # Tarayıcının yapacağı gibi bileşen betiğindeki çerez atamasını uygula
+            self.cookies.update(COOKIE_SCRIPT.findall(delta.new_element.iframe.srcdoc))
+        if kind not in VALUE_FIELDS:
+            return
+        proto = getattr(delta.new_element, kind)
+        self.widgets[proto.label] = (kind, proto.id, delta.fragment_id)
+
+    @staticmethod
+    def _set_state(state, widget_id, field, value):
+        state.id = widget_id
+        if field == "string_array_value":
+            state.string_array_value.data.extend(value)
+        else:
+            setattr(state, field, value)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Streamlit sunucusu başlamadı")
+
+
+def summarize(samples):
+    times = sorted(s["ms"] for s in samples)
+    script = sorted(s["script_ms"] for s in samples)
+    return {
+        "wall_p50_ms": round(statistics.median(times), 1),
+        "wall_p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 1),
+        "script_p50_ms": round(statistics.median(script), 1),
+        "script_p95_ms": round(script[min(len(script) - 1, int(0.95 * len(script)))], 1),
+        "elements": int(statistics.median(s["deltas"] for s in samples)),
+        "kb": round(statistics.median(s["bytes"] for s in samples) / 1024, 1),
+        "fragment_runs": sum(s["fragment"] for s in samples),
+    }
+
+
+async def scenario(port, perf_log, repeat):
+    browser = BrowserSession(port, perf_log)
+    await browser.connect()
+    await browser.rerun()
+    await browser.rerun("🔑 Giriş Yap")
+
+    async def measure(label, values):
+        samples = []
+        await browser.rerun(label, values[-1])  # ısınma
+        for i in range(repeat):
+            samples.append(await browser.rerun(label, values[i % len(values)]))
+        return summarize(samples)
+
+    today = date.today()
+    result = {}
+    await browser.rerun(SECTION_RADIO, SECTIONS.index("📊 Diyetisyen Görünümü"))
+    result["dietitian_filter_start"] = await measure(
+        "📅 Başlangıç Tarihi",
+        [[(today - timedelta(days=days)).strftime("%Y/%m/%d")] for days in (30, 60)],
+    )
+    result["dietitian_day_detail"] = await measure("🔎 Gün Detayı", [1, 2])
+    await browser.rerun(SECTION_RADIO, SECTIONS.index("⚙️ Ayarlar"))
+    result["settings_clear_cache"] = await measure("🧹 Önbelleği Temizle", [True])
+    await browser.rerun(SECTION_RADIO, SECTIONS.index("📸 Veri Girişi"))
+    result["entry_form_submit"] = await measure("💾 Öğünü Kaydet", [True])
+    result["section_switch"] = await measure(SECTION_RADIO, [0, 1])
+    browser.connection.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tam sayfa / fragment rerun benchmarkı")
+    parser.add_argument("--repeat", type=int, default=20, help="Etkileşim başına ölçüm sayısı")
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--days", type=int, default=365, help="Veritabanına eklenecek gün sayısı")
+    parser.add_argument("--output", help="Sonucun ayrıca yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    from meal_store import SqliteMealStore
+    import streamlit
+
+    work_dir = tempfile.mkdtemp(prefix="diyet-fragments-")
+    db_path = os.path.join(work_dir, "demo.db")
+    perf_log = os.path.join(work_dir, "perf.jsonl")
+    SqliteMealStore(db_path).insert_rows(list(generate_rows(
+        synthetic_users(args.users), args.days, datetime.now(timezone.utc), random.Random(42))))
+
+    port = free_port()
+    env = dict(os.environ, STREAMLIT_DEMO_MODE="true", MEAL_DB_PATH=db_path, PERF_TRACING="true",
+               PERF_LOG_PATH=perf_log)
+    server = start_server(port, env)
+    try:
+        interactions = asyncio.run(scenario(port, perf_log, args.repeat))
+    finally:
+        server.terminate()
+        server.wait()
+
+    result = {"streamlit": streamlit.__version__, "repeat": args.repeat, "interactions": interactions}
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
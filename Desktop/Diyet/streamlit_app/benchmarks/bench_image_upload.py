@@ -0,0 +1,130 @@
+# Fotoğraf ön işlemesinin yükleme boyutuna ve süresine etkisi
+#
+# Kullanım:
+#   python benchmarks/bench_image_upload.py --corpus ~/telefon-fotograflari
+#   python benchmarks/bench_image_upload.py --synthetic 10 --bandwidth-mbit 10
+#
+# Her fotoğraf sahte backend'e iki kez yüklenir: olduğu gibi (önce) ve
+# prepare_image ile küçültülerek (sonra). Başarısız yüklemeler (zaman aşımı,
+# HTTP hatası) betiği durdurmaz; sayıları ve ilk hata mesajı sonuca yazılır,
+# süreler yalnızca başarılı yüklemelerden hesaplanır. Sonuç JSON olarak
+# yazdırılır.
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import BackendClient  # noqa: E402
+from images import IMAGE_JPEG_QUALITY, IMAGE_MAX_DIMENSION, prepare_image  # noqa: E402
+from mock_backend import MockBackend  # noqa: E402
+
+
+def synthetic_photos(count, size=(4032, 3024)):
+    """Telefon fotoğrafı boyutunda, gürültülü sentetik JPEG'ler üret"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(42)
+    h, w = size[1], size[0]
+    gradient = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+    for i in range(count):
+        noise = rng.normal(0, 40, (h, w, 3)).astype(np.float32)
+        pixels = np.clip(gradient * 0.6 + (i * 23 % 255) * 0.3 + noise, 0, 255).astype(np.uint8)
+        out = BytesIO()
+        exif = Image.Exif()
+        exif[0x8769] = {36867: f"2025:08:{1 + i % 28:02d} 12:{i % 60:02d}:00"}
+        Image.fromarray(pixels).save(out, "JPEG", quality=92, exif=exif)
+        yield f"synthetic_{i}.jpg", out.getvalue()
+
+
+def corpus_photos(directory):
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        if os.path.splitext(path)[1].lower() in (".jpg", ".jpeg", ".png"):
+            with open(path, "rb") as f:
+                yield os.path.basename(path), f.read()
+
+
+def upload(client, name, data):
+    """Fotoğrafı yükle: (süre, hata); hata yoksa None"""
+    data_fields = {"mealType": "Öğle", "note": "", "takenAt": "2025-08-17T12:00:00"}
+    started = time.perf_counter()
+    try:
+        response = client.upload_meal("bench", data_fields, {"image": (name, data, "image/jpeg")})
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        return time.perf_counter() - started, f"{type(e).__name__}: {e}"
+    return time.perf_counter() - started, None
+
+
+def summarize(results, sizes):
+    latencies = sorted(latency for latency, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    summary = {
+        "bytes_total": sum(sizes),
+        "bytes_mean": statistics.mean(sizes),
+        "uploaded": len(latencies),
+        "failed": len(errors),
+        "first_error": errors[0] if errors else None,
+        "latency_mean_s": None,
+        "latency_p95_s": None,
+    }
+    if latencies:
+        summary["latency_mean_s"] = statistics.mean(latencies)
+        summary["latency_p95_s"] = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fotoğraf ön işleme benchmarkı")
+    parser.add_argument("--corpus", help="Telefon fotoğraflarının bulunduğu dizin")
+    parser.add_argument("--synthetic", type=int, default=8, help="Korpus yoksa üretilecek fotoğraf sayısı")
+    parser.add_argument("--bandwidth-mbit", type=float, default=10.0, help="Simüle edilen yükleme hızı")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simüle edilen backend gecikmesi")
+    parser.add_argument("--max-dimension", type=int, default=IMAGE_MAX_DIMENSION)
+    parser.add_argument("--quality", type=int, default=IMAGE_JPEG_QUALITY)
+    args = parser.parse_args()
+
+    photos = list(corpus_photos(args.corpus) if args.corpus else synthetic_photos(args.synthetic))
+    if not photos:
+        sys.exit("Fotoğraf bulunamadı")
+
+    before_results, before_size, after_results, after_size, prepare_times = [], [], [], [], []
+    with MockBackend(latency_ms=args.latency_ms, upload_bandwidth=args.bandwidth_mbit * 125_000) as backend:
+        client = BackendClient(backend.base_url)
+        for name, data in photos:
+            before_results.append(upload(client, name, data))
+            before_size.append(len(data))
+
+            started = time.perf_counter()
+            prepared = prepare_image(data, args.max_dimension, args.quality)
+            prepare_times.append(time.perf_counter() - started)
+            latency, error = upload(client, name, prepared.data)
+            after_results.append((prepare_times[-1] + latency, error))
+            after_size.append(len(prepared.data))
+
+    before = summarize(before_results, before_size)
+    after = summarize(after_results, after_size)
+    result = {
+        "photos": len(photos),
+        "bandwidth_mbit": args.bandwidth_mbit,
+        "max_dimension": args.max_dimension,
+        "quality": args.quality,
+        "before": before,
+        "after": dict(after, prepare_mean_s=statistics.mean(prepare_times)),
+        "bytes_saved_ratio": 1 - after["bytes_total"] / before["bytes_total"],
+        "latency_speedup": before["latency_mean_s"] / after["latency_mean_s"]
+        if before["latency_mean_s"] and after["latency_mean_s"] else None,
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
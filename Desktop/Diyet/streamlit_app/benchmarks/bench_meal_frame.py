@@ -0,0 +1,106 @@
+# Öğün gruplama: satır satır (eski) yol ile sütunlu çerçeve karşılaştırması
+#
+# Kullanım:
+#   python benchmarks/bench_meal_frame.py --sizes 10000 50000 100000
+#
+# Eski yol display_meals_by_date()'in önceki hâlini taklit eder: her
+# taken_at datetime.fromisoformat ile ayrıştırılır, günler strptime ile
+# sıralanır ve format_time her satırda pytz saat dilimini yeniden kurar.
+# Yeni yol to_frame + group_by_day kullanır. Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_frame import group_by_day, to_frame  # noqa: E402
+
+MEAL_TYPES = ["Kahvaltı", "Öğle", "Akşam", "Atıştırma"]
+USERS = [{"name": "Ben", "code": "A"}, {"name": "Eşim", "code": "B"}]
+
+
+def synthetic_meals(count, days=365, seed=42):
+    """Son `days` güne yayılmış sentetik öğünler"""
+    rng = random.Random(seed)
+    end = datetime(2025, 8, 17, tzinfo=timezone.utc)
+    meals = []
+    for i in range(count):
+        taken_at = end - timedelta(seconds=rng.randrange(days * 86400))
+        meals.append({
+            "id": str(i),
+            "meal_type": rng.choice(MEAL_TYPES),
+            "note": "",
+            "taken_at": taken_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "image_key": f"{i}.jpg",
+            "User": rng.choice(USERS),
+        })
+    return meals
+
+
+def legacy_format_time(dt_str):
+    dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+    vienna_tz = pytz.timezone("Europe/Vienna")
+    return dt.astimezone(vienna_tz).strftime("%H:%M")
+
+
+def legacy_path(meals):
+    meals_by_date = {}
+    for meal in meals:
+        dt = datetime.fromisoformat(meal["taken_at"].replace("Z", "+00:00"))
+        meals_by_date.setdefault(dt.strftime("%d.%m.%Y"), []).append(meal)
+    sorted_dates = sorted(meals_by_date, key=lambda x: datetime.strptime(x, "%d.%m.%Y"), reverse=True)
+    rendered = 0
+    for date in sorted_dates:
+        for meal in meals_by_date[date]:
+            legacy_format_time(meal["taken_at"])
+            rendered += 1
+    return rendered
+
+
+def frame_path(meals):
+    frame = to_frame(meals)
+    rendered = 0
+    for _, day in group_by_day(frame):
+        for meal in day:
+            meal.local_time
+            rendered += 1
+    return rendered
+
+
+def timed(fn, meals, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(meals)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Öğün gruplama mikro benchmarkı")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        meals = synthetic_meals(size)
+        legacy = timed(legacy_path, meals, args.repeat)
+        frame = timed(frame_path, meals, args.repeat)
+        results.append({
+            "meals": size,
+            "legacy_s": round(legacy, 4),
+            "frame_s": round(frame, 4),
+            "speedup": round(legacy / frame, 2),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Backend yavaşlığı ve kesintisinde diyetisyen görünümü: bayat veri sunma ve devre kesici
+#
+# Kullanım:
+#   python benchmarks/bench_outage.py --steps 4 --slow-ms 2000
+#   python benchmarks/bench_outage.py --steps 6 --slow-ms 4000 --breaker-slow-ms 1000
+#
+# Sahte backend (mock_backend.py) ve app.py gerçek modda Streamlit'in test
+# API'si (AppTest) ile aynı, ayrı bir süreçte sürülür. Diyetisyen son 7 günü
+# filtreler ve iki gün arasında gidip gelir (önbellek ve senkronizasyon
+# süreleri 1 sn'ye indirilir; her adımdan önce süreler dolar). Üç evre
+# ölçülür:
+#   - normal: backend sağlıklı
+#   - slow:   her istek --slow-ms gecikir
+#   - down:   öğün/rapor/giriş uçları --slow-ms sonra 503 döner
+# Senaryo önce bayat veri ve devre kesici kapalı (MEAL_CACHE_STALE_TTL=0,
+# BREAKER_FAILURES=0), sonra açık çalıştırılır. Evre başına adımın duvar
+# saati süresi, hata mesajı ve boş ızgara gösterilen adım sayısı, son bilinen
+# verinin gösterildiği adım sayısı ve backend'e giden istekler raporlanır.
+# Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import percentile  # noqa: E402
+
+PHASES = ("normal", "slow", "down")
+
+
+def run_scenario(resilient, steps, slow_ms, breaker_slow_ms, meals):
+    """Tek bir diyetisyen oturumunu evreler boyunca sür ve ölçümleri döndür"""
+    os.environ.update(
+        STREAMLIT_DEMO_MODE="false",
+        STREAMLIT_LOGGER_LEVEL="error",
+        MEAL_CACHE_TTL="1",
+        MEAL_SYNC_INTERVAL="1",
+        PREFETCH="false",
+        MEAL_CACHE_STALE_TTL="3600" if resilient else "0",
+        BREAKER_FAILURES="5" if resilient else "0",
+        BREAKER_SLOW_MS=str(breaker_slow_ms),
+    )
+    os.chdir(APP_DIR)
+    sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+    from streamlit.testing.v1 import AppTest
+
+    from mock_backend import MockBackend
+
+    backend = MockBackend(meal_count=meals, meal_days=30).start()
+    os.environ["API_BASE_URL"] = backend.base_url
+
+    at = AppTest.from_file("app.py", default_timeout=300)
+    at.session_state["logged_in"] = True
+    at.session_state["token"] = "mock-A"
+    at.session_state["user"] = {"name": "Ben", "code": "A"}
+    at.run()
+    next(r for r in at.radio if r.key == "active_section").set_value("📊 Diyetisyen Görünümü")
+    at.run()
+    end = date.today()
+    next(d for d in at.date_input if d.key == "filter_start").set_value(end - timedelta(days=6))
+    next(d for d in at.date_input if d.key == "filter_end").set_value(end)
+    next(b for b in at.button if "Filtrele" in b.label).click().run()
+
+    def pick_day(index):
+        day = next(s for s in at.selectbox if s.key == "summary_day")
+        # Seçenekler "GG.AA.YYYY (N öğün)" biçiminde gösterilir; değer ISO gündür
+        label = day.options[index]
+        return day.set_value(f"{label[6:10]}-{label[3:5]}-{label[0:2]}").run()
+
+    # Isınma: iki gün de önbelleğe girer
+    pick_day(1)
+    pick_day(2)
+
+    result = {}
+    for phase in PHASES:
+        backend.latency_ms = 0 if phase == "normal" else slow_ms
+        backend.outage = phase == "down"
+        before = backend.stats()["request_counts"]
+        timings, errors, empty, stale = [], 0, 0, 0
+        for step in range(steps):
+            time.sleep(1.1)  # önbellek ve senkronizasyon süreleri dolar
+            started = time.perf_counter()
+            try:
+                pick_day(1 + step % 2)
+            except StopIteration:
+                # Özet alınamadı: gün seçimi hiç gösterilmedi
+                at.run()
+            timings.append((time.perf_counter() - started) * 1000)
+            errors += bool(len(at.error) or len(at.exception))
+            empty += any("bulunamadı" in info.value for info in at.info) or not any(
+                'class="date-header"' in markdown.value for markdown in at.markdown)
+            stale += any("Son bilinen veriler" in caption.value for caption in at.caption)
+        after = backend.stats()["request_counts"]
+        result[phase] = {
+            "p50_ms": round(percentile(timings, 50), 1),
+            "max_ms": round(max(timings), 1),
+            "error_steps": errors,
+            "empty_steps": empty,
+            "stale_steps": stale,
+            "backend_requests": {path: after.get(path, 0) - before.get(path, 0) for path in after},
+        }
+    from app import api
+
+    result["breakers"] = {endpoint: {"trips": s["trips"], "short_circuited": s["short_circuited"]}
+                          for endpoint, s in api.breaker_stats().items()}
+    backend.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend kesintisi benchmarkı")
+    parser.add_argument("--steps", type=int, default=4, help="Evre başına gün değişimi")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="Yavaş ve kesinti evresinde istek gecikmesi")
+    parser.add_argument("--breaker-slow-ms", type=float, default=1000, help="BREAKER_SLOW_MS")
+    parser.add_argument("--meals", type=int, default=600, help="Backend'deki öğün sayısı")
+    args = parser.parse_args()
+
+    result = {"config": vars(args)}
+    for resilient in (False, True):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            run = pool.submit(run_scenario, resilient, args.steps, args.slow_ms, args.breaker_slow_ms, args.meals)
+            result["resilient" if resilient else "baseline"] = run.result()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Komşu aralık ön yüklemesi: gün detayı ve önceki haftaya geçiş gecikmesi, isabet oranı
+#
+# Kullanım:
+#   python benchmarks/bench_prefetch.py --weeks 6 --latency-ms 80
+#   python benchmarks/bench_prefetch.py --weeks 4 --think-s 1 --meals 4000 --days 60
+#
+# Sahte backend (mock_backend.py) başlatılır ve app.py gerçek modda Streamlit'in
+# test API'si (AppTest) ile sürülür. Diyetisyen son 7 günü filtreler; her
+# hafta özetten iki güne iner, ardından bir önceki haftaya geçer. Adımlar
+# arasında --think-s saniye beklenir (kullanıcının özete bakma süresi; ön
+# yükleme bu sırada çalışır). Aynı senaryo ön yükleme kapalı (PREFETCH=false)
+# ve açık olarak ayrı süreçlerde çalıştırılır, böylece süreç genelindeki
+# önbellekler paylaşılmaz. Adım başına AppTest'in duvar saati süresi (wall)
+# ve PERF_LOG_PATH kayıtlarından betiğin kendi süresi (script) raporlanır.
+# Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import percentile  # noqa: E402
+
+
+def run_scenario(base_url, prefetch, weeks, think_s, workers):
+    """Tek bir diyetisyen oturumunu ayrı bir süreçte sür ve ölçümleri döndür"""
+    perf_log = os.path.join(tempfile.mkdtemp(prefix="diyet-prefetch-"), "perf.jsonl")
+    os.environ.update(
+        STREAMLIT_DEMO_MODE="false",
+        PERF_TRACING="true",
+        PERF_LOG_PATH=perf_log,
+        API_BASE_URL=base_url,
+        PREFETCH="true" if prefetch else "false",
+        PREFETCH_WORKERS=str(workers),
+        STREAMLIT_LOGGER_LEVEL="error",
+    )
+    os.chdir(APP_DIR)
+    sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+    from streamlit.testing.v1 import AppTest
+
+    from prefetch import prefetcher
+
+    timings = {}
+    errors = []
+    log_offset = 0
+
+    def script_ms():
+        # Son adımda eklenen çalıştırma kayıtlarının toplam süresi
+        nonlocal log_offset
+        with open(perf_log, encoding="utf-8") as f:
+            f.seek(log_offset)
+            records = [json.loads(line) for line in f]
+            log_offset = f.tell()
+        return sum(record["total_ms"] for record in records)
+
+    def timed(name, action):
+        script_ms()
+        started = time.perf_counter()
+        result = action()
+        timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        timings.setdefault(name + "_script", []).append(script_ms())
+        if len(result.exception):
+            errors.append({"step": name, "error": result.exception[0].message})
+        return result
+
+    at = AppTest.from_file("app.py", default_timeout=60)
+    at.session_state["logged_in"] = True
+    at.session_state["token"] = "mock-A"
+    at.session_state["user"] = {"name": "Ben", "code": "A"}
+    at.run()
+    next(r for r in at.radio if r.key == "active_section").set_value("📊 Diyetisyen Görünümü")
+    at.run()
+
+    end = date.today()
+    for week in range(weeks):
+        start = end - timedelta(days=6)
+        next(d for d in at.date_input if d.key == "filter_start").set_value(start)
+        next(d for d in at.date_input if d.key == "filter_end").set_value(end)
+        filter_button = next(b for b in at.button if "Filtrele" in b.label)
+        timed("week" if week else "first_filter", filter_button.click().run)
+
+        # Özete bakılır, sonra iki güne inilir
+        for pick in (1, 3):
+            time.sleep(think_s)
+            day = next((s for s in at.selectbox if s.key == "summary_day"), None)
+            if day is None or len(day.options) <= pick:
+                continue
+            # Seçenekler "GG.AA.YYYY (N öğün)" biçiminde gösterilir; değer ISO gündür
+            label = day.options[pick]
+            timed("day", day.set_value(f"{label[6:10]}-{label[3:5]}-{label[0:2]}").run)
+        time.sleep(think_s)
+        end = start - timedelta(days=1)
+
+    return {
+        "timings": timings,
+        "errors": errors,
+        "prefetch": prefetcher.stats() if prefetch else None,
+    }
+
+
+def summarize(result):
+    steps = {
+        name: {"count": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+        for name, values in result["timings"].items()
+    }
+    summary = {"steps": steps, "errors": result["errors"]}
+    if result["prefetch"]:
+        stats = result["prefetch"]
+        summary["prefetch"] = {
+            "prefetched": stats["prefetched"],
+            "used": stats["used"],
+            "hit_rate": round(stats["hit_rate"], 2),
+            "kb": round(stats["bytes"] / 1024),
+            "budget_stops": stats["budget_stops"],
+            "cancelled": stats["cancelled"],
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Komşu aralık ön yükleme benchmarkı")
+    parser.add_argument("--weeks", type=int, default=6, help="Geriye doğru gezilen hafta sayısı")
+    parser.add_argument("--think-s", type=float, default=2.0, help="Adımlar arasındaki bekleme")
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--meals", type=int, default=2000, help="Backend'deki öğün sayısı")
+    parser.add_argument("--days", type=int, default=90, help="Öğünlerin yayıldığı gün sayısı")
+    parser.add_argument("--workers", type=int, default=4, help="PREFETCH_WORKERS")
+    args = parser.parse_args()
+
+    from mock_backend import MockBackend
+
+    result = {"config": vars(args)}
+    for prefetch in (False, True):
+        with MockBackend(latency_ms=args.latency_ms, meal_count=args.meals, meal_days=args.days) as backend:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                run = pool.submit(run_scenario, backend.base_url, prefetch, args.weeks, args.think_s, args.workers)
+                summary = summarize(run.result())
+            summary["backend_requests"] = backend.stats()["request_counts"]
+        result["with_prefetch" if prefetch else "without_prefetch"] = summary
+
+    for step in ("day", "day_script"):
+        before, after = (result[name]["steps"].get(step) for name in ("without_prefetch", "with_prefetch"))
+        if before and after:
+            result[f"{step}_p50_speedup"] = round(before["p50_ms"] / max(after["p50_ms"], 0.01), 1)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
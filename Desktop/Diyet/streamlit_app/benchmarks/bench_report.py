@@ -0,0 +1,165 @@
+# Yerel PDF raporu: 30, 90 ve 365 günlük raporların süresi ve bellek artışı
+#
+# Kullanım:
+#   python benchmarks/bench_report.py --users 2
+#   python benchmarks/bench_report.py --users 5 --thumbnail-cache-mb 8 --fetch-latency-ms 40
+#
+# Geçici bir veritabanı seed_meals ile bir yıllık veriyle doldurulur. Her
+# rapor uzunluğu ayrı bir süreçte ölçülür. Süreç içinde rapor önce soğuk
+# (her öğünün fotoğrafı indirilip küçük resmi çıkarılır; --fetch-latency-ms
+# indirme gecikmesini taklit eder) ve sıcak (küçük resimler önbellekten
+# gelir) üretilir. Bu iki üretimden sonra Pillow, indirme havuzu ve bellek
+# ayırıcı ısınmıştır; o anki RSS sıcak taban kabul edilir. Ardından bir
+# sıcak ve (küçük resim önbelleği boşaltılarak) bir soğuk üretim daha
+# yapılır; üretim sırasında RSS örneklenir ve tepe değerin sıcak tabandan
+# farkı raporlanır. Sayfa başına bellek sınırlıysa bu fark rapor
+# uzunluğundan bağımsızdır. Ayrıca sıcak bir üretimin Python tepe belleği
+# tracemalloc ile ölçülür; bu değer tek sayfa ile REPORT_SPOOL_MEMORY'nin
+# toplamıyla sınırlı kalmalıdır. Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rss_mb():
+    """Sürecin o anki RSS'i (Linux, /proc/self/statm)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+
+
+class RssSampler:
+    """with bloğu boyunca RSS'i örnekleyip tepe değerini tutar"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self.peak = rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+
+def child(db_path, days, batch_size, fetch_latency):
+    from meal_store import SqliteMealStore
+    from pdf_report import render_report
+    from reports import REPORT_PAGE_SIZE
+    from thumbnails import make_thumbnail, placeholder_image, thumbnail_store
+
+    store = SqliteMealStore(db_path)
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+
+    # İndirilen fotoğrafın yerine geçen görüntüler bir kez üretilir; soğuk
+    # üretimde ölçülen, indirme gecikmesi ve her öğün için küçük resim
+    # çıkarma maliyetidir
+    photos = {}
+
+    def fetch(meal):
+        time.sleep(fetch_latency)
+        if meal["meal_type"] not in photos:
+            photos[meal["meal_type"]] = placeholder_image(meal["meal_type"])
+        return photos[meal["meal_type"]]
+
+    def run():
+        started = time.perf_counter()
+        meals = store.iter_meals(start.isoformat(), end.isoformat(), batch_size=REPORT_PAGE_SIZE)
+        artifact = render_report(meals, fetch, start, end, batch_size=batch_size)
+        return artifact, round(time.perf_counter() - started, 3)
+
+    make_thumbnail(placeholder_image("Kahvaltı"))  # Pillow'u ölçümden önce yükle
+    artifact, cold_s = run()
+    cold_fetches = thumbnail_store.fetches
+    artifact.close()
+    artifact, warm_s = run()
+    warm_refetches = thumbnail_store.fetches - cold_fetches
+    data = artifact.read()
+    artifact.close()
+    del artifact
+
+    baseline = rss_mb()
+    with RssSampler() as warm_rss:
+        run()[0].close()
+    thumbnail_cache_kb = round(thumbnail_store.stats()["bytes"] / 1024)
+    thumbnail_store.clear()
+    with RssSampler() as cold_rss:
+        run()[0].close()
+    tracemalloc.start()
+    run()[0].close()
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "meals": store.count(start.isoformat(), end.isoformat()),
+        "pages": data.count(b"/Type /Page "),
+        "pdf_kb": round(len(data) / 1024),
+        "cold_s": cold_s,
+        "warm_s": warm_s,
+        "warm_refetches": warm_refetches,
+        "rss_warm_baseline_mb": round(baseline, 1),
+        "rss_growth_warm_mb": round(warm_rss.peak - baseline, 1),
+        "rss_growth_cold_mb": round(cold_rss.peak - baseline, 1),
+        "thumbnail_cache_kb": thumbnail_cache_kb,
+        "python_peak_kb_warm": round(python_peak / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel PDF raporu benchmarkı")
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 90, 365])
+    parser.add_argument("--batch", type=int, default=24, help="Küçük resmi birlikte getirilen öğün sayısı")
+    parser.add_argument("--thumbnail-cache-mb", type=int, default=16)
+    parser.add_argument("--fetch-latency-ms", type=float, default=0, help="Fotoğraf başına indirme gecikmesi")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.db, args.days[0], args.batch, args.fetch_latency_ms / 1000)))
+        return
+
+    from meal_store import SqliteMealStore
+    from seed_meals import generate_rows, synthetic_users
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="diyet-report-"), "bench.db")
+    SqliteMealStore(db_path).insert_rows(list(generate_rows(
+        synthetic_users(args.users), max(args.days), datetime.now(timezone.utc), random.Random(42))))
+
+    env = dict(os.environ, THUMBNAIL_CACHE_MAX_BYTES=str(args.thumbnail_cache_mb * 1024 * 1024))
+    result = {"users": args.users, "thumbnail_cache_mb": args.thumbnail_cache_mb,
+              "fetch_latency_ms": args.fetch_latency_ms}
+    for days in args.days:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--db", db_path, "--days", str(days),
+             "--batch", str(args.batch), "--fetch-latency-ms", str(args.fetch_latency_ms)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result[f"{days}d"] = json.loads(output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Uzun aralık özeti: ham öğün taraması ile günlük özet tablosu karşılaştırması
+#
+# Kullanım:
+#   python benchmarks/bench_rollups.py --users 50 --years 2
+#   python benchmarks/bench_rollups.py --db diyet_demo.db   # var olan veritabanı
+#
+# Geçici bir veritabanı seed_meals ile doldurulur (ya da --db kullanılır) ve
+# son 90 ve 365 günün özeti iki yoldan hesaplanır: iter_meals ile tüm
+# öğünleri tarayıp toplayan eski yol ve daily_rollups tablosundan okuyan
+# summary(). Her yol için süre ve tracemalloc tepe belleği ölçülür. Sonuç
+# JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_store import SqliteMealStore  # noqa: E402
+from rollups import DailyRollups  # noqa: E402
+from seed_meals import generate_rows, synthetic_users  # noqa: E402
+
+
+def scan_summary(store, start_date, end_date, user_id):
+    """Eski yol: aralıktaki her öğünü okuyup bellekte topla"""
+    rollups = DailyRollups()
+    for meal in store.iter_meals(start_date, end_date, user_id, batch_size=5000):
+        rollups.add(meal)
+    return rollups.summary(start_date, end_date, user_id)
+
+
+def measure(fn, repeat):
+    """Süre tracemalloc kapalıyken ölçülür; tepe bellek ayrı bir çalıştırmada"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {"p50_ms": round(statistics.median(times), 2), "peak_kb": round(peak / 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Günlük özet benchmarkı")
+    parser.add_argument("--db", help="Var olan veritabanı (verilmezse geçici olarak üretilir)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.db:
+        store = SqliteMealStore(args.db)
+    else:
+        store = SqliteMealStore(os.path.join(tempfile.mkdtemp(prefix="diyet-rollups-"), "bench.db"))
+        rows = list(generate_rows(synthetic_users(args.users), int(args.years * 365),
+                                  datetime.now(timezone.utc), random.Random(42)))
+        started = time.perf_counter()
+        store.insert_rows(rows)
+        seed_s = time.perf_counter() - started
+        del rows
+
+    end = date.today()
+    result = {"meals": store.count(), "rollup_rows": store.connection().execute(
+        "SELECT COUNT(*) FROM daily_rollups").fetchone()[0]}
+    if not args.db:
+        result["insert_s_with_rollups"] = round(seed_s, 2)
+    for days in (90, 365):
+        start = (end - timedelta(days=days - 1)).isoformat()
+        for user_id in ("all", "A"):
+            scanned, scan = measure(lambda: scan_summary(store, start, end.isoformat(), user_id), 1)
+            summarized, rollup = measure(lambda: store.summary(start, end.isoformat(), user_id), args.repeat)
+            for field in ("days", "meal_types", "users", "gaps"):
+                assert sorted(scanned[field]) == sorted(summarized[field]), field
+            result[f"{days}d_{user_id}"] = {
+                "meals_in_range": summarized["total"],
+                "scan": scan,
+                "rollup": rollup,
+                "speedup": round(scan["p50_ms"] / max(rollup["p50_ms"], 0.01), 1),
+            }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
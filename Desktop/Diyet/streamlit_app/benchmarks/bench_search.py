@@ -0,0 +1,129 @@
+# Öğün arama: istemci tarafı tarama ile FTS5 ve bellek içi indeks karşılaştırması
+#
+# Kullanım:
+#   python benchmarks/bench_search.py --users 100 --years 1
+#   python benchmarks/bench_search.py --db diyet_demo.db   # var olan veritabanı
+#
+# Geçici bir veritabanı seed_meals ile doldurulur (ya da --db kullanılır).
+# Her sorgunun ilk iki sayfası (MEALS_PAGE_SIZE öğün) üç yoldan bulunur:
+#   - scan: indeks olmadan, tüm öğünleri en yeniden eskiye okuyup her birinin
+#     metnini sorguyla karşılaştıran istemci tarafı filtre (sayfa dolunca durur)
+#   - fts: demo modundaki SQLite FTS5 tablosu (meal_store.search)
+#   - memory: gerçek moddaki bellek içi ters indeks (SearchIndex)
+# Üç yolun sonuçlarının aynı olduğu doğrulanır (aynı anda alınmış öğünler
+# demo deposunda sayısal, gerçek modda metin kimliğe göre sıralanır; bellek
+# içi indeks için zamanlar karşılaştırılır). İndekslerin kurulma süresi
+# (FTS tablosuna yazan ekleme, bellek içi indeksin kurulması) ayrıca
+# raporlanır. Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_frame import meal_cursor  # noqa: E402
+from meal_store import SqliteMealStore  # noqa: E402
+from search import SearchIndex, cursor_key, search_terms, search_text  # noqa: E402
+from seed_meals import generate_rows, synthetic_users  # noqa: E402
+
+PAGE_SIZE = int(os.environ.get("MEALS_PAGE_SIZE", "30"))
+
+QUERIES = ["tatlı", "TATLI", "kahvaltı", "fast fo", "ev yemeği", "salata akşam", "kullanıcı 1", "xyz"]
+
+
+def scan_search(store, query, user_id, limit, cursor=None):
+    """Eski yol: öğünleri sırayla okuyup metinlerini sorgu terimleriyle karşılaştır"""
+    terms = search_terms(query)
+    bound = cursor_key(cursor) if cursor else None
+    result = []
+    for meal in store.iter_meals(user_id=user_id, batch_size=5000):
+        if bound and cursor_key(meal_cursor(meal)) >= bound:
+            continue
+        user = meal.get("User") or {}
+        words = search_text(meal.get("note"), meal.get("meal_type"), user.get("name"), user.get("code")).split()
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            result.append(meal)
+            if len(result) >= limit:
+                break
+    return result
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return result, round(statistics.median(times), 2)
+
+
+def two_pages(search, query, user_id):
+    first = search(query, user_id, PAGE_SIZE)
+    second = search(query, user_id, PAGE_SIZE, meal_cursor(first[-1])) if len(first) == PAGE_SIZE else []
+    return first, second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Öğün arama benchmarkı")
+    parser.add_argument("--db", help="Var olan veritabanı (verilmezse geçici olarak üretilir)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    result = {}
+    if args.db:
+        store = SqliteMealStore(args.db)
+    else:
+        store = SqliteMealStore(os.path.join(tempfile.mkdtemp(prefix="diyet-search-"), "bench.db"))
+        rows = list(generate_rows(synthetic_users(args.users), int(args.years * 365),
+                                  datetime.now(timezone.utc), random.Random(42)))
+        started = time.perf_counter()
+        store.insert_rows(rows)
+        result["insert_s_with_fts"] = round(time.perf_counter() - started, 2)
+        del rows
+    result["meals"] = store.count()
+
+    # Gerçek moddaki gibi: öğünler kimliğe göre sözlükte, indeks yanında
+    meals = {str(meal["id"]): meal for meal in store.iter_meals(batch_size=5000)}
+    started = time.perf_counter()
+    index = SearchIndex()
+    for meal in meals.values():
+        index.add(meal)
+    result["memory_index_build_s"] = round(time.perf_counter() - started, 2)
+
+    def memory_search(query, user_id, limit, cursor=None):
+        return [meals[meal_id] for meal_id in index.search(query, user_id, limit, cursor)]
+
+    queries = {}
+    for query in QUERIES:
+        for user_id in ("all", "U0001"):
+            scanned, scan_ms = measure(lambda: two_pages(
+                lambda *a: scan_search(store, *a), query, user_id), 1)
+            fts, fts_ms = measure(lambda: two_pages(store.search, query, user_id), args.repeat)
+            memory, memory_ms = measure(lambda: two_pages(memory_search, query, user_id), args.repeat)
+            for page in range(2):
+                ids = [meal["id"] for meal in scanned[page]]
+                assert ids == [meal["id"] for meal in fts[page]], (query, user_id, "fts")
+                times = [meal["taken_at"] for meal in scanned[page]]
+                assert times == [meal["taken_at"] for meal in memory[page]], (query, user_id, "memory")
+            queries[f"{query}|{user_id}"] = {
+                "results": len(scanned[0]) + len(scanned[1]),
+                "scan_ms": scan_ms,
+                "fts_ms": fts_ms,
+                "memory_ms": memory_ms,
+                "fts_speedup": round(scan_ms / max(fts_ms, 0.01), 1),
+                "memory_speedup": round(scan_ms / max(memory_ms, 0.01), 1),
+            }
+    result["queries"] = queries
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
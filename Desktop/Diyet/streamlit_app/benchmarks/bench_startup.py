@@ -0,0 +1,141 @@
+# Soğuk başlangıç ve yeniden çalıştırma (rerun) bütçesi
+#
+# Kullanım:
+#   python benchmarks/bench_startup.py --runs 5
+#   python benchmarks/bench_startup.py --budget-cold-ms 1500 --budget-rerun-ms 150
+#
+# Soğuk başlangıç her ölçümde yeni bir Python sürecinde ölçülür: Streamlit'in
+# içe aktarılması, giriş sayfasının ilk çizimi ve girişten sonraki ilk sayfa.
+# Giriş sayfasında pandas / numpy / Pillow yüklendiyse bu da raporlanır.
+# Yeniden çalıştırma süreleri, ısınmadan sonra her bölüm için ayrı ölçülür:
+# wall_ms AppTest'in bekleme aralıklarını da içerir, script_ms ise betiğin
+# kendi süresidir (PERF_TRACING izinden).
+# Uygulama demo modunda, geçici bir veritabanıyla çalışır. Sonuç JSON olarak
+# yazdırılır; bütçe aşılırsa çıkış kodu 1'dir.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "numpy", "PIL.Image", "pyarrow"]
+SECTIONS = ["📸 Veri Girişi", "📊 Diyetisyen Görünümü", "⚙️ Ayarlar"]
+DEMO_USER = {"logged_in": True, "token": "demo_token_A", "user": {"name": "Ben", "code": "A"}}
+
+
+def logged_in_app():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=60)
+    for key, value in DEMO_USER.items():
+        at.session_state[key] = value
+    return at
+
+
+def cold_child():
+    """Yeni süreçte çalışır: soğuk başlangıç aşamalarının sürelerini yazdırır"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    imported = time.perf_counter()
+    AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=60).run()
+    login_page = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+    logged_in_app().run()
+    home = time.perf_counter()
+    print(json.dumps({
+        "streamlit_import_ms": (imported - started) * 1000,
+        "login_page_ms": (login_page - imported) * 1000,
+        "first_page_ms": (home - login_page) * 1000,
+        "heavy_on_login_page": heavy,
+    }))
+
+
+def measure_cold(runs, env):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, __file__, "--child"], env=env, cwd=APP_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+    result = {
+        key: round(statistics.median(s[key] for s in samples), 1)
+        for key in ("process_ms", "streamlit_import_ms", "login_page_ms", "first_page_ms")
+    }
+    result["heavy_on_login_page"] = samples[-1]["heavy_on_login_page"]
+    return result
+
+
+def measure_reruns(repeat):
+    at = logged_in_app()
+    at.run()
+    navigation = next((r for r in at.radio if r.key == "active_section"), None)
+    sections = SECTIONS if navigation is not None else ["(tüm sekmeler)"]
+    result = {}
+    for section in sections:
+        if navigation is not None:
+            next(r for r in at.radio if r.key == "active_section").set_value(section)
+        at.run()
+        at.run()  # ısınma
+        wall, script = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            wall.append((time.perf_counter() - started) * 1000)
+            script.append(at.session_state["perf_history"][-1]["total_ms"])
+        result[section] = {
+            "wall_p50_ms": round(statistics.median(wall), 1),
+            "script_p50_ms": round(statistics.median(script), 1),
+            "script_p95_ms": round(sorted(script)[min(len(script) - 1, int(0.95 * len(script)))], 1),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç ve rerun bütçesi")
+    parser.add_argument("--runs", type=int, default=5, help="Soğuk başlangıç ölçüm sayısı")
+    parser.add_argument("--repeat", type=int, default=20, help="Bölüm başına rerun sayısı")
+    parser.add_argument("--budget-cold-ms", type=float, help="Giriş sayfası + ilk sayfa için üst sınır")
+    parser.add_argument("--budget-rerun-ms", type=float, help="Bölüm başına betik süresi p50 üst sınırı")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="diyet-startup-")
+    os.environ.update(
+        STREAMLIT_DEMO_MODE="true",
+        MEAL_DB_PATH=os.path.join(db_dir, "demo.db"),
+        STREAMLIT_LOGGER_LEVEL="error",
+        PERF_TRACING="true",
+    )
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    if args.child:
+        cold_child()
+        return
+
+    cold = measure_cold(args.runs, dict(os.environ))
+    reruns = measure_reruns(args.repeat)
+
+    failures = []
+    cold_total = cold["login_page_ms"] + cold["first_page_ms"]
+    if args.budget_cold_ms is not None and cold_total > args.budget_cold_ms:
+        failures.append(f"soğuk başlangıç {cold_total:.0f} ms > {args.budget_cold_ms:.0f} ms")
+    if cold["heavy_on_login_page"]:
+        failures.append(f"giriş sayfası ağır modülleri yükledi: {', '.join(cold['heavy_on_login_page'])}")
+    if args.budget_rerun_ms is not None:
+        for section, stats in reruns.items():
+            if stats["script_p50_ms"] > args.budget_rerun_ms:
+                failures.append(f"{section}: rerun {stats['script_p50_ms']} ms > {args.budget_rerun_ms:.0f} ms")
+
+    print(json.dumps({"cold_start": cold, "reruns": reruns, "failures": failures}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Birden fazla Streamlit sürecinde (replika) iş hacmi ve paylaşılan durum
+#
+# Kullanım:
+#   python benchmarks/bench_workers.py --workers 1 2 4 --sessions 8 --rounds 3
+#   python benchmarks/bench_workers.py --backends sqlite --latency-ms 80
+#
+# Her yapılandırma için N adet gerçek "streamlit run" süreci (gerçek mod,
+# sahte backend) başlatılır ve önlerinde yapışkan oturum (sticky session)
+# olmayan bir yük dengeleyici taklit edilir: eş zamanlı tarayıcı oturumları
+# (bench_fragments.BrowserSession) her turda bağlantıyı kapatıp sıradaki
+# sürece yeniden bağlanır (sayfa yenileme, yeniden dağıtım ya da dengeleyici
+# değişimi). Uygulamanın yazdığı oturum çerezi taşınır (SESSION_RESTORE);
+# oturum geri yüklenemezse yeniden giriş yapılır. Her turda diyetisyen görünümü açılır, filtrelenir ve iki güne
+# inilir.
+#
+# Durum deposu (STATE_BACKEND) memory ve sqlite için karşılaştırılır:
+#   - reruns_per_s: tüm oturumlarda saniyedeki etkileşim (iş hacmi)
+#   - p50_ms / p95_ms: etkileşim başına duvar saati süresi
+#   - logins: yeniden giriş yapılan bağlantı sayısı (ilk giriş dahil)
+#   - meal_requests: backend'e giden öğün istekleri (paylaşılan önbellek
+#     süreçler arasında aynı sayfayı bir kez indirir)
+#   - report_shared: bir süreçte hazırlanan PDF raporunun başka bir süreçte,
+#     geri yüklenen oturumda hemen indirilebilir olup olmadığı
+# Makinedeki çekirdek sayısı iş hacminin üst sınırıdır (cpu_count).
+# Sonuç JSON olarak yazdırılır.
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+from bench_fragments import SECTION_RADIO, SECTIONS, BrowserSession, free_port, start_server  # noqa: E402
+from mock_backend import MockBackend  # noqa: E402
+
+LOGIN_BUTTON = "🔑 Giriş Yap"
+REPORT_BUTTON = "📄 PDF Raporu Hazırla"
+REPORT_ASK = "📄 PDF Dosyasını Al"
+REPORT_DOWNLOAD = "📥 PDF Raporunu İndir"
+
+
+class WorkerSession(BrowserSession):
+    """Ayrıca indirme düğmelerini izleyen tarayıcı oturumu"""
+
+    def __init__(self, port, cookies=None):
+        super().__init__(port, perf_log="")
+        self.cookies = dict(cookies or {})
+        self.downloads = set()
+
+    def _track_widget(self, delta):
+        super()._track_widget(delta)
+        if delta.WhichOneof("type") == "new_element" and delta.new_element.WhichOneof("type") == "download_button":
+            self.downloads.add(delta.new_element.download_button.label)
+
+
+async def open_session(port, cookies):
+    """Sürece bağlan ve ilk sayfayı çiz; oturum geri yüklenemediyse giriş yap"""
+    browser = WorkerSession(port, cookies)
+    await browser.connect()
+    samples = [await browser.rerun()]
+    logged_in = LOGIN_BUTTON in browser.widgets
+    if logged_in:
+        samples.append(await browser.rerun(LOGIN_BUTTON))
+    return browser, samples, logged_in
+
+
+async def user_session(ports, index, rounds, result):
+    """Tek bir diyetisyen: her turda sıradaki sürece bağlanıp görünümü gezer"""
+    cookies = {}
+    for round_ in range(rounds):
+        port = ports[(index + round_) % len(ports)]
+        browser, samples, logged_in = await open_session(port, cookies)
+        result["logins"] += logged_in
+        samples.append(await browser.rerun(SECTION_RADIO, SECTIONS.index("📊 Diyetisyen Görünümü")))
+        samples.append(await browser.rerun("🔍 Filtrele"))
+        for day in (1, 2):
+            samples.append(await browser.rerun("🔎 Gün Detayı", day))
+        cookies = browser.cookies
+        browser.connection.close()
+        result["samples"].extend(samples)
+
+
+async def report_shared(ports, timeout=60):
+    """Bir süreçte hazırlanan raporun sıradaki süreçte geri yüklenen oturumda indirilebilirliği"""
+    browser, _, _ = await open_session(ports[0], {})
+    await browser.rerun(SECTION_RADIO, SECTIONS.index("📊 Diyetisyen Görünümü"))
+    await browser.rerun("🔍 Filtrele")
+    await browser.rerun(REPORT_BUTTON)
+    cookies = browser.cookies
+    browser.connection.close()
+    # Rapor hazırlayan süreçte hazır olana kadar bekle
+    deadline = time.monotonic() + timeout
+    while True:
+        browser, _, _ = await open_session(ports[0], cookies)
+        ready = REPORT_ASK in browser.widgets
+        browser.connection.close()
+        if ready:
+            break
+        if time.monotonic() > deadline:
+            return None
+        await asyncio.sleep(0.5)
+    other = ports[1 % len(ports)]
+    browser, _, logged_in = await open_session(other, cookies)
+    if REPORT_ASK in browser.widgets:
+        await browser.rerun(REPORT_ASK)
+    browser.connection.close()
+    return REPORT_DOWNLOAD in browser.downloads and not logged_in
+
+
+async def run_load(ports, sessions, rounds):
+    result = {"logins": 0, "samples": []}
+    started = time.perf_counter()
+    await asyncio.gather(*(user_session(ports, i, rounds, result) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    shared = await report_shared(ports)
+    return result, elapsed, shared
+
+
+def measure(workers, backend_name, args, backend):
+    work_dir = tempfile.mkdtemp(prefix="diyet-workers-")
+    env = dict(
+        os.environ,
+        STREAMLIT_DEMO_MODE="false",
+        API_BASE_URL=backend.base_url,
+        STATE_BACKEND=backend_name,
+        STATE_DB_PATH=os.path.join(work_dir, "state.db"),
+        OUTBOX_DIR=os.path.join(work_dir, "outbox"),
+        SESSION_RESTORE="true",
+        PREFETCH="false",
+        REPORT_POLL_INTERVAL="0.2",
+        REPORT_ENGINE="backend",
+    )
+    ports = [free_port() for _ in range(workers)]
+    servers = []
+    try:
+        for port in ports:
+            servers.append(start_server(port, env))
+        before = backend.stats()["request_counts"]
+        result, elapsed, shared = asyncio.run(run_load(ports, args.sessions, args.rounds))
+        after = backend.stats()["request_counts"]
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+
+    times = sorted(sample["ms"] for sample in result["samples"])
+    return {
+        "reruns": len(times),
+        "elapsed_s": round(elapsed, 2),
+        "reruns_per_s": round(len(times) / elapsed, 1),
+        "p50_ms": round(statistics.median(times), 1),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 1),
+        "logins": result["logins"],
+        "meal_requests": after.get("/api/meals", 0) - before.get("/api/meals", 0),
+        "report_shared": shared,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çok süreçli (replika) iş hacmi benchmarkı")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Streamlit süreci sayıları")
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"], help="STATE_BACKEND değerleri")
+    parser.add_argument("--sessions", type=int, default=8, help="Eş zamanlı tarayıcı oturumu")
+    parser.add_argument("--rounds", type=int, default=3, help="Oturum başına yeniden bağlanma (tur) sayısı")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Sahte backend gecikmesi")
+    parser.add_argument("--meals", type=int, default=2000, help="Backend'deki öğün sayısı")
+    args = parser.parse_args()
+
+    import streamlit
+
+    result = {"streamlit": streamlit.__version__, "cpu_count": os.cpu_count(), "config": vars(args), "runs": {}}
+    with MockBackend(latency_ms=args.latency_ms, meal_count=args.meals, meal_days=30) as backend:
+        for backend_name in args.backends:
+            for workers in args.workers:
+                result["runs"][f"{backend_name}|{workers}"] = measure(workers, backend_name, args, backend)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# Eş zamanlı oturum yük testi: adım başına rerun gecikmesi, bellek ve backend istekleri
+#
+# Kullanım:
+#   python benchmarks/load_test.py --sessions 8 --iterations 3 --latency-ms 20
+#   python benchmarks/load_test.py --sessions 4 --meals 20000 --days 365 --output sonuc.json
+#
+# Sahte backend (mock_backend.py) başlatılır ve her simüle oturum, app.py'yi
+# Streamlit'in test API'si (AppTest) ile başsız çalıştırır: giriş, filtreleme
+# (aralık özeti), yeniden çizim, gün detayı, sayfalama, rapor ve yükleme. AppTest her çalıştırmada süreç
+# genelindeki Runtime nesnesini değiştirdiğinden oturumlar ayrı süreçlerde
+# koşar; ölçülen bellek de böylece oturum başınadır.
+#
+# AppTest dosya yükleyicisini sürmeyi desteklemediği için "upload" adımı,
+# uygulamanın yükleme yolunu (prepare_image + upload_meal + invalidate_meal)
+# doğrudan çağırır. Sonuç JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+USER_FILTERS = ["Tümü", "A (Ben)", "B (Eşim)"]
+
+
+def percentile(values, q):
+    """En yakın sıra yöntemiyle q yüzdeliği"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return round(ordered[min(rank, len(ordered) - 1)], 2)
+
+
+def summary_day_value(selectbox, index):
+    """Gün detayı seçeneğinin ISO gün değeri
+
+    AppTest seçenekleri biçimlendirilmiş etiketler olarak verir
+    ("GG.AA.YYYY (N öğün)"); set_value ise uygulamadaki gerçek değeri bekler.
+    """
+    label = selectbox.options[index]
+    return f"{label[6:10]}-{label[3:5]}-{label[0:2]}"
+
+
+def rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_session(index, base_url, iterations, range_days, report_poll_limit=20):
+    """Tek bir kullanıcının akışını ayrı bir süreçte sür ve ölçümleri döndür"""
+    os.environ.update(
+        STREAMLIT_DEMO_MODE="false",
+        API_BASE_URL=base_url,
+        REPORT_POLL_INTERVAL="0.05",
+        STREAMLIT_LOGGER_LEVEL="error",
+    )
+    os.chdir(APP_DIR)
+    sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+    from streamlit.testing.v1 import AppTest
+
+    from api_client import get_client
+    from bench_image_upload import synthetic_photos
+    from cache import invalidate_meal
+    from images import prepare_image
+
+    timings = {}
+    errors = []
+    _, photo = next(synthetic_photos(1, size=(2016, 1512)))
+
+    def timed(name, action):
+        started = time.perf_counter()
+        result = action()
+        timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        if result is not None and len(result.exception):
+            errors.append({"session": index, "step": name, "error": result.exception[0].message})
+        return result
+
+    def button(at, label):
+        return next((b for b in at.button if label in b.label), None)
+
+    # Giriş sayfası ve giriş
+    at = AppTest.from_file("app.py", default_timeout=60)
+    timed("login_page", at.run)
+    baseline = rss_kb()
+    at.selectbox[0].set_value(USER_FILTERS[1 + index % 2])
+    timed("login", button(at, "Giriş Yap").click().run)
+
+    # st.rerun sonrası eleman ağacı eski giriş formunu da tuttuğu için oturum,
+    # giriş sonucu taşınarak yeni bir AppTest'te sürdürülür
+    state = {key: at.session_state[key] for key in ("token", "user", "logged_in")}
+    at = AppTest.from_file("app.py", default_timeout=60)
+    for key, value in state.items():
+        at.session_state[key] = value
+    timed("home", at.run)
+
+    # Diyetisyen görünümüne geç (yalnızca seçili bölüm çizilir)
+    next(r for r in at.radio if r.key == "active_section").set_value("📊 Diyetisyen Görünümü")
+    timed("section", at.run)
+
+    client = get_client(base_url)
+    for iteration in range(iterations):
+        # Diyetisyen filtresi: tarih aralığı ve kullanıcı
+        next(d for d in at.date_input if "Başlangıç" in d.label).set_value(
+            date.today() - timedelta(days=range_days))
+        next(s for s in at.selectbox if "Kullanıcı" in s.label).set_value(
+            USER_FILTERS[(index + iteration) % len(USER_FILTERS)])
+        timed("filter", button(at, "Filtrele").click().run)
+
+        # Hiçbir şey değişmeden yeniden çizim (önbellekten)
+        timed("rerun", at.run)
+
+        # Özetten en yeni güne in (ham öğün kartları yalnızca burada çizilir)
+        day = next((s for s in at.selectbox if s.key == "summary_day"), None)
+        if day is not None and len(day.options) > 1:
+            timed("day", day.set_value(summary_day_value(day, 1)).run)
+
+        # Bir sonraki sayfa
+        older = next((b for b in at.button if b.key == "meals_older"), None)
+        if older is not None:
+            timed("page", older.click().run)
+
+        # Rapor: hazırla ve indirme düğmesi görünene kadar yokla
+        prepare = button(at, "PDF Raporu Hazırla")
+        if prepare is not None:
+            def report():
+                prepare.click().run()
+                for _ in range(report_poll_limit):
+                    if len(at.get("download_button")):
+                        break
+                    at.run()
+                return at
+            timed("report", report)
+
+        # Yükleme: uygulamanın yükleme yolu
+        def upload():
+            prepared = prepare_image(photo)
+            response = client.upload_meal(
+                state["token"],
+                {"mealType": "Öğle", "note": "", "takenAt": f"{date.today().isoformat()}T12:00:00"},
+                {"image": ("load.jpg", prepared.data, prepared.mime)},
+            )
+            if response.status_code != 201:
+                errors.append({"session": index, "step": "upload", "error": f"HTTP {response.status_code}"})
+            invalidate_meal(state["user"]["code"], date.today())
+        timed("upload", upload)
+
+    return {
+        "session": index,
+        "timings": timings,
+        "errors": errors,
+        "peak_rss_kb": rss_kb(),
+        "session_rss_kb": rss_kb() - baseline,
+    }
+
+
+def summarize(results):
+    steps = {}
+    for result in results:
+        for name, values in result["timings"].items():
+            steps.setdefault(name, []).extend(values)
+    return {
+        name: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": round(max(values), 2),
+        }
+        for name, values in steps.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eş zamanlı oturum yük testi")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--meals", type=int, default=2000, help="Backend'deki öğün sayısı")
+    parser.add_argument("--days", type=int, default=30, help="Öğünlerin yayıldığı gün sayısı")
+    parser.add_argument("--range-days", type=int, default=14, help="Diyetisyen filtresinin gün aralığı")
+    parser.add_argument("--note-bytes", type=int, default=0, help="Öğün notlarının boyutu (yanıt boyutu)")
+    parser.add_argument("--report-kb", type=int, default=256)
+    parser.add_argument("--output", help="Sonucu ayrıca bu dosyaya yaz")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from mock_backend import MockBackend
+
+    backend = MockBackend(latency_ms=args.latency_ms, meal_count=args.meals, meal_days=args.days,
+                          note_bytes=args.note_bytes, report_bytes=args.report_kb * 1024)
+    with backend:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.sessions, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(run_session, i, backend.base_url, args.iterations, args.range_days)
+                       for i in range(args.sessions)]
+            results = [future.result() for future in futures]
+        wall = time.perf_counter() - started
+        backend_stats = backend.stats()
+
+    session_rss = [r["session_rss_kb"] for r in results]
+    steps = summarize(results)
+    report = {
+        "config": vars(args),
+        "wall_s": round(wall, 2),
+        "steps": steps,
+        "reruns_per_s": round(sum(s["count"] for s in steps.values()) / wall, 2),
+        "memory_kb": {
+            "session_avg": round(sum(session_rss) / len(session_rss)),
+            "session_max": max(session_rss),
+            "process_peak_max": max(r["peak_rss_kb"] for r in results),
+        },
+        "backend": backend_stats,
+        "errors": [e for r in results for e in r["errors"]],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# Benchmarklar için yerel, sahte Diyet Foto Günlüğü backend'i
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MOCK_USERS = {"A": "Ben", "B": "Eşim"}
+MEAL_TYPES = ["Kahvaltı", "Öğle", "Akşam", "Atıştırma"]
+
+
+def mock_meals(count, days=30, note_bytes=0, end=None):
+    """Son `days` güne eşit yayılmış, A ve B kullanıcılarına ait sentetik öğünler"""
+    end = end or datetime.now(timezone.utc)
+    step = days * 86400 / max(count, 1)
+    note = "x" * note_bytes
+    meals = []
+    for i in range(count):
+        taken_at = end - timedelta(seconds=int(i * step))
+        code = "A" if i % 2 == 0 else "B"
+        meals.append({
+            "id": str(count - i),
+            "meal_type": MEAL_TYPES[i % len(MEAL_TYPES)],
+            "note": note,
+            "taken_at": taken_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "image_key": f"mock/{count - i}.jpg",
+            "User": {"name": MOCK_USERS[code], "code": code},
+        })
+    return meals
+
+
+def mock_jpeg(size=(320, 240)):
+    from PIL import Image
+
+    out = BytesIO()
+    Image.new("RGB", size, (200, 160, 90)).save(out, "JPEG", quality=80)
+    return out.getvalue()
+
+
+class MockBackend:
+    """Gecikmesi, bant genişliği ve yanıt boyutları ayarlanabilen sahte backend
+
+    latency_ms: her isteğe eklenen sabit gecikme
+    upload_bandwidth: istek gövdesinin okunma hızı (bayt/sn, None = sınırsız)
+    meal_count / meal_days / note_bytes: /api/meals'in sunduğu öğünler
+    report_bytes: /api/report/pdf yanıtının boyutu
+    upload_error_rate: /api/upload isteklerinin 503 ile reddedilme olasılığı
+    outage: True iken öğün, rapor ve giriş uçları (gecikmeden sonra) 503 döndürür;
+    çalışırken değiştirilebilir (latency_ms gibi)
+
+    Aynı Idempotency-Key ile tekrar gelen yüklemeler yeni öğün oluşturmaz,
+    ilk yanıt yeniden döner. Fotoğraflar içerik özetiyle saklanır:
+    /api/images/hash/<sha256> saklı fotoğrafın image_key'ini döndürür ve
+    fotoğrafsız, imageKey alanlı yüklemeler var olan fotoğrafı kullanır.
+    """
+
+    def __init__(self, latency_ms=0, upload_bandwidth=None, meal_count=200, meal_days=30,
+                 note_bytes=0, report_bytes=256 * 1024, upload_error_rate=0.0, outage=False, seed=42):
+        self.latency_ms = latency_ms
+        self.upload_bandwidth = upload_bandwidth
+        self.meal_count = meal_count
+        self.meal_days = meal_days
+        self.note_bytes = note_bytes
+        self.report_bytes = report_bytes
+        self.upload_error_rate = upload_error_rate
+        self.outage = outage
+        self.uploads = {}  # Idempotency-Key (ya da sıra) -> öğün kimliği
+        self.images = {}  # içerik özeti -> image_key
+        self.image_bytes_received = 0
+        self.request_counts = {}
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+        self._meals = None
+        self._frame = None
+        self._image = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        from meal_frame import to_frame
+
+        backend = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.backend = backend
+        self._meals = mock_meals(self.meal_count, self.meal_days, self.note_bytes)
+        self._frame = to_frame(self._meals)
+        self._image = mock_jpeg()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, path, received=0, sent=0):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def stats(self):
+        with self._lock:
+            return {
+                "request_counts": dict(sorted(self.request_counts.items())),
+                "requests": sum(self.request_counts.values()),
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+                "images_stored": len(self.images),
+                "image_bytes_received": self.image_bytes_received,
+            }
+
+    def accept_upload(self, idempotency_key, fields=None, image=None):
+        """Yüklemeyi kaydet: (durum, yanıt); hata oranına göre 503, bilinmeyen imageKey için 422 döner"""
+        fields = fields or {}
+        with self._lock:
+            if idempotency_key in self.uploads:
+                return 201, self.uploads[idempotency_key]
+            if self._random.random() < self.upload_error_rate:
+                return 503, {"error": "Sunucu meşgul"}
+            if image is not None:
+                self.image_bytes_received += len(image)
+                digest = hashlib.sha256(image).hexdigest()
+                image_key = self.images.setdefault(digest, f"uploads/{digest[:16]}.jpg")
+            else:
+                image_key = fields.get("imageKey")
+                if image_key is not None and image_key not in self.images.values():
+                    return 422, {"error": "Fotoğraf bulunamadı"}
+            meal_id = str(len(self.uploads) + 1)
+            response = {"id": meal_id, "image_key": image_key}
+            self.uploads[idempotency_key or f"upload-{meal_id}"] = response
+            return 201, response
+
+    def find_image(self, content_hash):
+        with self._lock:
+            return self.images.get(content_hash)
+
+    def query_meals(self, params):
+        from meal_frame import query_frame
+
+        frame = query_frame(
+            self._frame,
+            params.get("startDate"),
+            params.get("endDate"),
+            params.get("userId", "all"),
+            int(params["limit"]) if params.get("limit") else None,
+            params.get("cursor"),
+        )
+        return [self._meals[i] for i in frame.index]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    backend = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self._delay()
+        if self.backend.outage and path in ("/api/meals", "/api/report/pdf"):
+            sent = self._json(503, {"error": "Servis kullanılamıyor"})
+        elif path == "/api/meals":
+            sent = self._json(200, self.backend.query_meals(params))
+        elif path == "/api/report/pdf":
+            sent = self._bytes(200, b"%PDF-1.4\n" + b"0" * self.backend.report_bytes, "application/pdf")
+        elif path.startswith("/api/images/hash/"):
+            image_key = self.backend.find_image(path.rsplit("/", 1)[-1])
+            if image_key:
+                sent = self._json(200, {"image_key": image_key})
+            else:
+                sent = self._json(404, {"error": "Bulunamadı"})
+            path = "/api/images/hash"
+        elif path.startswith("/api/images/"):
+            sent = self._bytes(200, self.backend._image, "image/jpeg")
+            path = "/api/images"
+        else:
+            sent = self._json(404, {"error": "Bulunamadı"})
+        self.backend.count(path, sent=sent)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        body = self._read_body()
+        self._delay()
+        if self.backend.outage and path == "/api/auth/login":
+            sent = self._json(503, {"error": "Servis kullanılamıyor"})
+        elif path == "/api/upload":
+            fields, image = self._form(body)
+            status, payload = self.backend.accept_upload(self.headers.get("Idempotency-Key"), fields, image)
+            sent = self._json(status, payload)
+        elif path == "/api/auth/login":
+            code = json.loads(body or b"{}").get("code")
+            if code in MOCK_USERS:
+                sent = self._json(200, {"token": f"mock-{code}", "user": {"name": MOCK_USERS[code], "code": code}})
+            else:
+                sent = self._json(401, {"error": "Hatalı kullanıcı kodu"})
+        else:
+            sent = self._json(404, {"error": "Bulunamadı"})
+        self.backend.count(path, len(body), sent)
+
+    def _form(self, body):
+        """Form alanları ve (varsa) "image" dosyasının baytları"""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {key: values[-1] for key, values in parse_qs(body.decode("utf-8")).items()}, None
+        if not content_type.startswith("multipart/form-data"):
+            return {}, None
+        header = f"Content-Type: {content_type}\r\n\r\n".encode("latin-1")
+        message = BytesParser(policy=policy.HTTP).parsebytes(header + body)
+        fields, image = {}, None
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "image":
+                image = part.get_payload(decode=True)
+            elif name:
+                fields[name] = part.get_payload(decode=True).decode("utf-8")
+        return fields, image
+
+    def _read_body(self):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        bandwidth = self.backend.upload_bandwidth
+        chunks = []
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+        return b"".join(chunks)
+
+    def _delay(self):
+        if self.backend.latency_ms:
+            time.sleep(self.backend.latency_ms / 1000)
+
+    def _json(self, status, payload):
+        return self._bytes(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _bytes(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
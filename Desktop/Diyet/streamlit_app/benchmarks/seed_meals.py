@@ -0,0 +1,90 @@
+# Yerel SQLite öğün deposu için sentetik veri üreteci
+#
+# Kullanım:
+#   python benchmarks/seed_meals.py --db diyet_demo.db --users 50 --years 3
+#   MEAL_DB_PATH=diyet_demo.db STREAMLIT_DEMO_MODE=true streamlit run app.py
+#
+# Her kullanıcı için her gün 2-5 öğün (kahvaltı, öğle, akşam, atıştırma)
+# üretir. 50 kullanıcı × 3 yıl ≈ 190 bin, 400 kullanıcı × 3 yıl ≈ 1.5 milyon
+# satır. A ve B kullanıcıları her zaman dahildir.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_store import SqliteMealStore  # noqa: E402
+
+# Öğün türü -> (UTC saat aralığı, olasılık)
+MEAL_SLOTS = [
+    ("Kahvaltı", (5, 8), 0.9),
+    ("Öğle", (10, 12), 0.85),
+    ("Akşam", (16, 19), 0.9),
+    ("Atıştırma", (13, 21), 0.5),
+]
+NOTES = ["", "", "", "Sağlıklı kahvaltı", "Hafif öğle yemeği", "tatlı", "fast food", "Salata", "Ev yemeği"]
+
+
+def synthetic_users(count):
+    users = [("A", "Ben"), ("B", "Eşim")]
+    users += [(f"U{i:04d}", f"Kullanıcı {i}") for i in range(1, max(count - 1, 0))]
+    return users[:max(count, 2)]
+
+
+def generate_rows(users, days, end, rng):
+    """(user_code, user_name, meal_type, note, taken_at, image_key, updated_at) satırları üret"""
+    updated_at = end.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    for offset in range(days):
+        day = end - timedelta(days=offset)
+        for code, name in users:
+            for meal_type, (first_hour, last_hour), probability in MEAL_SLOTS:
+                if rng.random() > probability:
+                    continue
+                taken_at = day.replace(hour=rng.randint(first_hour, last_hour), minute=rng.randrange(60),
+                                       second=0, microsecond=0)
+                yield (code, name, meal_type, rng.choice(NOTES), taken_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                       f"seed/{code}/{offset}-{meal_type}.jpg", updated_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik öğün üreteci")
+    parser.add_argument("--db", default=os.environ.get("MEAL_DB_PATH", "diyet_demo.db"))
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    store = SqliteMealStore(args.db)
+    rng = random.Random(args.seed)
+    users = synthetic_users(args.users)
+    end = datetime.now(timezone.utc)
+
+    started = time.perf_counter()
+    batch, total = [], 0
+    for row in generate_rows(users, int(args.years * 365), end, rng):
+        batch.append(row)
+        if len(batch) >= args.batch:
+            store.insert_rows(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        store.insert_rows(batch)
+        total += len(batch)
+    store.connection().execute("ANALYZE")
+
+    print(json.dumps({
+        "db": args.db,
+        "users": len(users),
+        "inserted": total,
+        "rows": store.count(),
+        "seconds": round(time.perf_counter() - started, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
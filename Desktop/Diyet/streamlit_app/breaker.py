@@ -0,0 +1,136 @@
+# Backend uç noktaları için devre kesici
+#
+# Backend yavaşladığında ya da çöktüğünde her çağrı zaman aşımına kadar bir
+# betik iş parçacığını bekletir; yeni istekler zorlanan backend'in üzerine
+# yığılır. Devre kesici uç nokta başına art arda gelen hataları sayar:
+# bağlantı hatası, 5xx yanıtı ya da gecikme hedefini (SLO) aşan yanıt.
+# BREAKER_FAILURES hata üst üste gelince devre açılır ve BREAKER_COOLDOWN
+# saniye boyunca o uç noktaya istek gönderilmez; çağrılar hemen
+# BackendUnavailable ile döner. Süre dolunca devre yarı açık olur: tek bir
+# deneme isteği geçer, başarılıysa devre kapanır, değilse yeniden açılır.
+# allow() deneme isteğine bir belirteç verir ve record() onunla çağrılır;
+# devre açıkken ya da yarı açıkken gelen başka sonuçlar (açılmadan önce
+# gönderilmiş geç yanıtlar) durumu değiştirmez.
+#
+# BackendUnavailable bir requests bağlantı hatasıdır; mevcut hata yolları
+# (giriş, öğünler, rapor işleri) onu ayrıca tanımadan yakalar.
+import os
+import threading
+import time
+
+import requests
+
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))  # 0: devre kesici kapalı
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+BREAKER_SLOW_MS = float(os.environ.get("BREAKER_SLOW_MS", "3000"))
+
+
+class BackendUnavailable(requests.exceptions.ConnectionError):
+    """Devre açık: istek backend'e gönderilmeden reddedildi"""
+
+
+class CircuitBreaker:
+    """Tek bir uç nokta için kapalı / açık / yarı açık devre kesici"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, slow_ms=BREAKER_SLOW_MS,
+                 clock=time.monotonic):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.slow_ms = slow_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = None  # geçerli deneme isteğinin belirteci
+        self._probes = 0
+        self.consecutive = 0
+        self.trips = 0
+        self.short_circuited = 0
+        self.slow_calls = 0
+        self.last_reason = None
+        self.last_trip = None  # duvar saati (time.time())
+
+    @property
+    def enabled(self):
+        return self.failures > 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """İsteğin gönderilebileceğini doğrula; devre açıksa BackendUnavailable
+
+        Deneme isteği için record()'a verilecek belirteci, diğer isteklerde None döndürür.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return None
+            if state == self.HALF_OPEN and self._probing is None:
+                # Yarı açık devrede yalnızca bir deneme isteği geçer
+                self._probes += 1
+                self._probing = self._probes
+                return self._probing
+            self.short_circuited += 1
+            remaining = max(self._opened_at + self.cooldown - self._clock(), 0)
+        raise BackendUnavailable(
+            f"Backend geçici olarak devre dışı ({self.name}); {remaining:.0f} sn sonra yeniden denenecek"
+        )
+
+    def record(self, elapsed_ms, error=False, probe=None):
+        """Gönderilen isteğin sonucunu işle (error: bağlantı hatası ya da 5xx)
+
+        probe: isteğe allow()'un verdiği belirteç (deneme isteği değilse None).
+        """
+        if not self.enabled:
+            return
+        slow = elapsed_ms > self.slow_ms
+        with self._lock:
+            if slow:
+                self.slow_calls += 1
+            if probe is not None:
+                if probe != self._probing:
+                    return  # eski bir yarı açık dönemin denemesi
+                self._probing = None
+            elif self._current_state() != self.CLOSED:
+                return  # devre açılmadan önce gönderilmiş isteğin geç sonucu
+            if not (error or slow):
+                self.consecutive = 0
+                self._state = self.CLOSED
+                return
+            self.consecutive += 1
+            self.last_reason = "hata" if error else f"yavaş ({elapsed_ms:.0f} ms)"
+            if probe is not None or self.consecutive >= self.failures:
+                self._trip()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive": self.consecutive,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+                "slow_calls": self.slow_calls,
+                "last_reason": self.last_reason,
+                "last_trip": self.last_trip,
+            }
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self.trips += 1
+        self.last_trip = time.time()
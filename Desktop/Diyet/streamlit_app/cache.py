@@ -0,0 +1,237 @@
+# Süreç genelinde paylaşılan önbellekler
+#
+# Streamlit app.py dosyasını her etkileşimde yeniden çalıştırır, fakat içe
+# aktarılan modüller süreç boyunca bellekte kalır. Bu yüzden burada tanımlanan
+# nesneler tüm oturumlar (sekmeler, kullanıcılar) arasında paylaşılır.
+#
+# Bayat verinin sunulması (stale-while-revalidate): süresi dolan öğün
+# kayıtları MEAL_CACHE_STALE_TTL boyunca "son bilinen iyi değer" olarak
+# tutulur. Backend yavaş ya da erişilemezken çağıran bu değeri hemen
+# gösterir; kayıt arka planda (revalidator) yenilenir.
+#
+# STATE_BACKEND paylaşılan bir depo seçerse (state.py) öğün önbelleği süreç
+# belleği yerine o depoda tutulur; tüm Streamlit süreçleri (replikalar) aynı
+# kayıtları görür ve birinin geçersiz kıldığı kayıt hepsi için silinir.
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from state import SHARED_STATE, SharedCache, state_store
+
+
+def json_size(value):
+    """Bir değerin JSON olarak yaklaşık bayt boyutu"""
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+class LRUCache:
+    """TTL ve bayt bütçesi olan, iş parçacığı güvenli LRU önbellek
+
+    stale_ttl verilirse süresi dolan kayıt o kadar süre daha silinmez:
+    get() onu döndürmez, get_stale() döndürür.
+    """
+
+    def __init__(self, max_bytes, ttl=None, sizeof=json_size, stale_ttl=0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at, stored_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Önbellekteki değeri döndür, yoksa veya süresi dolmuşsa None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at, _ = entry
+            now = time.monotonic()
+            if expires_at is not None and expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key):
+        """Süresi dolmuş olsa da bayatlık penceresindeki değer: (değer, kaydedildiği an) ya da None
+
+        Kaydedilme anı duvar saatidir (time.time()).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at, stored_at = entry
+            if expires_at is not None and expires_at + self.stale_ttl <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return value, stored_at
+
+    def peek(self, key):
+        """get() gibi, fakat sayaçları ve LRU sırasını değiştirmez (arka plan denetimleri için)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[2] is not None and entry[2] <= time.monotonic()):
+                return None
+            return entry[0]
+
+    def set(self, key, value):
+        """Değeri ekle; bütçe aşılırsa en eski kayıtları çıkar"""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return False
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def invalidate(self, predicate):
+        """predicate(key) True dönen tüm kayıtları sil"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """İsabet/ıskalama sayaçları ve doluluk bilgisi"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stale_hits": self.stale_hits,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class Revalidator:
+    """Bayat verileri arka planda yenileyen sınırlı havuz; aynı anahtar için aynı anda tek iş"""
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="revalidate")
+        self._lock = threading.Lock()
+        self._running = set()
+        self.refreshes = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def submit(self, key, refresh):
+        """refresh()'i arka planda çalıştır; aynı anahtar zaten yenileniyorsa False döner
+
+        refresh() False döndürür ya da hata verirse yenileme başarısız sayılır.
+        """
+        with self._lock:
+            if key in self._running:
+                self.skipped += 1
+                return False
+            self._running.add(key)
+        self._executor.submit(self._run, key, refresh)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "in_flight": len(self._running),
+                "skipped": self.skipped,
+            }
+
+    def _run(self, key, refresh):
+        try:
+            ok = refresh() is not False
+        except Exception:
+            ok = False
+        with self._lock:
+            self._running.discard(key)
+            self.refreshes += 1
+            self.failures += int(not ok)
+
+
+# Öğün önbelleği: anahtar (start_date, end_date, user_id, caller, limit, cursor)
+MEAL_CACHE_TTL = float(os.environ.get("MEAL_CACHE_TTL", "60"))
+MEAL_CACHE_MAX_BYTES = int(os.environ.get("MEAL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Süresi dolan kaydın son bilinen değer olarak sunulabileceği ek süre (0: kapalı, beklenir)
+MEAL_CACHE_STALE_TTL = float(os.environ.get("MEAL_CACHE_STALE_TTL", "3600"))
+STALE_WHILE_REVALIDATE = MEAL_CACHE_STALE_TTL > 0
+REVALIDATE_WORKERS = int(os.environ.get("REVALIDATE_WORKERS", "2"))
+
+if SHARED_STATE:
+    meal_cache = SharedCache(state_store, "meals", MEAL_CACHE_MAX_BYTES, ttl=MEAL_CACHE_TTL,
+                             stale_ttl=MEAL_CACHE_STALE_TTL)
+else:
+    meal_cache = LRUCache(MEAL_CACHE_MAX_BYTES, ttl=MEAL_CACHE_TTL, stale_ttl=MEAL_CACHE_STALE_TTL)
+
+# Bayat öğün kayıtlarını ve senkronizasyon kümelerini arka planda yenileyen havuz
+revalidator = Revalidator(REVALIDATE_WORKERS)
+
+
+def meal_cache_key(start_date, end_date, user_id, caller, limit=None, cursor=None):
+    """get_meals() çağrısı için önbellek anahtarı"""
+    return (start_date, end_date, user_id, caller, limit, cursor)
+
+
+def summary_cache_key(start_date, end_date, user_id, caller):
+    """Aralık özeti için önbellek anahtarı (invalidate_meal öğün sayfalarıyla birlikte siler)"""
+    return (start_date, end_date, user_id, caller, None, "summary")
+
+
+def search_cache_key(start_date, end_date, user_id, caller, terms, limit=None, cursor=None):
+    """Aralık içi arama sayfası için önbellek anahtarı"""
+    return (start_date, end_date, user_id, caller, limit, f"search|{' '.join(terms)}|{cursor or ''}")
+
+
+def invalidate_meal(user_code, taken_at_date):
+    """Yeni eklenen bir öğünün görüneceği tüm aralıkları önbellekten sil
+
+    Öğün, tarih aralığı taken_at_date'i kapsayan ve kullanıcı filtresi
+    "all" ya da öğünün sahibi olan her anahtarda görünür; çağıran kim
+    olursa olsun bu anahtarlar geçersiz kılınır.
+    """
+    day = taken_at_date.isoformat() if hasattr(taken_at_date, "isoformat") else taken_at_date
+
+    def affected(key):
+        start_date, end_date, user_id = key[0], key[1], key[2]
+        return start_date <= day <= end_date and user_id in ("all", user_code)
+
+    return meal_cache.invalidate(affected)
@@ -0,0 +1,162 @@
+# Ham öğün verisini dışa aktarma (CSV / JSON Lines / Parquet)
+#
+# Diyetisyen görünümündeki filtrenin öğünleri kaynaktan (demo: SQLite
+# iter_meals, gerçek mod: backend sayfaları) okunur ve EXPORT_CHUNK_SIZE
+# satırlık sütunlu parçalar hâlinde doğrudan çıktıya yazılır; yıllık, çok
+# kullanıcılı bir dışa aktarma da hiçbir zaman tek bir sözlük listesi olarak
+# bellekte tutulmaz. Parquet'te her parça ayrı bir satır grubudur.
+#
+# Çıktı PDF raporu gibi REPORT_SPOOL_MEMORY'den sonra diske taşan geçici bir
+# dosyaya yazılır, REPORT_MAX_BYTES ile sınırlıdır ve rapor iş kuyruğunda
+# (report_jobs) arka planda üretilir. pyarrow yalnızca Parquet istendiğinde
+# içe aktarılır.
+import codecs
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import namedtuple
+
+from meal_frame import to_utc_text
+from reports import REPORT_MAX_BYTES, REPORT_SPOOL_MEMORY, ReportArtifact, ReportTooLarge, _too_large_message
+from rollups import format_minutes, local_day_minute
+
+# Tek seferde okunup yazılan öğün (satır) sayısı
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "5000"))
+
+EXPORT_COLUMNS = [
+    "id", "taken_at", "local_date", "local_time", "user_code", "user_name", "meal_type", "note", "image_key",
+]
+
+ExportFormat = namedtuple("ExportFormat", ["label", "extension", "mime"])
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("CSV", "csv", "text/csv"),
+    "jsonl": ExportFormat("JSON Lines", "jsonl", "application/x-ndjson"),
+    "parquet": ExportFormat("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+
+def export_file_name(start_date, end_date, fmt):
+    return f"diyet-ogunler-{start_date}-{end_date}.{EXPORT_FORMATS[fmt].extension}"
+
+
+# Günün dakikası -> "HH:MM"
+_TIME_LABELS = [format_minutes(minute) for minute in range(24 * 60)]
+
+
+def meal_chunks(meals, chunk_size=EXPORT_CHUNK_SIZE):
+    """Öğün sözlüklerini en fazla chunk_size satırlık sütun sözlüklerine (ad -> liste) çevir
+
+    taken_at sabit genişlikli UTC metnine, yerel gün ve saat ise LOCAL_TZ'ye
+    göre hesaplanır (rollups ile aynı kurallar).
+    """
+    columns = {name: [] for name in EXPORT_COLUMNS}
+    for meal in meals:
+        user = meal.get("User") or {}
+        taken_at = to_utc_text(meal["taken_at"])
+        day, minute = local_day_minute(taken_at)
+        columns["id"].append(str(meal["id"]))
+        columns["taken_at"].append(taken_at)
+        columns["local_date"].append(day)
+        columns["local_time"].append(_TIME_LABELS[minute])
+        columns["user_code"].append(user.get("code"))
+        columns["user_name"].append(user.get("name"))
+        columns["meal_type"].append(meal.get("meal_type"))
+        columns["note"].append(meal.get("note") or "")
+        columns["image_key"].append(meal.get("image_key"))
+        if len(columns["id"]) >= chunk_size:
+            yield columns
+            columns = {name: [] for name in EXPORT_COLUMNS}
+    if columns["id"]:
+        yield columns
+
+
+def _rows(columns):
+    return zip(*(columns[name] for name in EXPORT_COLUMNS))
+
+
+def _write_csv(file, chunks):
+    # Excel'in Türkçe karakterleri doğru açması için UTF-8 BOM ile
+    file.write(codecs.BOM_UTF8)
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    for columns in chunks:
+        writer.writerows(_rows(columns))
+        text.flush()
+        yield
+    text.detach()
+
+
+def _write_jsonl(file, chunks):
+    for columns in chunks:
+        lines = "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+                        for row in _rows(columns))
+        file.write(lines.encode("utf-8"))
+        yield
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("taken_at", pa.timestamp("us", tz="UTC")),
+        ("local_date", pa.date32()),
+        ("local_time", pa.string()),
+        ("user_code", pa.dictionary(pa.int32(), pa.string())),
+        ("user_name", pa.string()),
+        ("meal_type", pa.dictionary(pa.int32(), pa.string())),
+        ("note", pa.string()),
+        ("image_key", pa.string()),
+    ])
+
+
+def _parquet_array(pa, values, type_):
+    # Metinler parça başına bir kez ayrıştırılır; öğün türü ve kullanıcı kodu sözlük kodludur
+    if pa.types.is_dictionary(type_):
+        return pa.array(values, pa.string()).dictionary_encode()
+    return pa.array(values, pa.string()).cast(type_)
+
+
+def _write_parquet(file, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+    writer = pq.ParquetWriter(file, schema, compression="zstd")
+    try:
+        for columns in chunks:
+            arrays = [_parquet_array(pa, columns[name], field.type) for name, field in zip(EXPORT_COLUMNS, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield
+    finally:
+        writer.close()
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def export_meals(meals, fmt, start_date, end_date, user_id="all", max_bytes=REPORT_MAX_BYTES,
+                 chunk_size=EXPORT_CHUNK_SIZE):
+    """Öğünleri (en yeniden eskiye, herhangi bir yineleyici) parça parça geçici dosyaya yaz
+
+    Boyut sınırı her parçadan sonra denetlenir; aşılırsa ReportTooLarge.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MEMORY, suffix="." + EXPORT_FORMATS[fmt].extension)
+    try:
+        for _ in _WRITERS[fmt](spool, meal_chunks(meals, chunk_size)):
+            if spool.tell() > max_bytes:
+                raise ReportTooLarge(_too_large_message(max_bytes))
+        size = spool.tell()
+        if size > max_bytes:
+            raise ReportTooLarge(_too_large_message(max_bytes))
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    key = (start_date, end_date, user_id, fmt)
+    return ReportArtifact(key, spool, size, export_file_name(start_date, end_date, fmt))
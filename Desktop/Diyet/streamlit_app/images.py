@@ -0,0 +1,108 @@
+# Fotoğraf ön işleme
+#
+# Yüklenen fotoğraf bir kez çözülür: EXIF çekim zamanı okunur, yönlendirme
+# uygulanır ve görüntü IMAGE_MAX_DIMENSION sınırına küçültülüp JPEG olarak
+# yeniden kodlanır. İşlem, formun takılmaması için arka plan havuzunda çalışır.
+# Pillow ilk fotoğrafta içe aktarılır (soğuk başlangıcı uzatmasın diye).
+#
+# Yüklemeler içerik adreslidir: gönderilecek baytların SHA-256 özeti
+# (content_hash) aynı fotoğrafın ikinci kez gönderilmesini önlemek için
+# kullanılır (bkz. outbox).
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+IMAGE_MAX_DIMENSION = int(os.environ.get("IMAGE_MAX_DIMENSION", "1600"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "82"))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+# EXIF etiketleri
+_EXIF_IFD = 0x8769
+_DATETIME_ORIGINAL = 36867
+_DATETIME_DIGITIZED = 36868
+_DATETIME = 306
+
+
+class PreparedImage:
+    """Gönderilmeye hazır, yeniden kodlanmış fotoğraf"""
+
+    def __init__(self, data, mime, width, height, original_size, taken_at):
+        self.data = data
+        self.mime = mime
+        self.width = width
+        self.height = height
+        self.original_size = original_size
+        self.taken_at = taken_at
+        # Ön işleme havuzunda bir kez hesaplanır
+        self.content_hash = sha256_hex(data)
+
+    @property
+    def saved_bytes(self):
+        return self.original_size - len(self.data)
+
+
+def sha256_hex(data):
+    """Fotoğraf baytlarının SHA-256 özeti (onaltılık)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_exif_datetime(img):
+    """EXIF çekim zamanını (DateTimeOriginal) datetime olarak döndür, yoksa None"""
+    try:
+        exif = img.getexif()
+    except Exception:
+        return None
+    exif_ifd = exif.get_ifd(_EXIF_IFD)
+    for value in (exif_ifd.get(_DATETIME_ORIGINAL), exif_ifd.get(_DATETIME_DIGITIZED), exif.get(_DATETIME)):
+        if not value:
+            continue
+        try:
+            return datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+        except ValueError:
+            continue
+    return None
+
+
+def prepare_image(data, max_dimension=IMAGE_MAX_DIMENSION, quality=IMAGE_JPEG_QUALITY):
+    """Fotoğrafı bir kez çöz, EXIF zamanını oku ve küçültülmüş JPEG üret"""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as img:
+        taken_at = read_exif_datetime(img)
+        source_format = img.format
+        source_size = img.size
+
+        # JPEG'lerde hedef boyuta yakın ölçekte çöz (tam çözünürlüklü çözmeyi atlar)
+        img.draft("RGB", (max_dimension, max_dimension))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_dimension, max_dimension))
+
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        out = BytesIO()
+        img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        encoded = out.getvalue()
+        width, height = img.size
+
+    # Zaten küçük bir JPEG ise yeniden kodlamak boyutu büyütebilir; aslını gönder
+    if source_format == "JPEG" and source_size == (width, height) and len(encoded) >= len(data):
+        encoded = data
+
+    return PreparedImage(encoded, "image/jpeg", width, height, len(data), taken_at)
+
+
+# Süreç genelindeki ön işleme havuzu
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+
+def submit_prepare(data, max_dimension=IMAGE_MAX_DIMENSION, quality=IMAGE_JPEG_QUALITY):
+    """prepare_image işini havuza gönder ve Future döndür"""
+    return image_pool.submit(prepare_image, data, max_dimension, quality)
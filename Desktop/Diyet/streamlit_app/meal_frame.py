@@ -0,0 +1,153 @@
+# Öğünlerin sütunlu (pandas) gösterimi
+#
+# Backend'den gelen öğün listesi bir kez tipli bir DataFrame'e çevrilir:
+# taken_at vektörel olarak ayrıştırılır ve yerel saat dilimine tek seferde
+# dönüştürülür. Gruplama, sıralama ve filtreleme bu çerçeve üzerinden,
+# yerel takvim gününe göre yapılır.
+#
+# pandas ve numpy ilk kullanımda içe aktarılır; böylece giriş sayfası gibi
+# öğün göstermeyen çalıştırmalar soğuk başlangıçta bunları yüklemez.
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+LOCAL_TZ = "Europe/Vienna"
+
+FRAME_COLUMNS = [
+    "id", "meal_type", "note", "image_key", "image_url", "user_code", "user_name",
+    "taken_at", "local_date", "local_time",
+]
+
+# Kart çizerken okunan alanlar
+MealRow = namedtuple("MealRow", ["id", "meal_type", "note", "image_key", "user_name", "local_time"])
+
+
+def to_utc_text(value):
+    """datetime ya da ISO metnini sabit genişlikli UTC biçimine çevir (saat dilimsiz değerler UTC sayılır)"""
+    if isinstance(value, str):
+        # Yerel depodan gelen değerler zaten bu biçimdedir; backend'in milisaniyeli
+        # UTC metni yalnızca uzatılır, diğerleri ayrıştırılır
+        if len(value) == 27 and value[19] == "." and value[26] == "Z":
+            return value
+        if len(value) == 24 and value[19] == "." and value[23] == "Z":
+            return value[:23] + "000Z"
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def meal_cursor(meal):
+    """Bu öğünden daha eski öğünleri isteyen sayfa imleci ("taken_at|id")"""
+    return f"{meal['taken_at']}|{meal['id']}"
+
+
+def parse_cursor(cursor):
+    """meal_cursor() imlecini (taken_at, id) metin çiftine ayır"""
+    taken_at, _, meal_id = cursor.rpartition("|")
+    return taken_at, meal_id
+
+
+@lru_cache(maxsize=1)
+def _time_labels():
+    """Günün dakikası -> "HH:MM" (strftime'ı satır satır çağırmamak için)"""
+    import numpy as np
+
+    return np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+
+
+def to_frame(meals, tz=LOCAL_TZ):
+    """Öğün sözlüklerini en yeniden eskiye sıralı bir DataFrame'e çevir
+
+    Satır indeksi, öğünün meals listesindeki sırasıdır; böylece seçilen
+    satırlardan özgün sözlüklere geri dönülebilir.
+    """
+    import pandas as pd
+
+    if not meals:
+        return pd.DataFrame({column: pd.Series(dtype="object") for column in FRAME_COLUMNS})
+
+    users = [meal.get("User") or {} for meal in meals]
+    frame = pd.DataFrame({
+        "id": [str(meal["id"]) for meal in meals],
+        "meal_type": [meal.get("meal_type") for meal in meals],
+        "note": [meal.get("note") or "" for meal in meals],
+        "image_key": [meal.get("image_key") for meal in meals],
+        "image_url": [meal.get("imageUrl") for meal in meals],
+        "user_code": [user.get("code") for user in users],
+        "user_name": [user.get("name") for user in users],
+    })
+    raw = [t if isinstance(t, str) else t.isoformat() for t in (meal["taken_at"] for meal in meals)]
+    frame["taken_at"] = pd.to_datetime(pd.Series(raw), utc=True, format="ISO8601")
+
+    local = frame["taken_at"].dt.tz_convert(tz).dt.tz_localize(None)
+    frame["local_date"] = local.dt.normalize()
+    frame["local_time"] = _time_labels()[(local.dt.hour * 60 + local.dt.minute).to_numpy()]
+
+    frame = frame.astype({"meal_type": "category", "user_code": "category"})
+    return frame.sort_values(["taken_at", "id"], ascending=False, kind="stable")
+
+
+def range_frame(frame, start_date=None, end_date=None):
+    """Yerel takvim gününe göre [start_date, end_date] aralığını uygula (ISO tarih)"""
+    import pandas as pd
+
+    if frame.empty:
+        return frame
+    if start_date:
+        frame = frame[frame["local_date"] >= pd.Timestamp(start_date)]
+    if end_date:
+        frame = frame[frame["local_date"] <= pd.Timestamp(end_date)]
+    return frame
+
+
+def filter_frame(frame, user_id="all"):
+    """Kullanıcı filtresini uygula ("all" tümü)"""
+    if user_id == "all" or frame.empty:
+        return frame
+    return frame[frame["user_code"] == user_id]
+
+
+def page_frame(frame, limit=None, cursor=None):
+    """İmleçten (taken_at|id) eski satırlardan en fazla limit kadarını döndür"""
+    import pandas as pd
+
+    if cursor and not frame.empty:
+        taken_at, meal_id = parse_cursor(cursor)
+        boundary = pd.Timestamp(taken_at)
+        boundary = boundary.tz_localize("UTC") if boundary.tzinfo is None else boundary.tz_convert("UTC")
+        older = (frame["taken_at"] < boundary) | ((frame["taken_at"] == boundary) & (frame["id"] < meal_id))
+        frame = frame[older]
+    if limit:
+        frame = frame.head(limit)
+    return frame
+
+
+def query_frame(frame, start_date=None, end_date=None, user_id="all", limit=None, cursor=None):
+    """Tarih aralığı, kullanıcı ve sayfa filtrelerini sırayla uygula"""
+    return page_frame(filter_frame(range_frame(frame, start_date, end_date), user_id), limit, cursor)
+
+
+def select_meals(meals, user_id="all", limit=None, cursor=None, start_date=None, end_date=None):
+    """Filtrelenmiş ve sayfalanmış öğünleri özgün sözlükler olarak döndür"""
+    frame = query_frame(to_frame(meals), start_date, end_date, user_id, limit, cursor)
+    return [meals[i] for i in frame.index]
+
+
+def group_by_day(frame):
+    """(gün etiketi, günün MealRow listesi) çiftlerini en yeni yerel günden başlayarak üret
+
+    Çerçeve taken_at'e göre azalan sıralı olduğundan yerel günler ardışık
+    bloklar hâlindedir; gruplar bu blok sınırlarından dilimlenir.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if frame.empty:
+        return
+    rows = list(map(MealRow._make, zip(*(frame[column].tolist() for column in MealRow._fields))))
+    days = frame["local_date"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    ends = np.r_[starts[1:], len(days)]
+    for start, end in zip(starts, ends):
+        yield pd.Timestamp(days[start]).strftime("%d.%m.%Y"), rows[start:end]
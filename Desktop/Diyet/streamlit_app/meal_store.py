@@ -0,0 +1,407 @@
+# Yerel, gömülü öğün deposu (SQLite)
+#
+# Demo modunda backend yerine kullanılır. Veriler WAL kipindeki bir SQLite
+# dosyasında (MEAL_DB_PATH) tutulur, yani oturumlar ve süreç yeniden
+# başlatmaları arasında korunur. (user_code, taken_at) üzerindeki indeks
+# sayesinde tarih aralığı ve sayfa sorguları milyonlarca satırda da hızlıdır.
+#
+# taken_at her zaman sabit genişlikli UTC metni olarak saklanır
+# ("YYYY-MM-DDTHH:MM:SS.ffffffZ"); böylece metin karşılaştırması zaman
+# sırasıyla aynıdır.
+#
+# daily_rollups tablosu (yerel gün, kullanıcı, öğün türü) başına öğün
+# sayısını ve saat toplamını tutar; user_code = '*' satırları tüm
+# kullanıcıların toplamıdır. monthly_user_rollups kullanıcı başına aylık
+# öğün sayısıdır. İkisi de öğünler eklenirken aynı işlemde güncellenir.
+# Uzun aralıkların özeti ham öğünler yerine bu tablolardan okunur: bir yıllık
+# özet en fazla 365 × 4 günlük satır ve kullanıcı başına 12 aylık satır okur.
+#
+# meals_search, not / öğün türü / kullanıcı üzerinde bir FTS5 tablosudur
+# (search.py); rowid'i öğünün id'sidir. Eşleşmeler meals ile birleştirilip
+# taken_at, id sırasıyla (en yeni önce) sayfalanır.
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone
+
+import pytz
+
+from meal_frame import LOCAL_TZ, meal_cursor, parse_cursor, to_utc_text
+from rollups import build_summary, local_day_minute, month_partition
+from search import fold_text, fts_query, search_terms, search_text
+
+MEAL_DB_PATH = os.environ.get("MEAL_DB_PATH", "diyet_demo.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    user_code TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    taken_at TEXT NOT NULL,
+    image_key TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meals_user_taken_at ON meals (user_code, taken_at);
+CREATE INDEX IF NOT EXISTS meals_taken_at ON meals (taken_at);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    user_code TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    meals INTEGER NOT NULL,
+    minutes INTEGER NOT NULL,
+    PRIMARY KEY (user_code, day, meal_type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_rollups_day ON daily_rollups (day, user_code, user_name, meals);
+CREATE TABLE IF NOT EXISTS monthly_user_rollups (
+    month TEXT NOT NULL,
+    user_code TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    meals INTEGER NOT NULL,
+    PRIMARY KEY (month, user_code)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS meals_search USING fts5(
+    body,
+    user_code,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# Tüm kullanıcıların toplamını tutan özet satırlarının kullanıcı kodu
+ALL_USERS = "*"
+
+_COLUMNS = "id, user_code, user_name, meal_type, note, taken_at, image_key"
+
+
+def local_day_bounds(start_date=None, end_date=None, tz=LOCAL_TZ):
+    """Yerel [start_date, end_date] günlerini UTC metin sınırlarına [alt, üst) çevir"""
+    zone = pytz.timezone(tz)
+    lower = upper = None
+    if start_date:
+        day = datetime.fromisoformat(str(start_date)).date()
+        lower = to_utc_text(zone.localize(datetime.combine(day, time.min)))
+    if end_date:
+        day = datetime.fromisoformat(str(end_date)).date() + timedelta(days=1)
+        upper = to_utc_text(zone.localize(datetime.combine(day, time.min)))
+    return lower, upper
+
+
+def _row_to_meal(row):
+    meal_id, user_code, user_name, meal_type, note, taken_at, image_key = row
+    return {
+        "id": str(meal_id),
+        "meal_type": meal_type,
+        "note": note,
+        "taken_at": taken_at,
+        "image_key": image_key,
+        "User": {"name": user_name, "code": user_code},
+    }
+
+
+class SqliteMealStore:
+    """get_meals / insert_meal / rapor yüzeyini yerel SQLite ile sağlayan depo"""
+
+    def __init__(self, path=MEAL_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._seed_lock = threading.Lock()
+        self._drop_old_search()
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+        self._backfill_rollups()
+        self._backfill_search()
+
+    def connection(self):
+        """İş parçacığına özel bağlantı (WAL kipinde)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("search_text", 4, search_text, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Yazma kilidini baştan alan işlem (BEGIN IMMEDIATE); başarıda commit, hatada rollback
+
+        Eş zamanlı yazıcılar (iş parçacıkları ya da süreçler) sırayla çalışır,
+        böylece işlemin başında okunan en büyük id işlem boyunca geçerlidir.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            yield conn
+
+    def get_meals(self, start_date=None, end_date=None, user_id="all", limit=None, cursor=None):
+        """Yerel gün aralığındaki öğünleri en yeniden eskiye döndür (cursor: "taken_at|id")"""
+        query, params = self._where(start_date, end_date, user_id)
+        if cursor:
+            taken_at, meal_id = parse_cursor(cursor)
+            query.append("(taken_at, id) < (?, ?)")
+            params.extend([to_utc_text(taken_at), int(meal_id)])
+        sql = f"SELECT {_COLUMNS} FROM meals"
+        if query:
+            sql += " WHERE " + " AND ".join(query)
+        sql += " ORDER BY taken_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_row_to_meal(row) for row in self.connection().execute(sql, params)]
+
+    def iter_meals(self, start_date=None, end_date=None, user_id="all", batch_size=1000):
+        """Aralıktaki öğünleri bellekte biriktirmeden, en yeniden eskiye parça parça üret"""
+        cursor = None
+        while True:
+            batch = self.get_meals(start_date, end_date, user_id, limit=batch_size, cursor=cursor)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            cursor = meal_cursor(batch[-1])
+
+    def count(self, start_date=None, end_date=None, user_id="all"):
+        query, params = self._where(start_date, end_date, user_id)
+        sql = "SELECT COUNT(*) FROM meals" + (" WHERE " + " AND ".join(query) if query else "")
+        return self.connection().execute(sql, params).fetchone()[0]
+
+    def insert_meal(self, user, meal_type, note, taken_at, image_key=None):
+        """Yeni öğün ekle ve backend biçiminde döndür"""
+        meals = self.insert_meals([{
+            "meal_type": meal_type,
+            "note": note,
+            "taken_at": taken_at,
+            "image_key": image_key,
+            "User": user,
+        }])
+        return meals[0]
+
+    def insert_meals(self, meals):
+        """Öğünleri tek işlemde ekle"""
+        now = to_utc_text(datetime.now(timezone.utc))
+        inserted = []
+        with self._write() as conn:
+            last_id = self._last_id(conn)
+            for meal in meals:
+                taken_at = to_utc_text(meal["taken_at"])
+                row = conn.execute(
+                    "INSERT INTO meals (user_code, user_name, meal_type, note, taken_at, image_key, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (meal["User"]["code"], meal["User"]["name"], meal["meal_type"], meal.get("note") or "",
+                     taken_at, meal.get("image_key"), now),
+                )
+                inserted.append(_row_to_meal((row.lastrowid, meal["User"]["code"], meal["User"]["name"],
+                                              meal["meal_type"], meal.get("note") or "", taken_at,
+                                              meal.get("image_key"))))
+            self._add_rollups(conn, (
+                (meal["User"]["code"], meal["User"]["name"], meal["meal_type"], meal["taken_at"]) for meal in inserted
+            ))
+            self._add_search(conn, last_id)
+        return inserted
+
+    def seed_if_empty(self, meals):
+        """Depo boşsa verilen öğünleri ekle (ilk açılışta demo verisi için)"""
+        with self._seed_lock:
+            if self.connection().execute("SELECT 1 FROM meals LIMIT 1").fetchone() is None:
+                self.insert_meals(meals)
+
+    def insert_rows(self, rows):
+        """Ham satırları (user_code, user_name, meal_type, note, taken_at, image_key, updated_at) toplu ekle"""
+        with self._write() as conn:
+            last_id = self._last_id(conn)
+            conn.executemany(
+                "INSERT INTO meals (user_code, user_name, meal_type, note, taken_at, image_key, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._add_rollups(conn, ((row[0], row[1], row[2], row[4]) for row in rows))
+            self._add_search(conn, last_id)
+
+    def recent_meals(self, user_code, limit=3):
+        """Kullanıcının en son eklediği öğünler"""
+        rows = self.connection().execute(
+            f"SELECT {_COLUMNS} FROM meals WHERE user_code = ? ORDER BY id DESC LIMIT ?", (user_code, limit)
+        )
+        return [_row_to_meal(row) for row in rows]
+
+    def search(self, query, user_id="all", limit=None, cursor=None):
+        """Not, öğün türü ve kullanıcıda query'nin tüm kelimeleri geçen öğünler, en yeniden eskiye
+
+        cursor önceki sayfanın son öğünü için "taken_at|id" değeridir.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        match = fts_query(terms)
+        columns = ", ".join(f"meals.{column.strip()}" for column in _COLUMNS.split(","))
+        # CROSS JOIN: önce indeksteki eşleşmeler okunur (planlayıcı meals'in zaman indeksini dolaşmasın)
+        sql = (f"SELECT {columns} FROM meals_search CROSS JOIN meals ON meals.id = meals_search.rowid "
+               "WHERE meals_search MATCH ?")
+        params = []
+        if user_id and user_id != "all":
+            # Kullanıcı süzgeci de indeksten; tokenizer küçülttüğü için kod ayrıca birebir karşılaştırılır
+            match += f' AND user_code : "{fold_text(user_id)}"'
+            sql += " AND meals.user_code = ?"
+            params.append(user_id)
+        params.insert(0, match)
+        if cursor:
+            taken_at, meal_id = parse_cursor(cursor)
+            sql += " AND (meals.taken_at, meals.id) < (?, ?)"
+            params.extend([to_utc_text(taken_at), int(meal_id)])
+        sql += " ORDER BY meals.taken_at DESC, meals.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_row_to_meal(row) for row in self.connection().execute(sql, params)]
+
+    def summary(self, start_date, end_date, user_id="all"):
+        """Aralığın özetini ham öğünleri taramadan özet tablolarından hesapla"""
+        start_date, end_date = str(start_date), str(end_date)
+        user_code = ALL_USERS if user_id in (None, "all") else user_id
+        conn = self.connection()
+        days, meal_types = {}, {}
+        for day, meal_type, count, minutes in conn.execute(
+            "SELECT day, meal_type, meals, minutes FROM daily_rollups "
+            "WHERE user_code = ? AND day BETWEEN ? AND ?",
+            (user_code, start_date, end_date),
+        ):
+            days[day] = days.get(day, 0) + count
+            total = meal_types.setdefault(meal_type, [0, 0])
+            total[0] += count
+            total[1] += minutes
+
+        users = {}
+        if user_code == ALL_USERS and start_date <= end_date:
+            # Tam aylar aylık tablodan, aralığın kenarındaki günler günlük tablodan
+            first_month, last_month, edges = month_partition(start_date, end_date)
+            parts, params = [], []
+            if first_month:
+                parts.append("SELECT user_code, user_name, meals FROM monthly_user_rollups WHERE month BETWEEN ? AND ?")
+                params.extend([first_month, last_month])
+            for edge_start, edge_end in edges:
+                parts.append(
+                    "SELECT user_code, user_name, meals FROM daily_rollups WHERE day BETWEEN ? AND ? AND user_code != ?"
+                )
+                params.extend([edge_start, edge_end, ALL_USERS])
+            for code, name, count in conn.execute(
+                f"SELECT user_code, MAX(user_name), SUM(meals) FROM ({' UNION ALL '.join(parts)}) GROUP BY user_code",
+                params,
+            ):
+                users[code] = (name, count)
+        elif days:
+            name = conn.execute(
+                "SELECT user_name FROM daily_rollups WHERE user_code = ? LIMIT 1", (user_code,)
+            ).fetchone()[0]
+            users[user_code] = (name, sum(days.values()))
+        return build_summary(days, meal_types, users, start_date, end_date)
+
+    def _add_rollups(self, conn, meals):
+        """(user_code, user_name, meal_type, taken_at) öğünlerini özet tablolarına ekle (çağıranın işleminde)"""
+        cells, months = {}, {}
+        for user_code, user_name, meal_type, taken_at in meals:
+            day, minute = local_day_minute(taken_at)
+            for code, name in ((user_code, user_name), (ALL_USERS, "")):
+                cell = cells.setdefault((day, code, meal_type), [name, 0, 0])
+                cell[1] += 1
+                cell[2] += minute
+            month = months.setdefault((day[:7], user_code), [user_name, 0])
+            month[1] += 1
+        conn.executemany(
+            "INSERT INTO daily_rollups (day, user_code, meal_type, user_name, meals, minutes) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (user_code, day, meal_type) DO UPDATE SET "
+            "meals = meals + excluded.meals, minutes = minutes + excluded.minutes, user_name = excluded.user_name",
+            [(day, user_code, meal_type, name, count, minutes)
+             for (day, user_code, meal_type), (name, count, minutes) in cells.items()],
+        )
+        conn.executemany(
+            "INSERT INTO monthly_user_rollups (month, user_code, user_name, meals) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (month, user_code) DO UPDATE SET "
+            "meals = meals + excluded.meals, user_name = excluded.user_name",
+            [(month, user_code, name, count) for (month, user_code), (name, count) in months.items()],
+        )
+
+    def _last_id(self, conn):
+        """En büyük öğün id'si; _write() işleminde okunmalıdır, yoksa eş zamanlı yazıcılar aynı değeri görür"""
+        return conn.execute("SELECT IFNULL(MAX(id), 0) FROM meals").fetchone()[0]
+
+    def _add_search(self, conn, after_id):
+        """id'si after_id'den büyük öğünleri arama tablosuna ekle (çağıranın işleminde)
+
+        FTS5 artan rowid sırasıyla eklenen satırları çok daha hızlı yazar.
+        """
+        conn.execute(
+            "INSERT INTO meals_search (rowid, body, user_code) "
+            "SELECT id, search_text(note, meal_type, user_name, user_code), user_code "
+            "FROM meals WHERE id > ? ORDER BY id",
+            (after_id,),
+        )
+
+    def _drop_old_search(self):
+        """rowid'i zamandan türetilen (çakışabilen) eski arama tablosunu sil; _backfill_search yeniden kurar"""
+        def old(conn):
+            return "meal_id" in {row[1] for row in conn.execute("PRAGMA table_info(meals_search)")}
+        if not old(self.connection()):
+            return
+        with self._write() as conn:
+            if old(conn):
+                conn.execute("DROP TABLE meals_search")
+
+    def _backfill_search(self):
+        """Arama tablosundan önce oluşturulmuş veritabanlarında indeksi bir kez kur"""
+        conn = self.connection()
+        if conn.execute("SELECT 1 FROM meals_search LIMIT 1").fetchone() is not None:
+            return
+        if conn.execute("SELECT 1 FROM meals LIMIT 1").fetchone() is None:
+            return
+        with self._write() as conn:
+            # Aynı anda açılan başka bir süreç indeksi kurmuş olabilir
+            if conn.execute("SELECT 1 FROM meals_search LIMIT 1").fetchone() is None:
+                self._add_search(conn, 0)
+
+    def _backfill_rollups(self):
+        """Özet tablosundan önce oluşturulmuş veritabanlarında özetleri bir kez, parça parça kur"""
+        conn = self.connection()
+        if conn.execute("SELECT 1 FROM daily_rollups LIMIT 1").fetchone() is not None:
+            return
+        if conn.execute("SELECT 1 FROM meals LIMIT 1").fetchone() is None:
+            return
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM daily_rollups LIMIT 1").fetchone() is not None:
+                return
+            rows = conn.execute("SELECT user_code, user_name, meal_type, taken_at FROM meals")
+            while True:
+                batch = rows.fetchmany(50_000)
+                if not batch:
+                    break
+                self._add_rollups(conn, batch)
+
+    def _where(self, start_date, end_date, user_id):
+        query, params = [], []
+        if user_id and user_id != "all":
+            query.append("user_code = ?")
+            params.append(user_id)
+        lower, upper = local_day_bounds(start_date, end_date)
+        if lower:
+            query.append("taken_at >= ?")
+            params.append(lower)
+        if upper:
+            query.append("taken_at < ?")
+            params.append(upper)
+        return query, params
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=MEAL_DB_PATH):
+    """Verilen veritabanı dosyası için süreç genelindeki tek depoyu döndür"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SqliteMealStore(path)
+        return store
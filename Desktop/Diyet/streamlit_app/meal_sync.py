@@ -0,0 +1,260 @@
+# Öğünlerin artımlı (delta) senkronizasyonu
+#
+# MEAL_SYNC=true iken istemci her çağıran ve kullanıcı filtresi ("all", "A",
+# "B") için yerel bir öğün kümesi tutar; çağıran, cache.meal_cache_key'deki
+# gibi giriş yapan kullanıcının kodudur ve bir kullanıcının token'ıyla
+# indirilen küme başka bir kullanıcıya gösterilmez. Backend'e yalnızca son senkronizasyondan bu
+# yana değişenler sorulur (updatedAfter) ve If-None-Match ile son ETag
+# gönderilir; değişiklik yoksa 304 gövdesiz döner. Gelen ekleme, güncelleme
+# ve silmeler yerel kümeye işlenir, tarih aralığı ve sayfa sorguları yerelden
+# cevaplanır.
+#
+# Beklenen yanıt: öğün listesi ya da {"meals": [...], "deleted": [id, ...],
+# "cursor": "..."}. Silinen öğünler "deleted": true / "deleted_at" alanıyla
+# da bildirilebilir. Yüksek su işareti "cursor" (ya da X-Sync-Cursor başlığı)
+# yoksa öğünlerin en büyük updated_at değeridir.
+#
+# Her küme ayrıca günlük özetleri (rollups.DailyRollups) tutar; birleştirilen
+# her değişiklik özetten eski hâli çıkarıp yenisini ekler. Diyetisyen özeti
+# bu nedenle öğünleri yeniden taramaz. Aynı değişiklikler kümenin arama
+# indeksine (search.SearchIndex) de işlenir.
+#
+# Daha önce eşitlenmiş bir küme sorgulandığında eşitleme zamanı geldiyse
+# eşitleme arka planda (cache.revalidator) yapılır ve sorgu son bilinen
+# kümeden hemen cevaplanır; backend yavaşken betik beklemez. Ağ isteği
+# kümenin okuma kilidi dışında yapılır, yalnızca birleştirme kilitlenir.
+# İlk eşitleme ve kullanıcının kendi kaydından sonraki eşitleme beklenir;
+# bunlar başarısız olursa da kümede veri varsa son bilinen küme döner.
+import os
+import threading
+import time
+
+from api_client import error_message
+from cache import STALE_WHILE_REVALIDATE, json_size, revalidator
+from meal_frame import query_frame, to_frame
+from rollups import DailyRollups
+from search import SearchIndex
+
+MEAL_SYNC = os.environ.get("MEAL_SYNC", "false").lower() == "true"
+MEAL_SYNC_INTERVAL = float(os.environ.get("MEAL_SYNC_INTERVAL", "5"))
+
+
+class MealSyncError(Exception):
+    """Senkronizasyon isteği başarısız oldu"""
+
+
+class MealSet:
+    """Bir çağıranın bir kullanıcı filtresi için yerel öğün kümesi"""
+
+    def __init__(self, caller, user_id):
+        self.caller = caller
+        self.user_id = user_id
+        self.meals = {}  # id -> öğün
+        self.high_water = None
+        self.etag = None
+        self.last_sync = 0.0  # son başarılı eşitleme isteğinin gönderildiği an (monotonic)
+        self.synced_at = None  # son başarılı eşitlemenin duvar saati (time.time())
+        self.dirty = False  # kullanıcının kendi kaydı: sonraki eşitleme beklenir
+        self.error = None  # son eşitleme hatası
+        self.full_size = 0  # kümenin tamamı indirilseydi gelecek bayt
+        self.lock = threading.Lock()  # öğünler, özetler ve indeks
+        self.sync_lock = threading.Lock()  # aynı anda tek eşitleme isteği
+        self.rollups = DailyRollups()
+        self.search_index = SearchIndex()
+        self._snapshot = None  # (öğün listesi, çerçeve)
+
+    def merge(self, upserts, deleted_ids):
+        """Değişiklikleri uygula (günlük özetler ve arama indeksi dahil) ve değişen öğün sayısını döndür"""
+        changed = 0
+        for meal in upserts:
+            previous = self.meals.get(str(meal["id"]))
+            if previous is not None:
+                self.rollups.add(previous, -1)
+            self.meals[str(meal["id"])] = meal
+            self.rollups.add(meal)
+            self.search_index.add(meal)
+            changed += 1
+        for meal_id in deleted_ids:
+            previous = self.meals.pop(str(meal_id), None)
+            if previous is not None:
+                self.rollups.add(previous, -1)
+                self.search_index.remove(meal_id)
+                changed += 1
+        if changed:
+            self._snapshot = None
+        return changed
+
+    def snapshot(self):
+        """(öğün listesi, sütunlu çerçeve); küme değişmedikçe yeniden kurulmaz"""
+        if self._snapshot is None:
+            meals = list(self.meals.values())
+            self._snapshot = (meals, to_frame(meals))
+        return self._snapshot
+
+
+class MealSyncStore:
+    """Süreç genelindeki yerel öğün kümeleri ve senkronizasyon sayaçları"""
+
+    def __init__(self, interval=MEAL_SYNC_INTERVAL, stale_while_revalidate=STALE_WHILE_REVALIDATE):
+        self.interval = interval
+        self.stale_while_revalidate = stale_while_revalidate
+        self._sets = {}  # (çağıran, user_id) -> MealSet
+        self._lock = threading.Lock()
+        self.syncs = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+        self.last_bytes_saved = 0
+
+    def meal_set(self, caller, user_id):
+        with self._lock:
+            meal_set = self._sets.get((caller, user_id))
+            if meal_set is None:
+                meal_set = self._sets[(caller, user_id)] = MealSet(caller, user_id)
+            return meal_set
+
+    def sync(self, client, token, caller, user_id="all", force=False):
+        """Kümeyi gerekiyorsa backend'le eşitle ve döndür
+
+        Küme daha önce eşitlendiyse eşitleme arka planda yapılır ve son
+        bilinen küme hemen döner. Beklenen eşitleme başarısız olursa hata
+        yalnızca kümede hiç veri yoksa yükselir. stale_while_revalidate
+        kapalıysa her eşitleme beklenir ve hatası yükselir.
+        """
+        meal_set = self.meal_set(caller, user_id)
+        force = force or meal_set.dirty
+        if not force and time.monotonic() - meal_set.last_sync < self.interval:
+            return meal_set
+        if not force and meal_set.synced_at is not None and self.stale_while_revalidate:
+            revalidator.submit(("meal_sync", caller, user_id), lambda: self._sync(client, token, meal_set))
+            return meal_set
+        try:
+            self._sync(client, token, meal_set)
+        except Exception:
+            if meal_set.synced_at is None or not self.stale_while_revalidate:
+                raise
+        return meal_set
+
+    def _sync(self, client, token, meal_set):
+        requested = time.monotonic()
+        with meal_set.sync_lock:
+            # Beklerken bu istekten sonra başlamış bir eşitleme bittiyse yeniden sorulmaz
+            if meal_set.last_sync >= requested:
+                return
+
+            params = {"userId": meal_set.user_id}
+            if meal_set.high_water:
+                params["updatedAfter"] = meal_set.high_water
+            headers = {"If-None-Match": meal_set.etag} if meal_set.etag else {}
+            # İstek gönderildikten sonra yapılan kayıtlar bu eşitlemede görünmeyebilir
+            dirty, meal_set.dirty = meal_set.dirty, False
+            started = time.monotonic()
+            try:
+                response = client.get_meals(token, params, headers=headers)
+                if response.status_code not in (200, 304):
+                    raise MealSyncError(error_message(response))
+            except Exception as e:
+                meal_set.error = str(e)
+                meal_set.dirty = meal_set.dirty or dirty
+                raise
+
+            if response.status_code == 304:
+                received = 0
+            else:
+                received = len(response.content)
+                upserts, deleted_ids, cursor = _parse_changes(response.json())
+                with meal_set.lock:
+                    if meal_set.merge(upserts, deleted_ids):
+                        meal_set.full_size = json_size(list(meal_set.meals.values()))
+                meal_set.etag = response.headers.get("ETag")
+                meal_set.high_water = (
+                    response.headers.get("X-Sync-Cursor") or cursor or meal_set.high_water
+                )
+            meal_set.last_sync = started
+            meal_set.synced_at = time.time()
+            meal_set.error = None
+
+            # Tam indirme yerine kazanılan bayt: kümenin tamamının boyutu - alınan
+            self._record(received, max(meal_set.full_size - received, 0), response.status_code == 304)
+
+    def query(self, client, token, caller, start_date, end_date, user_id="all", limit=None, cursor=None):
+        """get_meals() ile aynı sonucu yerel kümeden döndür"""
+        meal_set = self.sync(client, token, caller, user_id)
+        with meal_set.lock:
+            meals, frame = meal_set.snapshot()
+        frame = query_frame(frame, start_date, end_date, user_id, limit, cursor)
+        return [meals[i] for i in frame.index]
+
+    def summary(self, client, token, caller, start_date, end_date, user_id="all"):
+        """Aralığın özetini kümenin günlük özetlerinden döndür (öğünler taranmaz)"""
+        meal_set = self.sync(client, token, caller, user_id)
+        with meal_set.lock:
+            return meal_set.rollups.summary(start_date, end_date, user_id)
+
+    def search(self, client, token, caller, query, user_id="all", limit=None, cursor=None):
+        """Tam metin araması; sonuçlar kümenin arama indeksinden, en yeniden eskiye"""
+        meal_set = self.sync(client, token, caller, user_id)
+        with meal_set.lock:
+            return [meal_set.meals[meal_id] for meal_id in
+                    meal_set.search_index.search(query, user_id, limit, cursor)]
+
+    def mark_stale(self, user_code):
+        """Bu kullanıcının öğününü içeren kümeler (tüm çağıranların) bir sonraki sorguda hemen (beklenerek) eşitlensin"""
+        with self._lock:
+            for (_, user_id), meal_set in self._sets.items():
+                if user_id in ("all", user_code):
+                    meal_set.dirty = True
+
+    def stale_since(self, caller, user_id, max_age):
+        """Küme max_age saniyeden eskiyse son başarılı eşitlemenin zamanı (time.time()), değilse None"""
+        synced_at = self.meal_set(caller, user_id).synced_at
+        if synced_at is None or time.time() - synced_at <= max_age:
+            return None
+        return synced_at
+
+    def stats(self):
+        with self._lock:
+            return {
+                "syncs": self.syncs,
+                "not_modified": self.not_modified,
+                "bytes_received": self.bytes_received,
+                "bytes_saved": self.bytes_saved,
+                "last_bytes_saved": self.last_bytes_saved,
+                "meals": sum(len(s.meals) for s in self._sets.values()),
+            }
+
+    def _record(self, received, saved, not_modified):
+        with self._lock:
+            self.syncs += 1
+            self.not_modified += int(not_modified)
+            self.bytes_received += received
+            self.bytes_saved += saved
+            self.last_bytes_saved = saved
+
+
+def _parse_changes(payload):
+    if isinstance(payload, dict):
+        meals = payload.get("meals", [])
+        deleted_ids = list(payload.get("deleted", []))
+        cursor = payload.get("cursor")
+    else:
+        meals, deleted_ids, cursor = payload, [], None
+    # Silinenler dahil en son değişiklik yüksek su işaretidir
+    cursor = cursor or _max_updated_at(meals)
+    upserts = []
+    for meal in meals:
+        if meal.get("deleted") or meal.get("deleted_at"):
+            deleted_ids.append(meal["id"])
+        else:
+            upserts.append(meal)
+    return upserts, deleted_ids, cursor
+
+
+def _max_updated_at(meals):
+    stamps = [meal.get("updated_at") or meal.get("updatedAt") for meal in meals]
+    stamps = [stamp for stamp in stamps if stamp]
+    return max(stamps) if stamps else None
+
+
+# Süreç genelindeki senkronizasyon deposu
+meal_sync = MealSyncStore()
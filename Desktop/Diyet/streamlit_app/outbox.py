@@ -0,0 +1,510 @@
+# Kalıcı yükleme kuyruğu (outbox)
+#
+# Gerçek modda kaydedilen öğünler önce yerel diske yazılır: fotoğraf bir
+# biriktirme dizinine (OUTBOX_DIR), öğün bilgisi aynı dizindeki küçük bir
+# SQLite dizinine. Form diske yazıldığı anda döner; backend'e gönderim arka
+# plandaki bir boşaltıcı (drainer) iş parçacığının işidir. Böylece kayıt
+# süresi disk yazma süresine iner ve backend kesintileri kullanıcıya
+# yansımaz: öğünler kuyrukta bekler, backend dönünce gönderilir.
+#
+# Boşaltıcı zamanı gelen kayıtları UPLOAD_WORKERS'lık partiler hâlinde
+# BackendClient.upload_meals ile eş zamanlı gönderir. Geçici hatalarda kayıt
+# üstel bekleme (OUTBOX_BACKOFF_BASE .. OUTBOX_BACKOFF_MAX) ile yeniden
+# planlanır; diğer hatalarda (ör. 401) "failed" olarak işaretlenir ve
+# kullanıcı tekrar deneyene kadar bekler. Her kayıt sabit bir
+# Idempotency-Key taşıdığından süreç çökmesi ya da zaman aşımı sonrası
+# tekrar gönderim öğünü çoğaltmaz.
+#
+# Kayıtlar: pending -> sending -> sent | pending (yeniden denenecek) | failed.
+# Gönderilen kaydın satırı ve (başka kayıt kullanmıyorsa) fotoğrafı silinir;
+# "Son Eklenen Öğünlerim" için son gönderilenler yalnızca bellekte tutulur.
+# Süreç "sending" durumunda çökerse kayıt OUTBOX_LEASE saniye sonra yeniden
+# bekleyen olur.
+#
+# Fotoğraflar içerik adreslidir: biriktirme dizininde SHA-256 özetiyle
+# (content_hash) saklanır, aynı fotoğrafı taşıyan kayıtlar tek dosyayı
+# paylaşır. image_index tablosu özet -> backend image_key eşlemesini tutar.
+# Boşaltıcı her kayıt için önce bu dizine, bulamazsa backend'e
+# (find_image, UPLOAD_HASH_LOOKUP) sorar; fotoğraf zaten saklıysa öğün
+# yalnızca bilgileri ve imageKey ile gönderilir. Aynı partide aynı fotoğrafı
+# taşıyan ikinci kayıt, ilkinin image_key'i öğrenilene kadar bekletilir.
+# Backend referansı reddederse (REFERENCE_REJECTED_STATUSES) eşleme silinir ve
+# kayıt fotoğrafıyla yeniden gönderilir; bu yüzden dosya kayıt gönderilene
+# kadar diskte kalır.
+#
+# Kimlik jetonu diske yazılmaz: uygulama her çalıştırmada kullanıcının geçerli
+# oturum jetonunu set_token ile bellekte kaydeder ve kayıtlar gönderim anında
+# bu jetonla gönderilir. Jetonu bilinmeyen kullanıcının kayıtları (ör. süreç
+# yeniden başladıktan sonra) kullanıcı uygulamayı yeniden açana kadar bekler.
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from api_client import UPLOAD_RETRY_STATUSES, UPLOAD_WORKERS, UploadPart
+from images import sha256_hex
+
+OUTBOX_DIR = os.environ.get("OUTBOX_DIR", "diyet_outbox")
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_BACKOFF_BASE = float(os.environ.get("OUTBOX_BACKOFF_BASE", "2"))
+OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", "300"))
+OUTBOX_LEASE = 120.0
+OUTBOX_RECENT_SENT = 20  # kullanıcı başına bellekte tutulan son gönderilen kayıt
+UPLOAD_DEDUP = os.environ.get("UPLOAD_DEDUP", "true").lower() == "true"
+UPLOAD_HASH_LOOKUP = os.environ.get("UPLOAD_HASH_LOOKUP", "true").lower() == "true"
+# Var olan fotoğrafa referansla gönderilen öğün bu durumlarla reddedilirse fotoğrafıyla gönderilir
+REFERENCE_REJECTED_STATUSES = frozenset([403, 404, 409, 410, 422])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    user_code TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    taken_at TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    mime TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    content_hash TEXT,
+    image_key TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_user ON outbox (user_code, created_at);
+CREATE TABLE IF NOT EXISTS image_index (
+    content_hash TEXT PRIMARY KEY,
+    image_key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = ("id, user_code, user_name, meal_type, note, taken_at, file_name, mime, size, status, "
+            "attempts, next_attempt_at, last_error, created_at, content_hash, image_key")
+
+
+def _row_to_entry(row):
+    return dict(zip([column.strip() for column in _COLUMNS.split(",")], row))
+
+
+def backoff_delay(attempts, base=OUTBOX_BACKOFF_BASE, cap=OUTBOX_BACKOFF_MAX):
+    """attempts. başarısızlıktan sonra beklenecek süre (üstel, yarım jitter'lı)"""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.random() * delay / 2
+
+
+class UploadOutbox:
+    """Disk üzerindeki yükleme kuyruğu ve arka plan boşaltıcısı"""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    def __init__(self, directory=OUTBOX_DIR, poll_interval=OUTBOX_POLL_INTERVAL, batch_size=UPLOAD_WORKERS,
+                 dedup=UPLOAD_DEDUP, hash_lookup=UPLOAD_HASH_LOOKUP):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.hash_lookup = hash_lookup
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._files_lock = threading.Lock()
+        self._thread = None
+        self._lookup_executor = None
+        self._tokens = {}  # kullanıcı kodu -> geçerli oturum jetonu (yalnızca bellekte)
+        self._recent_sent = {}  # kullanıcı kodu -> son gönderilen kayıtlar
+        self.sent = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+
+    def connection(self):
+        """İş parçacığına özel bağlantı (WAL kipinde)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "outbox.db"), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, token, user, meal_type, note, taken_at, file_name, data, mime="image/jpeg",
+                idempotency_key=None, content_hash=None):
+        """Öğünü kalıcı olarak kuyruğa yaz ve kaydı döndür; aynı anahtar ikinci kez eklenmez
+
+        token diske yazılmaz, kullanıcının gönderim jetonu olarak bellekte
+        kaydedilir (set_token). taken_at backend'e gönderilecek ISO metnidir. Fotoğraf, özetiyle
+        adlandırılan dosyada yoksa önce geçici dosyaya yazılıp fsync edilir,
+        sonra yerine taşınır; dizin satırı ancak ondan sonra eklenir.
+        """
+        self.set_token(user["code"], token)
+        entry_id = idempotency_key or uuid.uuid4().hex
+        content_hash = content_hash or sha256_hex(data)
+        path = self.image_path(content_hash)
+        conn = self.connection()
+        # Gönderilen son kaydın dosyayı silmesiyle yarışmasın
+        with self._files_lock:
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO outbox (id, user_code, user_name, meal_type, note, taken_at, "
+                    "file_name, mime, size, status, next_attempt_at, created_at, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry_id, user["code"], user["name"], meal_type, note or "", taken_at, file_name,
+                     mime, len(data), self.PENDING, time.time(), datetime.now(timezone.utc).isoformat(),
+                     content_hash),
+                )
+        self._wake.set()
+        return self.get(entry_id)
+
+    def set_token(self, user_code, token):
+        """Kullanıcının kayıtlarını gönderirken kullanılacak geçerli oturum jetonu"""
+        with self._lock:
+            changed = self._tokens.get(user_code) != token
+            self._tokens[user_code] = token
+        if changed:
+            # Jetonu beklenen kayıtlar hemen gönderilsin
+            self._wake.set()
+
+    def known_image(self, content_hash):
+        """Bu özete sahip fotoğrafın backend'deki image_key'i (yerel dizinde yoksa None)"""
+        row = self.connection().execute(
+            "SELECT image_key FROM image_index WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, entry_id):
+        row = self.connection().execute(f"SELECT {_COLUMNS} FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def recent(self, user_code, limit=3):
+        """Kullanıcının en son kuyruğa aldığı öğünler (bu süreçte gönderilmiş olanlar dahil)"""
+        rows = self.connection().execute(
+            f"SELECT {_COLUMNS} FROM outbox WHERE user_code = ? ORDER BY created_at DESC LIMIT ?",
+            (user_code, limit),
+        )
+        with self._lock:
+            sent = list(self._recent_sent.get(user_code, ()))
+        entries = [_row_to_entry(row) for row in rows] + sent
+        return sorted(entries, key=lambda entry: entry["created_at"], reverse=True)[:limit]
+
+    def retry(self, entry_id):
+        """Başarısız bir kaydı hemen yeniden denenecek şekilde kuyruğa döndür (kullanıcının geçerli jetonuyla)"""
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ? WHERE id = ? AND status = ?",
+                (self.PENDING, time.time(), entry_id, self.FAILED),
+            )
+        self._wake.set()
+
+    def image_path(self, name):
+        """Fotoğraf dosyası: içerik özetiyle (eski kayıtlarda kayıt kimliğiyle) adlandırılır"""
+        return os.path.join(self.directory, f"{name}.img")
+
+    def start(self, client, on_sent=None):
+        """Boşaltıcıyı (süreç başına bir kez) başlat; on_sent(kayıt) her gönderilen öğün için çağrılır"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._drain_forever, args=(client, on_sent), name="outbox-drainer", daemon=True
+            )
+            self._thread.start()
+
+    def drain_once(self, client, on_sent=None):
+        """Zamanı gelen kayıtlardan bir partiyi gönder; gönderilen kayıt sayısını döndür"""
+        entries = self._claim()
+        if not entries:
+            return 0
+        known = self._resolve_images(client, entries) if self.dedup else {}
+        by_token = {}
+        uploading = set()  # bu partide fotoğrafıyla gönderilen özetler
+        for entry, token in entries:
+            content_hash = entry["content_hash"]
+            data = {"mealType": entry["meal_type"], "note": entry["note"], "takenAt": entry["taken_at"]}
+            if self.dedup and content_hash and content_hash in uploading:
+                # İlk kayıt gönderilince image_key dizine girer; bu kayıt bir sonraki partide referansla gider
+                self._release(entry)
+                continue
+            entry["image_key"] = known.get(content_hash)
+            if entry["image_key"]:
+                data["imageKey"] = entry["image_key"]
+                part = UploadPart(data, {}, entry["id"])
+            else:
+                try:
+                    with open(self.image_path(content_hash or entry["id"]), "rb") as f:
+                        image = f.read()
+                except OSError as e:
+                    self._finish(entry, self.FAILED, f"Fotoğraf okunamadı: {e}")
+                    continue
+                if content_hash:
+                    data["imageHash"] = content_hash
+                    uploading.add(content_hash)
+                part = UploadPart(data, {"image": (entry["file_name"], image, entry["mime"])}, entry["id"])
+            by_token.setdefault(token, []).append((entry, part))
+
+        futures = []
+        for token, items in by_token.items():
+            sent = client.upload_meals(token, [part for _, part in items], retries=0)
+            futures.extend(zip([entry for entry, _ in items], sent))
+
+        sent_count = 0
+        for entry, future in futures:
+            part = future.result()
+            reference = bool(part.data.get("imageKey"))
+            if part.status == UploadPart.DONE:
+                if not reference:
+                    entry["image_key"] = _response_image_key(part.response)
+                    if entry["image_key"] and entry["content_hash"]:
+                        self._remember(entry["content_hash"], entry["image_key"], entry["size"])
+                self._finish(entry, self.SENT, image_key=entry["image_key"])
+                sent_count += 1
+                with self._lock:
+                    self.sent += 1
+                    if reference:
+                        self.deduplicated += 1
+                        self.bytes_saved += entry["size"]
+                    else:
+                        self.bytes_sent += entry["size"]
+                if on_sent is not None:
+                    on_sent(entry)
+            elif reference and part.response is not None and \
+                    part.response.status_code in REFERENCE_REJECTED_STATUSES:
+                # Backend'deki fotoğraf silinmiş ya da erişilemiyor: eşlemeyi unut, fotoğrafıyla gönder
+                self._forget(entry["content_hash"])
+                self._release(entry, count_attempt=True)
+            elif part.response is None or part.response.status_code in UPLOAD_RETRY_STATUSES:
+                self._reschedule(entry, part.error)
+            else:
+                self._finish(entry, self.FAILED, part.error)
+        return sent_count
+
+    def stats(self):
+        rows = self.connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = dict.fromkeys((self.PENDING, self.SENDING, self.SENT, self.FAILED), 0)
+        counts.update(rows)
+        with self._lock:
+            counts.update(sent_total=self.sent, retries=self.retries, bytes_sent=self.bytes_sent,
+                          deduplicated=self.deduplicated, bytes_saved=self.bytes_saved)
+        return counts
+
+    def _drain_forever(self, client, on_sent):
+        while True:
+            self._wake.clear()
+            try:
+                self._recover()
+                while self.drain_once(client, on_sent):
+                    pass
+            except Exception:
+                # Boşaltıcı asla ölmemeli; kayıtlar bir sonraki turda yeniden denenir
+                pass
+            self._wake.wait(self.poll_interval)
+
+    def _claim(self):
+        """Zamanı gelen ve jetonu bilinen en fazla batch_size kaydı "sending" olarak sahiplen
+
+        (kayıt, jeton) çiftleri döner.
+        """
+        with self._lock:
+            tokens = dict(self._tokens)
+        if not tokens:
+            return []
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                f"AND user_code IN ({', '.join('?' * len(tokens))}) ORDER BY next_attempt_at LIMIT ?",
+                (self.PENDING, now, *tokens, self.batch_size),
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                # Aynı dizini paylaşan başka bir süreç almadıysa sahiplen
+                updated = conn.execute(
+                    "UPDATE outbox SET status = ?, claimed_at = ? WHERE id = ? AND status = ?",
+                    (self.SENDING, now, row[0], self.PENDING),
+                ).rowcount
+                if updated:
+                    entry = _row_to_entry(row)
+                    claimed.append((entry, tokens[entry["user_code"]]))
+        return claimed
+
+    def _resolve_images(self, client, entries):
+        """Partide zaten saklı olan fotoğraflar: özet -> image_key
+
+        Önce yerel dizine bakılır; bulunamayanlar backend'e eş zamanlı sorulur.
+        Daha önce denenmiş kayıtlar için backend'e yeniden sorulmaz, böylece
+        reddedilen bir referans tekrar gelmez.
+        """
+        known, lookups = {}, {}
+        for entry, token in entries:
+            content_hash = entry["content_hash"]
+            if not content_hash or content_hash in known:
+                continue
+            image_key = self.known_image(content_hash)
+            if image_key:
+                known[content_hash] = image_key
+            elif self.hash_lookup and not entry["attempts"]:
+                lookups.setdefault(content_hash, token)
+        if not lookups:
+            return known
+        with self._lock:
+            if self._lookup_executor is None:
+                self._lookup_executor = ThreadPoolExecutor(
+                    max_workers=self.batch_size, thread_name_prefix="outbox-lookup"
+                )
+        futures = {h: self._lookup_executor.submit(client.find_image, token, h) for h, token in lookups.items()}
+        for content_hash, future in futures.items():
+            try:
+                image_key = future.result()
+            except Exception:
+                # Sorgu yalnızca bir iyileştirme; başarısızsa fotoğraf gönderilir
+                continue
+            if image_key:
+                self._remember(content_hash, image_key, None)
+                known[content_hash] = image_key
+        return known
+
+    def _remember(self, content_hash, image_key, size):
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO image_index (content_hash, image_key, size, created_at) VALUES (?, ?, ?, ?)",
+                (content_hash, image_key, size or 0, time.time()),
+            )
+
+    def _forget(self, content_hash):
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM image_index WHERE content_hash = ?", (content_hash,))
+
+    def _release(self, entry, count_attempt=False):
+        """Kaydı beklemeden yeniden gönderilecek şekilde kuyruğa döndür"""
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, attempts = attempts + ? WHERE id = ?",
+                (self.PENDING, time.time(), int(count_attempt), entry["id"]),
+            )
+        # Boşaltıcı bir sonraki turu beklemeden çalışsın
+        self._wake.set()
+
+    def _reschedule(self, entry, error):
+        attempts = entry["attempts"] + 1
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (self.PENDING, attempts, time.time() + backoff_delay(attempts), error, entry["id"]),
+            )
+        with self._lock:
+            self.retries += 1
+
+    def _finish(self, entry, status, error=None, image_key=None):
+        if status == self.SENT:
+            self._delete_sent(entry, image_key)
+            return
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (status, error, entry["id"]),
+            )
+
+    def _delete_sent(self, entry, image_key):
+        """Gönderilen kaydın satırını ve (başka kayıt kullanmıyorsa) fotoğrafını sil"""
+        with self._files_lock:
+            conn = self.connection()
+            with conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (entry["id"],))
+            self._remove_image(entry)
+        sent = dict(entry, status=self.SENT, attempts=entry["attempts"] + 1, last_error=None,
+                    image_key=image_key or entry["image_key"])
+        with self._lock:
+            self._recent_sent.setdefault(entry["user_code"], deque(maxlen=OUTBOX_RECENT_SENT)).append(sent)
+
+    def _remove_image(self, entry):
+        """Gönderilen kaydın fotoğrafını, aynı dosyayı bekleyen başka kayıt yoksa sil (_files_lock altında)"""
+        content_hash = entry["content_hash"]
+        if content_hash and self.connection().execute(
+            "SELECT 1 FROM outbox WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone():
+            return
+        try:
+            os.remove(self.image_path(content_hash or entry["id"]))
+        except OSError:
+            pass
+
+    def _migrate(self, conn):
+        """Eski kuyruk dizinlerini güncelle: özet sütunlarını ekle, saklanan jetonları sil"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+        for column in ("content_hash", "image_key"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} TEXT")
+        if "token" in columns:
+            # Silinen jetonlar dosyada ve WAL'da kalmasın
+            conn.execute("ALTER TABLE outbox DROP COLUMN token")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_hash ON outbox (content_hash)")
+
+    def _recover(self):
+        """Çöken süreçlerin yarım kalan gönderimlerini geri al, eski sürümlerden kalan gönderilmiş satırları sil"""
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = ? WHERE status = ? AND claimed_at < ?",
+                (self.PENDING, self.SENDING, now - OUTBOX_LEASE),
+            )
+            conn.execute("DELETE FROM outbox WHERE status = ?", (self.SENT,))
+
+
+def _response_image_key(response):
+    """Yükleme yanıtındaki image_key (backend döndürmüyorsa None)"""
+    try:
+        payload = response.json()
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    return payload.get("image_key") or payload.get("imageKey")
+
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+
+def get_outbox(directory=OUTBOX_DIR):
+    """Verilen dizin için süreç genelindeki tek kuyruğu döndür"""
+    with _outboxes_lock:
+        outbox = _outboxes.get(directory)
+        if outbox is None:
+            outbox = _outboxes[directory] = UploadOutbox(directory)
+        return outbox
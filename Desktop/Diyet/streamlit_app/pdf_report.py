@@ -0,0 +1,348 @@
+# Yerel PDF rapor motoru
+#
+# Rapor, diyetisyen görünümündeki düzenle (gün başlıkları, küçük resim, öğün
+# türü, saat, not, kullanıcı) doğrudan PDF olarak yazılır. Öğünler kaynaktan
+# parça parça okunur; her sayfa dolduğu anda dosyaya yazılır ve bellekten
+# atılır, böylece bellek kullanımı rapor uzunluğuyla değil tek sayfayla
+# sınırlıdır. Küçük resimler thumbnail_store önbelleğinden gelir ve JPEG
+# baytları çözülmeden (DCTDecode) gömülür. Bir parça yazılırken sıradaki
+# parçanın eksik küçük resimleri indirme havuzunda hazırlanır; bellekte en
+# fazla iki parça öğün bulunur.
+#
+# PDF kütüphanesi gerektirmemek için küçük bir PDF 1.4 yazıcısı kullanılır:
+# nesneler sırayla yazılır ve yalnızca bayt konumları tutulur; sayfa ağacı
+# ve çapraz başvuru tablosu en sonda yazılır. Metin standart Helvetica
+# fontuyla, Türkçe karakterler için cp1254 (Windows Türkçe) kodlamasıyla
+# yazılır.
+import os
+import tempfile
+import textwrap
+import zlib
+from concurrent.futures import wait
+from itertools import islice
+
+from reports import REPORT_MAX_BYTES, REPORT_SPOOL_MEMORY, ReportArtifact, ReportTooLarge, \
+    _too_large_message, report_file_name
+from rollups import format_minutes, local_day_minute
+from thumbnails import thumbnail_store
+
+# Aynı anda küçük resmi getirilen öğün sayısı (yaklaşık iki sayfa)
+REPORT_PDF_BATCH = int(os.environ.get("REPORT_PDF_BATCH", "24"))
+
+# A4, punto
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 36
+COLUMNS = 3
+COLUMN_GAP = 12
+CARD_WIDTH = (PAGE_WIDTH - 2 * MARGIN - (COLUMNS - 1) * COLUMN_GAP) / COLUMNS
+IMAGE_HEIGHT = CARD_WIDTH * 2 / 3  # küçük resimler 3:2
+HEADER_HEIGHT = 28
+ROW_GAP = 14
+FOOTER_HEIGHT = 24
+NOTE_LINES = 3
+NOTE_FONT_SIZE = 9
+
+# cp1254'ün WinAnsiEncoding'den (cp1252) farklı olan Türkçe harfleri
+_TURKISH_DIFFERENCES = b"[208 /Gbreve 221 /Idotaccent 222 /Scedilla 240 /gbreve 253 /dotlessi 254 /scedilla]"
+
+# Başlangıç (SOF) işaretçileri; C4 (DHT), C8 (JPG) ve CC (DAC) değildir
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_COLOR_SPACES = {1: b"/DeviceGray", 3: b"/DeviceRGB", 4: b"/DeviceCMYK"}
+
+
+def jpeg_info(data):
+    """JPEG başlığından (genişlik, yükseklik, renk bileşeni) oku; görüntüyü çözmez
+
+    JPEG değilse ya da başlık okunamazsa None döner.
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            if i + 10 > len(data):
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height, data[i + 9]
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def pdf_text(text):
+    """Metni cp1254 ile kodlanmış PDF dizgesine çevir (kodlanamayan karakterler "?")"""
+    data = str(text).encode("cp1254", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _number(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".").encode("ascii")
+
+
+class PdfWriter:
+    """Nesneleri dosyaya sırayla yazan, bellekte yalnızca konumları tutan PDF yazıcısı"""
+
+    def __init__(self, file, max_bytes=REPORT_MAX_BYTES):
+        self.file = file
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.offsets = []  # nesne numarası - 1 -> bayt konumu
+        self.page_ids = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.catalog_id = self.reserve()
+        self.pages_id = self.reserve()
+        encoding = self.add_object(b"<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences "
+                                   + _TURKISH_DIFFERENCES + b" >>")
+        self.fonts = {
+            name: self.add_object(b"<< /Type /Font /Subtype /Type1 /BaseFont /" + base
+                                  + b" /Encoding " + self.ref(encoding) + b" >>")
+            for name, base in ((b"F1", b"Helvetica"), (b"F2", b"Helvetica-Bold"))
+        }
+
+    @staticmethod
+    def ref(obj_id):
+        return b"%d 0 R" % obj_id
+
+    def reserve(self):
+        """Sonra yazılacak bir nesne için numara ayır"""
+        self.offsets.append(None)
+        return len(self.offsets)
+
+    def add_object(self, body, stream=None, obj_id=None):
+        """Nesneyi (varsa akışıyla) hemen dosyaya yaz ve numarasını döndür"""
+        if obj_id is None:
+            obj_id = self.reserve()
+        self.offsets[obj_id - 1] = self.size
+        if stream is None:
+            self._write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, body))
+        else:
+            self._write(b"%d 0 obj\n%s\nstream\n" % (obj_id, body))
+            self._write(stream)
+            self._write(b"\nendstream\nendobj\n")
+        return obj_id
+
+    def add_image(self, jpeg):
+        """JPEG baytlarını olduğu gibi görüntü nesnesi olarak yaz; (numara, genişlik, yükseklik) ya da None"""
+        info = jpeg_info(jpeg)
+        if info is None or info[2] not in _COLOR_SPACES:
+            return None
+        width, height, components = info
+        body = (b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+                b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>"
+                % (width, height, _COLOR_SPACES[components], len(jpeg)))
+        return self.add_object(body, jpeg), width, height
+
+    def add_page(self, content, images):
+        """Sayfa içeriğini sıkıştırıp yaz; images: ad -> görüntü nesnesi numarası"""
+        stream = zlib.compress(content)
+        content_id = self.add_object(b"<< /Filter /FlateDecode /Length %d >>" % len(stream), stream)
+        fonts = b" ".join(b"/%s %s" % (name, self.ref(obj_id)) for name, obj_id in self.fonts.items())
+        xobjects = b" ".join(b"/%s %s" % (name, self.ref(obj_id)) for name, obj_id in images.items())
+        page_id = self.add_object(
+            b"<< /Type /Page /Parent %s /MediaBox [0 0 %d %d] /Resources << /Font << %s >> /XObject << %s >> >> "
+            b"/Contents %s >>" % (self.ref(self.pages_id), PAGE_WIDTH, PAGE_HEIGHT, fonts, xobjects,
+                                  self.ref(content_id))
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        """Sayfa ağacını, kataloğu ve çapraz başvuru tablosunu yaz; toplam boyutu döndür"""
+        kids = b" ".join(self.ref(page_id) for page_id in self.page_ids)
+        self.add_object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)),
+                        obj_id=self.pages_id)
+        self.add_object(b"<< /Type /Catalog /Pages %s >>" % self.ref(self.pages_id), obj_id=self.catalog_id)
+        xref = self.size
+        lines = [b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.offsets) + 1)]
+        lines.extend(b"%010d 00000 n \n" % offset for offset in self.offsets)
+        self._write(b"".join(lines))
+        self._write(b"trailer\n<< /Size %d /Root %s >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (len(self.offsets) + 1, self.ref(self.catalog_id), xref))
+        return self.size
+
+    def _write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise ReportTooLarge(_too_large_message(self.max_bytes))
+        self.file.write(data)
+
+
+class ReportLayout:
+    """Öğünleri gün gün kart satırlarına dizen ve sayfa dolunca yazan düzen
+
+    Bellekte yalnızca geçerli sayfanın çizim komutları ve bekleyen (en fazla
+    COLUMNS öğünlük) satır tutulur.
+    """
+
+    def __init__(self, writer, title, subtitle):
+        self.writer = writer
+        self.page_number = 0
+        self.day = None
+        self.day_drawn = False
+        self.row = []
+        self.meals = 0
+        self._new_page()
+        self._text(MARGIN, self.y - 16, title, size=16, bold=True)
+        self._text(MARGIN, self.y - 32, subtitle, size=10, color=(0.42, 0.45, 0.5))
+        self.y -= 48
+
+    def add_meal(self, meal, thumbnail):
+        """Öğünü (küçük resmiyle; yoksa None) sıradaki karta yerleştir"""
+        day, minute = local_day_minute(meal["taken_at"])
+        if day != self.day:
+            self._flush_row()
+            self.day = day
+            self.day_drawn = False
+        self.row.append((meal, minute, thumbnail))
+        self.meals += 1
+        if len(self.row) == COLUMNS:
+            self._flush_row()
+
+    def finish(self):
+        """Bekleyen satırı ve son sayfayı yaz"""
+        self._flush_row()
+        if not self.meals:
+            self._text(MARGIN, self.y - 12, "Seçilen kriterlerde öğün bulunamadı", size=11)
+        self._write_page()
+
+    def _flush_row(self):
+        if not self.row:
+            return
+        cards = [(meal, minute, thumbnail, self._note_lines(meal)) for meal, minute, thumbnail in self.row]
+        self.row = []
+        height = IMAGE_HEIGHT + 32 + max(len(lines) for *_, lines in cards) * 11
+        needed = height + (0 if self.day_drawn else HEADER_HEIGHT)
+        if self.y - needed < MARGIN + FOOTER_HEIGHT:
+            self._write_page()
+            self._new_page()
+            if self.day_drawn:
+                self._day_header(continued=True)
+        if not self.day_drawn:
+            self._day_header()
+            self.day_drawn = True
+        for column, card in enumerate(cards):
+            self._card(MARGIN + column * (CARD_WIDTH + COLUMN_GAP), self.y, *card)
+        self.y -= height + ROW_GAP
+
+    def _day_header(self, continued=False):
+        top = self.y
+        self._rect(MARGIN, top - 20, PAGE_WIDTH - 2 * MARGIN, 20, (0.94, 0.99, 0.96))
+        label = f"{self.day[8:10]}.{self.day[5:7]}.{self.day[:4]}" + (" (devam)" if continued else "")
+        self._text(MARGIN + 8, top - 14, label, size=11, bold=True, color=(0.02, 0.37, 0.27))
+        self.y -= HEADER_HEIGHT
+
+    def _card(self, x, top, meal, minute, thumbnail, note_lines):
+        image = self._image(meal.get("image_key"), thumbnail)
+        self._rect(x, top - IMAGE_HEIGHT, CARD_WIDTH, IMAGE_HEIGHT, (0.9, 0.91, 0.92))
+        if image is None:
+            self._text(x + 8, top - IMAGE_HEIGHT / 2 - 3, "Fotoğraf yok", size=9, color=(0.42, 0.45, 0.5))
+        else:
+            obj_id, width, height = image
+            # Kutuya oranı koruyarak sığdır ve ortala
+            scale = min(CARD_WIDTH / width, IMAGE_HEIGHT / height)
+            w, h = width * scale, height * scale
+            left, bottom = x + (CARD_WIDTH - w) / 2, top - IMAGE_HEIGHT + (IMAGE_HEIGHT - h) / 2
+            self.ops.append(b"q %s 0 0 %s %s %s cm /%s Do Q\n"
+                            % (_number(w), _number(h), _number(left), _number(bottom), b"Im%d" % obj_id))
+        y = top - IMAGE_HEIGHT - 14
+        self._text(x, y, f"{meal.get('meal_type') or ''} · {format_minutes(minute)}", size=10, bold=True)
+        y -= 12
+        self._text(x, y, (meal.get("User") or {}).get("name") or "", size=9, color=(0.42, 0.45, 0.5))
+        for line in note_lines:
+            y -= 11
+            self._text(x, y, line, size=NOTE_FONT_SIZE)
+
+    @staticmethod
+    def _note_lines(meal):
+        note = " ".join((meal.get("note") or "").split())
+        # Helvetica'da ortalama karakter genişliği yaklaşık 0.5 em
+        width = int(CARD_WIDTH / (NOTE_FONT_SIZE * 0.5))
+        return textwrap.wrap(note, width=width, max_lines=NOTE_LINES, placeholder=" …") if note else []
+
+    def _image(self, image_key, thumbnail):
+        """Küçük resmi bu sayfanın kaynaklarına ekle; aynı fotoğraf sayfada bir kez yazılır"""
+        if thumbnail is None:
+            return None
+        if image_key not in self.images:
+            self.images[image_key] = self.writer.add_image(thumbnail)
+        return self.images[image_key]
+
+    def _new_page(self):
+        self.page_number += 1
+        self.ops = []
+        self.images = {}  # image_key -> (görüntü nesnesi, genişlik, yükseklik) ya da None
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _write_page(self):
+        self._text(MARGIN, MARGIN, f"Diyet Foto Günlüğü · Sayfa {self.page_number}", size=8,
+                   color=(0.42, 0.45, 0.5))
+        resources = {b"Im%d" % image[0]: image[0] for image in self.images.values() if image is not None}
+        self.writer.add_page(b"".join(self.ops), resources)
+        self.ops = []
+        self.images = {}
+
+    def _text(self, x, y, text, size, bold=False, color=(0.07, 0.09, 0.15)):
+        self.ops.append(b"BT /%s %d Tf %s %s %s rg %s %s Td %s Tj ET\n" % (
+            b"F2" if bold else b"F1", size, *map(_number, color), _number(x), _number(y), pdf_text(text)))
+
+    def _rect(self, x, y, width, height, color):
+        self.ops.append(b"%s %s %s rg %s %s %s %s re f\n"
+                        % (*map(_number, color), _number(x), _number(y), _number(width), _number(height)))
+
+
+def render_report(meals, fetch_image, start_date, end_date, user_id="all", max_bytes=REPORT_MAX_BYTES,
+                  batch_size=REPORT_PDF_BATCH, store=thumbnail_store):
+    """Öğünlerden (en yeniden eskiye sıralı, herhangi bir yinelenebilir) PDF raporu üret
+
+    fetch_image(meal) önbellekte olmayan bir öğünün fotoğraf baytlarını
+    döndürür; arka plan iş parçacıklarında çağrılır. Rapor bellekte küçük
+    kalan, büyüdüğünde diske taşan geçici bir dosyaya yazılır ve
+    ReportArtifact olarak döner.
+    """
+    start_date, end_date = str(start_date), str(end_date)
+    users = "Tüm kullanıcılar" if user_id in (None, "all") else f"Kullanıcı: {user_id}"
+    subtitle = f"{_format_day(start_date)} - {_format_day(end_date)} · {users}"
+    spool = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MEMORY, suffix=".pdf")
+    warming = next_warming = []
+    try:
+        writer = PdfWriter(spool, max_bytes)
+        layout = ReportLayout(writer, "Diyet Foto Günlüğü - Öğün Raporu", subtitle)
+        meals = iter(meals)
+        batch, warming = _read_batch(meals, batch_size, fetch_image, store)
+        while batch:
+            # Sıradaki parçanın küçük resimleri bu parça yazılırken hazırlanır
+            next_batch, next_warming = _read_batch(meals, batch_size, fetch_image, store)
+            wait(warming)
+            by_key = {meal["image_key"]: meal for meal in batch if meal.get("image_key")}
+            thumbnails = store.get_thumbnails(list(by_key), lambda image_key: fetch_image(by_key[image_key]))
+            for meal in batch:
+                layout.add_meal(meal, thumbnails.get(meal.get("image_key")))
+            batch, warming = next_batch, next_warming
+        layout.finish()
+        size = writer.close()
+    except BaseException:
+        for future in warming + next_warming:
+            future.cancel()
+        spool.close()
+        raise
+    spool.seek(0)
+    return ReportArtifact((start_date, end_date, user_id), spool, size, report_file_name(start_date, end_date))
+
+
+def _read_batch(meals, batch_size, fetch_image, store):
+    """Sıradaki en fazla batch_size öğünü oku ve küçük resimlerini havuzda hazırlamaya başla"""
+    batch = list(islice(meals, batch_size))
+    by_key = {meal["image_key"]: meal for meal in batch if meal.get("image_key")}
+    return batch, store.warm(by_key, lambda image_key: fetch_image(by_key[image_key]))
+
+
+def _format_day(day):
+    return f"{day[8:10]}.{day[5:7]}.{day[:4]}"
@@ -0,0 +1,264 @@
+# Sıcak yol ölçümü (performans izleri)
+#
+# PERF_TRACING=true iken giriş, öğün getirme, rapor, öğün çizimi ve yükleme
+# yolları span'lerle ölçülür: duvar saati süresi, aktarılan bayt ve öğe
+# sayısı. Bir yeniden çalıştırmanın (rerun) span'leri tek bir kayıtta
+# toplanır (yalnızca bir fragment yeniden çalıştıysa kayıt onun adını
+# taşır); oturumun son PERF_HISTORY çalıştırması Ayarlar sekmesinde
+# gösterilir. Süreç geneli toplamlar Prometheus metin biçiminde dışa aktarılır.
+#
+# Dışa aktarma (isteğe bağlı):
+#   PERF_LOG_PATH: her çalıştırma için bir JSON satırı ("-" = standart çıktı)
+#   PERF_PROM_PATH: her çalıştırmadan sonra yeniden yazılan Prometheus
+#                   metin dosyası (node_exporter textfile toplayıcısı için)
+#
+# Kapalıyken span() paylaşılan, hiçbir şey yapmayan bir nesne döndürür ve
+# traced() ile add_to_span() yalnızca bir bayrak kontrolü ekler.
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from api_client import LatencyHistogram
+
+PERF_TRACING = os.environ.get("PERF_TRACING", "false").lower() == "true"
+PERF_HISTORY = int(os.environ.get("PERF_HISTORY", "20"))
+PERF_LOG_PATH = os.environ.get("PERF_LOG_PATH", "")
+PERF_PROM_PATH = os.environ.get("PERF_PROM_PATH", "")
+
+_local = threading.local()
+
+
+class Span:
+    """Tek bir kod yolu ölçümü"""
+
+    __slots__ = ("name", "ms", "bytes", "items", "_started")
+
+    def __init__(self, name):
+        self.name = name
+        self.ms = 0.0
+        self.bytes = 0
+        self.items = 0
+
+    def add(self, bytes=0, items=0):
+        self.bytes += bytes
+        self.items += items
+
+    def __enter__(self):
+        _stack().append(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self._started) * 1000
+        _stack().pop()
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace.spans.append(self)
+        metrics.observe(self)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def add(self, bytes=0, items=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name):
+    """Ölçüm kapalıysa hiçbir şey yapmayan, açıksa süre/bayt/öğe kaydeden bağlam"""
+    return Span(name) if PERF_TRACING else _NOOP
+
+
+def traced(name, items=None):
+    """Fonksiyonu span ile sar; items verilirse dönüş değerinden öğe sayısı hesaplanır"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PERF_TRACING:
+                return fn(*args, **kwargs)
+            with Span(name) as s:
+                result = fn(*args, **kwargs)
+                if items is not None and result is not None:
+                    s.add(items=items(result))
+                return result
+        return wrapper
+    return decorate
+
+
+def add_to_span(bytes=0, items=0):
+    """Bu iş parçacığındaki en içteki açık span'e bayt/öğe ekle"""
+    if PERF_TRACING:
+        stack = _stack()
+        if stack:
+            stack[-1].add(bytes, items)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class RerunTrace:
+    """Bir yeniden çalıştırmada kaydedilen span'ler"""
+
+    def __init__(self, scope="app"):
+        self.at = datetime.now(timezone.utc)
+        self.scope = scope
+        self.spans = []
+        self.total_ms = 0.0
+
+    def summary(self):
+        spans = {}
+        for s in self.spans:
+            entry = spans.setdefault(s.name, {"count": 0, "ms": 0.0, "bytes": 0, "items": 0})
+            entry["count"] += 1
+            entry["ms"] = round(entry["ms"] + s.ms, 2)
+            entry["bytes"] += s.bytes
+            entry["items"] += s.items
+        return {"at": self.at.isoformat(), "scope": self.scope, "total_ms": round(self.total_ms, 2), "spans": spans}
+
+
+@contextmanager
+def rerun_trace(state, scope="app"):
+    """Bir yeniden çalıştırmayı ölç; özeti state["perf_history"] içine ekle
+
+    scope, yalnızca bir fragment yeniden çalıştığında onun adıdır. Tam
+    çalıştırma içinde açılan iç içe izler ayrı kayıt oluşturmaz.
+    """
+    if not PERF_TRACING or getattr(_local, "trace", None) is not None:
+        yield getattr(_local, "trace", None)
+        return
+    trace = _local.trace = RerunTrace(scope)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.total_ms = (time.perf_counter() - started) * 1000
+        _local.trace = None
+        record = trace.summary()
+        history = state.get("perf_history")
+        if history is None:
+            history = state["perf_history"] = deque(maxlen=PERF_HISTORY)
+        history.append(record)
+        metrics.observe_rerun(trace.total_ms)
+        _export(record)
+
+
+class PerfMetrics:
+    """Süreç genelindeki span ve çalıştırma toplamları"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}  # ad -> LatencyHistogram
+        self.bytes = {}
+        self.items = {}
+        self.reruns = LatencyHistogram()
+        self._collectors = {}
+
+    def observe(self, s):
+        with self._lock:
+            hist = self.spans.get(s.name)
+            if hist is None:
+                hist = self.spans[s.name] = LatencyHistogram()
+            hist.observe(s.ms)
+            self.bytes[s.name] = self.bytes.get(s.name, 0) + s.bytes
+            self.items[s.name] = self.items.get(s.name, 0) + s.items
+
+    def observe_rerun(self, total_ms):
+        with self._lock:
+            self.reruns.observe(total_ms)
+
+    def register(self, name, label, histograms, help_text):
+        """Dışa aktarıma {etiket: (kovalar, sayaçlar, toplam_ms)} döndüren bir histogram kaynağı ekle
+
+        Aynı adla yeniden kaydetmek öncekinin yerine geçer (betik her çalıştırmada yeniden kaydeder).
+        """
+        with self._lock:
+            self._collectors[name] = (label, histograms, help_text)
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: dict(hist.summary(), bytes=self.bytes[name], items=self.items[name])
+                for name, hist in sorted(self.spans.items())
+            }
+
+    def prometheus_text(self):
+        """Prometheus metin biçiminde (0.0.4) tüm metrikler"""
+        with self._lock:
+            spans = {name: (h.buckets, list(h.counts), h.total_ms) for name, h in self.spans.items()}
+            reruns = {"": (self.reruns.buckets, list(self.reruns.counts), self.reruns.total_ms)}
+            span_bytes, span_items = dict(self.bytes), dict(self.items)
+            collectors = sorted(self._collectors.items())
+        lines = []
+        _histogram(lines, "diyet_rerun_duration_seconds", "Betik yeniden çalıştırma süresi", None, reruns)
+        _histogram(lines, "diyet_span_duration_seconds", "Kod yolu süresi", "span", spans)
+        _counter(lines, "diyet_span_bytes_total", "Kod yolunda aktarılan bayt", "span", span_bytes)
+        _counter(lines, "diyet_span_items_total", "Kod yolunda işlenen öğe", "span", span_items)
+        for name, (label, histograms, help_text) in collectors:
+            _histogram(lines, name, help_text, label, histograms())
+        return "\n".join(lines) + "\n"
+
+
+def _histogram(lines, name, help_text, label, series):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for value, (buckets, counts, total_ms) in sorted(series.items()):
+        labels = f'{label}="{value}",' if label else ""
+        cumulative = 0
+        for bound, count in zip(list(buckets) + ["+Inf"], counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound / 1000:g}"
+            lines.append(f'{name}_bucket{{{labels}le="{le}"}} {cumulative}')
+        labels = f'{{{labels.rstrip(",")}}}' if label else ""
+        lines.append(f"{name}_sum{labels} {total_ms / 1000:.6f}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+
+
+def _counter(lines, name, help_text, label, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for value, total in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{value}"}} {total}')
+
+
+_export_lock = threading.Lock()
+
+
+def _export(record):
+    if not (PERF_LOG_PATH or PERF_PROM_PATH):
+        return
+    with _export_lock:
+        if PERF_LOG_PATH == "-":
+            print(json.dumps(record), file=sys.stdout, flush=True)
+        elif PERF_LOG_PATH:
+            with open(PERF_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        if PERF_PROM_PATH:
+            # Toplayıcı yarım dosya okumasın diye geçici dosyaya yazıp yer değiştir
+            tmp_path = f"{PERF_PROM_PATH}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(metrics.prometheus_text())
+            os.replace(tmp_path, PERF_PROM_PATH)
+
+
+# Süreç genelindeki metrikler
+metrics = PerfMetrics()
@@ -0,0 +1,224 @@
+# Komşu tarih aralıklarını arka planda önceden yükleme
+#
+# Diyetisyen bir aralığı görüntülediğinde çoğunlukla bir önceki haftaya geçer
+# ve orada bir güne iner. Gün detayının öğün sayfası ve küçük resimleri
+# önbellekte değilse ağdan gelir. Aralık gösterilince önce bir önceki aynı
+# uzunluktaki pencere, sonra (gelecekte değilse) bir sonraki pencere arka
+# planda öğün ve küçük resim önbelleklerine yüklenir. Ne yükleneceğini (iş
+# birimleri) uygulama belirler; bu modül yalnızca çalıştırır ve sınırlar:
+#
+# - Sıra: bir birimin döndürdüğü birimler (ör. bir pencerenin günleri, bir
+#   günün küçük resimleri) kuyruğun önüne eklenir; böylece önceki pencere
+#   sonrakine geçilmeden tamamlanır.
+# - Eş zamanlılık: süreç genelinde en fazla PREFETCH_WORKERS birim (gün
+#   sayfası ya da tek bir küçük resim) aynı anda çalışır; ön plandaki küçük
+#   resim havuzu bu işlere ayrılmaz.
+# - Bayt bütçesi: süreçteki tüm işler birlikte her PREFETCH_BUDGET_WINDOW
+#   saniyede en fazla PREFETCH_MAX_BYTES indirir; bütçe dolunca yeni birim ve
+#   indirme başlatılmaz.
+# - İptal: oturum başka bir aralığa ya da bölüme geçince kalan birimler
+#   çalıştırılmaz, süren birim sonraki indirmede durur.
+# - İsabet oranı: önceden yüklenen öğelerden (gün sayfası, küçük resim)
+#   sonradan gerçekten gösterilenlerin oranı.
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+PREFETCH = os.environ.get("PREFETCH", "true").lower() == "true"
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "4"))
+PREFETCH_MAX_BYTES = int(os.environ.get("PREFETCH_MAX_BYTES", str(8 * 1024 * 1024)))
+PREFETCH_BUDGET_WINDOW = float(os.environ.get("PREFETCH_BUDGET_WINDOW", "60"))
+PREFETCH_TRACK = 10000  # isabet için izlenen en fazla önceden yüklenmiş öğe
+
+
+def adjacent_windows(start_date, end_date, today=None):
+    """Görüntülenen aralık, bir önceki ve (gelecekte değilse) bir sonraki aynı uzunluktaki pencere
+
+    Tarihler ISO metnidir; sonraki pencere bugünle sınırlanır.
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    today = today or date.today()
+    length = timedelta(days=(end - start).days + 1)
+    windows = [(start, end), (start - length, start - timedelta(days=1))]
+    if end < today:
+        windows.append((end + timedelta(days=1), min(end + length, today)))
+    return [(first.isoformat(), last.isoformat()) for first, last in windows]
+
+
+class PrefetchJob:
+    """Bir oturumun görüntülediği aralık için ön yükleme işi"""
+
+    def __init__(self, key, on_bytes=None):
+        self.key = key
+        self.bytes = 0
+        self.budget_stopped = False
+        self._on_bytes = on_bytes
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes += size
+        if self._on_bytes is not None:
+            self._on_bytes(size)
+
+
+class Prefetcher:
+    """Sınırlı havuzda çalışan, iptal edilebilir ön yükleme işleri ve isabet sayaçları"""
+
+    def __init__(self, workers=PREFETCH_WORKERS, max_bytes=PREFETCH_MAX_BYTES, budget_window=PREFETCH_BUDGET_WINDOW,
+                 track=PREFETCH_TRACK):
+        self.max_bytes = max_bytes
+        self.budget_window = budget_window
+        self.track = track
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()  # (tür, anahtar) -> None, henüz gösterilmemiş önceden yüklenenler
+        self._queue = deque()  # (iş, birim); havuzdaki her görev baştan bir birim alır
+        self._pending = 0
+        self._window_started = time.monotonic()
+        self._window_bytes = 0  # bu bütçe penceresinde tüm işlerin indirdiği bayt
+        self.jobs = 0
+        self.cancelled = 0
+        self.budget_stops = 0
+        self.errors = 0
+        self.prefetched = 0
+        self.used = 0
+        self.bytes = 0
+
+    def submit(self, key, units):
+        """units'teki birimleri (ör. bir günün sayfası) sırayla havuza gönder ve işi döndür
+
+        Her birim iş nesnesiyle çağrılır: unit(job). Birim yeni birimler
+        döndürebilir (ör. özeti okunan bir pencerenin günleri); bunlar aynı
+        işe, kuyruğun önüne eklenir. İndirilen bayt job.add_bytes ile süreç
+        genelindeki bütçeye sayılır; fetcher() ile sarılan indirmeler bunu
+        kendiliğinden yapar.
+        """
+        job = PrefetchJob(key, self._count_bytes)
+        with self._lock:
+            self.jobs += 1
+        self._enqueue(job, units)
+        return job
+
+    def cancel(self, job):
+        """İşin kalan birimlerini iptal et"""
+        if job is not None and not job.cancelled:
+            job.cancel()
+            with self._lock:
+                self.cancelled += 1
+
+    @property
+    def exhausted(self):
+        """Süreç genelindeki bayt bütçesi bu pencerede doldu mu"""
+        with self._lock:
+            self._roll_window()
+            return self._window_bytes >= self.max_bytes
+
+    def fetcher(self, job, fetch):
+        """fetch(key) indirmesini süreç genelindeki bütçeye ve işin iptaline bağla; durdurulursa None döner"""
+        def limited(key):
+            if job.cancelled or self._budget_stop(job):
+                return None
+            data = fetch(key)
+            if data is not None:
+                job.add_bytes(len(data))
+            return data
+        return limited
+
+    def loaded(self, kind, keys):
+        """Önceden yüklenen öğeleri isabet ölçümü için kaydet"""
+        with self._lock:
+            for key in keys:
+                if (kind, key) not in self._loaded:
+                    self._loaded[(kind, key)] = None
+                    self.prefetched += 1
+            while len(self._loaded) > self.track:
+                self._loaded.popitem(last=False)
+
+    def touch(self, kind, keys):
+        """Ön planda gösterilen öğeler; önceden yüklenmiş olanlar isabet sayılır (bir kez)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for key in keys:
+                if self._loaded.pop((kind, key), 0) is None:
+                    self.used += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "jobs": self.jobs,
+                "pending": self._pending,
+                "cancelled": self.cancelled,
+                "budget_stops": self.budget_stops,
+                "errors": self.errors,
+                "prefetched": self.prefetched,
+                "used": self.used,
+                "hit_rate": self.used / self.prefetched if self.prefetched else 0.0,
+                "bytes": self.bytes,
+                "budget_bytes": self._window_bytes,
+            }
+
+    def _enqueue(self, job, units, front=False):
+        units = list(units)
+        with self._lock:
+            self._pending += len(units)
+            if front:
+                self._queue.extendleft((job, unit) for unit in reversed(units))
+            else:
+                self._queue.extend((job, unit) for unit in units)
+        for _ in units:
+            self._executor.submit(self._run_next)
+
+    def _run_next(self):
+        with self._lock:
+            job, unit = self._queue.popleft()
+        try:
+            if job.cancelled or self._budget_stop(job):
+                return
+            more = unit(job)
+            if more and not job.cancelled:
+                self._enqueue(job, more, front=True)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _budget_stop(self, job):
+        """Bütçe dolduysa işi bir kez bütçe nedeniyle durmuş say ve True döndür"""
+        if not self.exhausted:
+            return False
+        with self._lock:
+            if not job.budget_stopped:
+                job.budget_stopped = True
+                self.budget_stops += 1
+        return True
+
+    def _roll_window(self):
+        now = time.monotonic()
+        if now - self._window_started >= self.budget_window:
+            self._window_started = now
+            self._window_bytes = 0
+
+    def _count_bytes(self, size):
+        with self._lock:
+            self._roll_window()
+            self.bytes += size
+            self._window_bytes += size
+
+
+# Süreç genelindeki ön yükleyici
+prefetcher = Prefetcher()
@@ -0,0 +1,313 @@
+# PDF raporu indirme
+#
+# Rapor backend'den parça parça okunur ve bellekte küçük kalan, büyüdüğünde
+# diske taşan geçici bir dosyaya (SpooledTemporaryFile) yazılır. Toplam boyut
+# REPORT_MAX_BYTES ile sınırlıdır; sınır aşılırsa indirme yarıda kesilir.
+# Varsayılan olarak rapor, öğünler sayfa sayfa okunarak yerel PDF motoruyla
+# (pdf_report) üretilir; REPORT_ENGINE=backend ise backend'in
+# /api/report/pdf ucu kullanılır.
+#
+# Rapor üretimi betik iş parçacığını bekletmemek için sınırlı bir arka plan
+# havuzunda iş (job) olarak çalışır. Aynı (tarih aralığı, kullanıcı) için
+# açılan işler tüm oturumlar arasında tekilleştirilir ve biten raporlar
+# REPORT_ARTIFACT_TTL saniye boyunca yeniden kullanılır.
+#
+# STATE_BACKEND paylaşılan bir depo seçerse (state.py) biten işlerin çıktısı
+# da oraya yazılır: oturum başka bir Streamlit sürecine düştüğünde iş
+# kimliğiyle, başka bir süreçteki diyetisyen aynı anahtarla hazır raporu
+# yeniden üretmeden alır. Süren işler yalnızca onları çalıştıran süreçtedir.
+# Depoya yalnızca REPORT_SHARE_MAX_BYTES'a kadar olan çıktılar yazılır; daha
+# büyükleri yalnızca üreten süreçten indirilebilir.
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import error_message
+from meal_frame import meal_cursor, select_meals
+from state import SHARED_STATE, state_store
+
+REPORT_MAX_BYTES = int(os.environ.get("REPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+REPORT_SPOOL_MEMORY = int(os.environ.get("REPORT_SPOOL_MEMORY", str(1024 * 1024)))
+REPORT_CHUNK_SIZE = 64 * 1024
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "2"))
+REPORT_ARTIFACT_TTL = float(os.environ.get("REPORT_ARTIFACT_TTL", "600"))
+REPORT_POLL_INTERVAL = float(os.environ.get("REPORT_POLL_INTERVAL", "1.5"))
+REPORT_ENGINE = os.environ.get("REPORT_ENGINE", "local").lower()
+REPORT_SHARE_MAX_BYTES = int(os.environ.get("REPORT_SHARE_MAX_BYTES", str(8 * 1024 * 1024)))
+REPORT_PAGE_SIZE = 200  # rapor için öğünlerin okunduğu sayfa boyutu
+
+logger = logging.getLogger(__name__)
+
+
+class ReportError(Exception):
+    """Backend raporu oluşturamadı"""
+
+
+class ReportTooLarge(ReportError):
+    """Rapor izin verilen boyut sınırını aştı"""
+
+
+class ReportArtifact:
+    """Geçici dosyada tutulan, indirilmeye hazır rapor"""
+
+    def __init__(self, key, file, size, file_name):
+        self.key = key
+        self.file = file
+        self.size = size
+        self.file_name = file_name
+        self._lock = threading.Lock()
+
+    def read(self):
+        """Rapor içeriğini baştan oku; dosya kapandıysa None"""
+        with self._lock:
+            if self.file.closed:
+                return None
+            self.file.seek(0)
+            return self.file.read()
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+class SharedArtifact:
+    """Başka bir süreçte üretilip paylaşılan durum deposuna yazılmış rapor"""
+
+    def __init__(self, store, job_id, key, size, file_name):
+        self.store = store
+        self.job_id = job_id
+        self.key = key
+        self.size = size
+        self.file_name = file_name
+
+    def read(self):
+        """Rapor içeriğini depodan oku; süresi dolduysa None"""
+        entry = self.store.get("report_files", self.job_id)
+        return entry[0] if entry else None
+
+    def close(self):
+        pass
+
+
+def report_file_name(start_date, end_date):
+    return f"diyet-rapor-{start_date}-{end_date}.pdf"
+
+
+def fetch_report(client, token, start_date, end_date, user_id="all", max_bytes=REPORT_MAX_BYTES):
+    """Raporu parça parça geçici dosyaya indir ve ReportArtifact döndür"""
+    params = {
+        "startDate": start_date,
+        "endDate": end_date,
+        "userId": user_id
+    }
+    response = client.get_report(token, params)
+    with response:
+        if response.status_code != 200:
+            raise ReportError(error_message(response))
+
+        declared = int(response.headers.get("Content-Length") or 0)
+        if declared > max_bytes:
+            raise ReportTooLarge(_too_large_message(max_bytes))
+
+        spool = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MEMORY, suffix=".pdf")
+        size = 0
+        try:
+            for chunk in response.iter_content(chunk_size=REPORT_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ReportTooLarge(_too_large_message(max_bytes))
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+
+    spool.seek(0)
+    key = (start_date, end_date, user_id)
+    return ReportArtifact(key, spool, size, report_file_name(start_date, end_date))
+
+
+def iter_backend_meals(client, token, start_date, end_date, user_id="all", page_size=REPORT_PAGE_SIZE,
+                       cursor=None, on_response=None):
+    """Aralıktaki öğünleri backend'den sayfa sayfa, en yeniden eskiye üret
+
+    cursor verilirse o öğünden sonrakilerden başlanır; on_response her
+    sayfanın yanıtıyla çağrılır (ör. indirilen baytları saymak için).
+    """
+    while True:
+        params = {
+            "startDate": start_date,
+            "endDate": end_date,
+            "userId": user_id,
+            "limit": page_size
+        }
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get_meals(token, params)
+        if response.status_code != 200:
+            raise ReportError(error_message(response))
+        if on_response:
+            on_response(response)
+        meals = response.json()
+        if len(meals) > page_size:
+            # Sayfalamayı desteklemeyen backend tüm aralığı tek yanıtta döndürür
+            yield from select_meals(meals, cursor=cursor)
+            return
+        yield from meals
+        if len(meals) < page_size:
+            return
+        cursor = meal_cursor(meals[-1])
+
+
+def _too_large_message(max_bytes):
+    return f"Rapor {max_bytes // (1024 * 1024)} MB sınırını aşıyor, daha kısa bir tarih aralığı seçin"
+
+
+class ReportJob:
+    """Arka planda üretilen bir raporun durumu"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = self.QUEUED
+        self.artifact = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def pending(self):
+        return self.status in (self.QUEUED, self.RUNNING)
+
+
+class ReportJobQueue:
+    """Sınırlı iş parçacığı havuzunda çalışan, tekilleştirilmiş rapor işleri"""
+
+    def __init__(self, workers=REPORT_WORKERS, artifact_ttl=REPORT_ARTIFACT_TTL, store=None,
+                 share_max_bytes=REPORT_SHARE_MAX_BYTES):
+        self.artifact_ttl = artifact_ttl
+        self.store = store  # biten işlerin paylaşıldığı durum deposu (None: yalnızca bu süreç)
+        self.share_max_bytes = share_max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._jobs = {}  # id -> ReportJob
+        self._by_key = {}  # (start_date, end_date, user_id, çağıran[, biçim]) -> id
+
+    def submit(self, key, produce):
+        """Aynı anahtar için çalışan ya da geçerli bir iş varsa onu, yoksa yeni iş döndür
+
+        key: (start_date, end_date, user_id, çağıran[, biçim]); çağıran, başka
+        süreçlerle paylaşılan anahtarda da (report_keys) yer alır. produce:
+        ReportArtifact döndüren, arka plan iş parçacığında çağrılacak argümansız fonksiyon.
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(self._by_key.get(key))
+            if job is None:
+                job = self._load_shared(self._load_shared_id(key))
+            if job is not None and job.status != ReportJob.FAILED:
+                return job
+            job = ReportJob(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._executor.submit(self._run, job, produce)
+        return job
+
+    def get(self, job_id):
+        """İşi kimliğiyle bul; süresi dolmuşsa None"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id) or self._load_shared(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def _run(self, job, produce):
+        job.status = ReportJob.RUNNING
+        try:
+            artifact = produce()
+        except Exception as e:
+            job.error = str(e)
+            job.status = ReportJob.FAILED
+        else:
+            job.artifact = artifact
+            job.status = ReportJob.DONE
+        job.finished_at = time.time()
+        if self.store is not None and job.status == ReportJob.DONE:
+            try:
+                self._share(job)
+            except Exception:
+                # Paylaşılamayan rapor bu süreçte yine indirilebilir
+                logger.exception("Rapor işi %s paylaşılan depoya yazılamadı", job.id)
+
+    def _share(self, job):
+        """Biten işin çıktısını (boyut sınırı içindeyse) ve kaydını paylaşılan depoya yaz"""
+        if job.artifact.size > self.share_max_bytes:
+            logger.info("Rapor işi %s paylaşılmadı: %d bayt, sınır %d", job.id, job.artifact.size,
+                        self.share_max_bytes)
+            return
+        data = job.artifact.read()
+        if data is None:
+            return
+        meta = {"key": list(job.key), "size": job.artifact.size, "file_name": job.artifact.file_name,
+                "finished_at": job.finished_at}
+        self.store.set("report_files", job.id, data, self.artifact_ttl)
+        self.store.set("report_jobs", job.id, json.dumps(meta).encode("utf-8"), self.artifact_ttl)
+        self.store.set("report_keys", _shared_key(job.key), job.id.encode("ascii"), self.artifact_ttl)
+
+    def _load_shared_id(self, key):
+        if self.store is None:
+            return None
+        entry = self.store.get("report_keys", _shared_key(key))
+        return entry[0].decode("ascii") if entry else None
+
+    def _load_shared(self, job_id):
+        """Başka bir süreçte biten işi depodan kur ve bu süreçte de kaydet; yoksa None"""
+        if self.store is None or not job_id:
+            return None
+        entry = self.store.get("report_jobs", job_id)
+        if entry is None:
+            return None
+        meta = json.loads(entry[0])
+        key = tuple(meta["key"])
+        job = ReportJob(key)
+        job.id = job_id
+        job.artifact = SharedArtifact(self.store, job_id, key, meta["size"], meta["file_name"])
+        job.status = ReportJob.DONE
+        job.finished_at = meta["finished_at"]
+        self._jobs[job_id] = job
+        self._by_key[key] = job_id
+        return job
+
+    def _purge_expired(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is None or now - job.finished_at < self.artifact_ttl:
+                continue
+            del self._jobs[job_id]
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+            if job.artifact is not None:
+                job.artifact.close()
+
+
+def _shared_key(key):
+    """Paylaşılan depodaki iş anahtarı (çağıran dahil tüm iş anahtarı)"""
+    return json.dumps(list(key), default=str)
+
+
+# Süreç genelindeki rapor iş kuyruğu
+report_jobs = ReportJobQueue(store=state_store if SHARED_STATE else None)
@@ -0,0 +1,143 @@
+# Günlük öğün özetleri (rollup)
+#
+# Diyetisyenin uzun aralıklara (çeyrek, yıl) genel bakışı ham öğünleri
+# yeniden taramadan, artımlı tutulan günlük özetlerden hesaplanır. Bir özet
+# hücresi (yerel gün, kullanıcı, öğün türü) için öğün sayısını ve öğün
+# saatlerinin (gün içi dakika) toplamını tutar; ortalama öğün saati bu
+# toplamdan çıkar. Hücre sayısı gün × kullanıcı × öğün türü ile sınırlıdır,
+# öğün sayısıyla büyümez.
+#
+# Demo modunda özetler SQLite deposunda (meal_store) öğün eklenirken aynı
+# işlemde güncellenir. Gerçek modda artımlı senkronizasyon kümeleri
+# (meal_sync) gelen her ekleme, güncelleme ve silmeyi DailyRollups'a işler.
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+import pytz
+
+from meal_frame import LOCAL_TZ
+
+_ZONE = pytz.timezone(LOCAL_TZ)
+
+
+@lru_cache(maxsize=8192)
+def _local_hour(utc_hour):
+    """"YYYY-MM-DDTHH" (UTC) -> (yerel gün, yerel saat); saat dilimi farkları tam saattir"""
+    local = datetime.strptime(utc_hour, "%Y-%m-%dT%H").replace(tzinfo=timezone.utc).astimezone(_ZONE)
+    return local.date().isoformat(), local.hour
+
+
+def local_day_minute(taken_at):
+    """taken_at (UTC ISO metni ya da datetime) -> (yerel gün "YYYY-MM-DD", gün içi dakika)"""
+    if not isinstance(taken_at, str) or not taken_at.endswith("Z"):
+        if isinstance(taken_at, str):
+            taken_at = datetime.fromisoformat(taken_at)
+        if taken_at.tzinfo is None:
+            taken_at = taken_at.replace(tzinfo=timezone.utc)
+        taken_at = taken_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M")
+    day, hour = _local_hour(taken_at[:13])
+    return day, hour * 60 + int(taken_at[14:16])
+
+
+def format_minutes(minutes):
+    return f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+
+
+class DailyRollups:
+    """Bellekte tutulan günlük özetler: gün -> {(kullanıcı, öğün türü): [sayı, dakika toplamı, ad]}"""
+
+    def __init__(self):
+        self._days = {}
+
+    def add(self, meal, sign=1):
+        """Öğünü özete ekle (sign=-1: çıkar)"""
+        user = meal.get("User") or {}
+        day, minute = local_day_minute(meal["taken_at"])
+        cells = self._days.setdefault(day, {})
+        cell = cells.setdefault((user.get("code"), meal.get("meal_type")), [0, 0, user.get("name")])
+        cell[0] += sign
+        cell[1] += sign * minute
+        if cell[0] <= 0:
+            del cells[(user.get("code"), meal.get("meal_type"))]
+            if not cells:
+                del self._days[day]
+
+    def summary(self, start_date, end_date, user_id="all"):
+        """[start_date, end_date] aralığının özeti (build_summary biçiminde)"""
+        days, meal_types, users = {}, {}, {}
+        for day in iter_days(start_date, end_date):
+            for (user_code, meal_type), (count, minutes, name) in self._days.get(day, {}).items():
+                if user_id != "all" and user_code != user_id:
+                    continue
+                days[day] = days.get(day, 0) + count
+                total = meal_types.setdefault(meal_type, [0, 0])
+                total[0] += count
+                total[1] += minutes
+                user = users.setdefault(user_code, [name, 0])
+                user[1] += count
+        return build_summary(days, meal_types, users, start_date, end_date)
+
+
+def iter_days(start_date, end_date):
+    """[start_date, end_date] aralığındaki günleri ISO metni olarak üret"""
+    day = date.fromisoformat(str(start_date))
+    last = date.fromisoformat(str(end_date))
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def month_partition(start_date, end_date):
+    """Aralığı tam aylara ve kenar günlerine ayır: (ilk tam ay, son tam ay, [(gün, gün), ...])
+
+    Aylar "YYYY-MM" metnidir; tam ay yoksa ilk iki değer None olur ve tüm
+    aralık tek bir kenar parçasıdır.
+    """
+    start = date.fromisoformat(str(start_date))
+    end = date.fromisoformat(str(end_date))
+    first = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    after_end = end + timedelta(days=1)
+    last_end = after_end.replace(day=1)  # son tam ayın ertesi ayının ilk günü
+    if first >= last_end:
+        return None, None, [(start.isoformat(), end.isoformat())] if start <= end else []
+    edges = []
+    if start < first:
+        edges.append((start.isoformat(), (first - timedelta(days=1)).isoformat()))
+    if last_end < after_end:
+        edges.append((last_end.isoformat(), end.isoformat()))
+    return first.strftime("%Y-%m"), (last_end - timedelta(days=1)).strftime("%Y-%m"), edges
+
+
+def build_summary(days, meal_types, users, start_date, end_date):
+    """Toplamlardan özet sözlüğü kur
+
+    days: {gün: sayı}; meal_types: {tür: (sayı, dakika toplamı)};
+    users: {kod: (ad, sayı)}. Dönen özet:
+      total, day_count, logged_days: toplam öğün, aralıktaki gün, öğün girilen gün
+      days: [(gün, sayı)] aralıktaki her gün için (boş günler 0)
+      meal_types: [(tür, sayı, ortalama saat "HH:MM")] en çoktan aza
+      users: [(kod, ad, sayı)] en çoktan aza
+      gaps: [(ilk gün, son gün, gün sayısı)] hiç öğün girilmeyen ardışık günler
+    """
+    per_day = [(day, days.get(day, 0)) for day in iter_days(start_date, end_date)]
+    gaps = []
+    run_start = None
+    for i, (day, count) in enumerate(per_day + [(None, 1)]):
+        if count == 0 and run_start is None:
+            run_start = i
+        elif count and run_start is not None:
+            gaps.append((per_day[run_start][0], per_day[i - 1][0], i - run_start))
+            run_start = None
+    return {
+        "total": sum(days.values()),
+        "day_count": len(per_day),
+        "logged_days": sum(1 for _, count in per_day if count),
+        "days": per_day,
+        "meal_types": sorted(
+            ((meal_type, count, format_minutes(minutes / count)) for meal_type, (count, minutes) in meal_types.items()
+             if count),
+            key=lambda item: -item[1],
+        ),
+        "users": sorted(((code, name, count) for code, (name, count) in users.items()), key=lambda item: -item[2]),
+        "gaps": gaps,
+    }
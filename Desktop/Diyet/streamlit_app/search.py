@@ -0,0 +1,174 @@
+# Öğün notu, öğün türü ve kullanıcı üzerinde tam metin arama
+#
+# Metin küçültülür ve Türkçe harfler ASCII karşılıklarına indirgenir
+# (ı, I, İ -> i; ş -> s ...); böylece "TATLI", "tatlı" ve "tatli" aynı
+# terimdir. Sorgudaki her kelime önektir ve kelimelerin tümü
+# eşleşmelidir ("fast fo" -> "fast food" notları).
+#
+# Demo modunda arama SQLite deposundaki FTS5 tablosundan (meal_store) yapılır;
+# öğünler eklenirken aynı işlemde indekse yazılır. Gerçek modda artımlı
+# senkronizasyon kümeleri (meal_sync) gelen her ekleme, güncelleme ve silmeyi
+# bellek içi ters indekse (SearchIndex) işler; senkronizasyon kapalıyken
+# filtrelenen aralığın sayfaları sırayla okunup süzülür (filter_meals). Tüm
+# yollarda sonuçlar en
+# yeniden eskiye sıralıdır ve "taken_at|id" imleciyle sayfalanır; bir sayfa
+# tüm eşleşmeler sıralanmadan, yalnızca sayfa dolana kadar okunarak bulunur.
+import heapq
+import re
+from bisect import bisect_left, insort
+
+from meal_frame import parse_cursor, to_utc_text
+
+# "İ".lower() "i" + birleşik nokta (U+0307) verir; nokta silinir
+_FOLD = str.maketrans({"ı": "i", "ç": "c", "ğ": "g", "ö": "o", "ş": "s", "ü": "u",
+                       "â": "a", "î": "i", "û": "u", "\u0307": None})
+_WORD = re.compile(r"\w+")
+
+
+def fold_text(text):
+    """Türkçe büyük/küçük harf ve aksan farklarını yok sayan arama biçimi"""
+    return (text or "").lower().translate(_FOLD)
+
+
+def search_text(note, meal_type, user_name, user_code):
+    """Bir öğünün indekslenen metni (not, öğün türü, kullanıcı adı ve kodu)"""
+    return fold_text(" ".join(filter(None, (note, meal_type, user_name, user_code))))
+
+
+def search_terms(query):
+    """Sorgunun (tekrarsız) arama terimleri"""
+    return list(dict.fromkeys(_WORD.findall(fold_text(query))))
+
+
+def fts_query(terms):
+    """Terimlerden FTS5 MATCH ifadesi: her terim önek, hepsi zorunlu"""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _sort_key(taken_at, meal_id):
+    return to_utc_text(taken_at), str(meal_id)
+
+
+def cursor_key(cursor):
+    """"taken_at|id" imlecini sıralama anahtarına çevir"""
+    return _sort_key(*parse_cursor(cursor))
+
+
+def filter_meals(meals, query, limit=None):
+    """En yeniden eskiye sıralı öğünlerden sorguyla eşleşenler
+
+    Eşleşme kuralları SearchIndex ile aynıdır; kaynak yalnızca sayfa dolana
+    kadar okunur.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    result = []
+    for meal in meals:
+        user = meal.get("User") or {}
+        words = _WORD.findall(search_text(meal.get("note"), meal.get("meal_type"), user.get("name"), user.get("code")))
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            result.append(meal)
+            if limit and len(result) >= limit:
+                break
+    return result
+
+
+class SearchIndex:
+    """Öğün kümesi için bellek içi ters indeks (terim -> sıralı öğün anahtarları)
+
+    Eklemeler listeye yalnızca eklenir; terimin listesi ilk aramada bir kez
+    sıralanır. İş parçacığı güvenliği çağıranın (MealSet.lock) sorumluluğundadır.
+    """
+
+    def __init__(self):
+        self._meals = {}  # id -> (sıralama anahtarı, kullanıcı kodu, terimler)
+        self._postings = {}  # terim -> [(taken_at, id), ...]
+        self._vocabulary = []  # sıralı terimler (önek araması için)
+        self._unsorted = set()
+
+    def __len__(self):
+        return len(self._meals)
+
+    def add(self, meal):
+        """Öğünü indeksle (aynı kimlikli eski kaydın yerine geçer)"""
+        meal_id = str(meal["id"])
+        self.remove(meal_id)
+        user = meal.get("User") or {}
+        key = _sort_key(meal["taken_at"], meal_id)
+        terms = frozenset(_WORD.findall(search_text(
+            meal.get("note"), meal.get("meal_type"), user.get("name"), user.get("code"))))
+        self._meals[meal_id] = (key, user.get("code"), terms)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = []
+                insort(self._vocabulary, term)
+            elif postings[-1] > key:
+                self._unsorted.add(term)
+            postings.append(key)
+
+    def remove(self, meal_id):
+        entry = self._meals.pop(str(meal_id), None)
+        if entry is None:
+            return
+        key, _, terms = entry
+        for term in terms:
+            postings = self._sorted(term)
+            del postings[bisect_left(postings, key)]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def search(self, query, user_id="all", limit=None, cursor=None):
+        """Eşleşen öğün kimlikleri, en yeniden eskiye (cursor'dan eski olanlar)"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        # Her terimin eşleştiği indeks terimleri (önek aralığı)
+        expansions = []
+        for term in terms:
+            first = bisect_left(self._vocabulary, term)
+            last = bisect_left(self._vocabulary, term + "\uffff")
+            if first == last:
+                return []
+            expansions.append(self._vocabulary[first:last])
+        filtered = user_id not in (None, "all")
+        if filtered:
+            # Kullanıcı kodu da bir terimdir; seçici kullanıcıda taranacak liste onunki olabilir
+            user_term = fold_text(user_id)
+            if user_term not in self._postings:
+                return []
+            expansions.append([user_term])
+        # En az öğünle eşleşen terim taranır, diğerleri öğünün terimlerinde denetlenir
+        driver = min(range(len(expansions)), key=lambda i: sum(len(self._postings[t]) for t in expansions[i]))
+        others = [term for i, term in enumerate(terms) if i != driver]
+        bound = cursor_key(cursor) if cursor else None
+
+        result = []
+        previous = None
+        for key in heapq.merge(*(self._descending(t, bound) for t in expansions[driver]), reverse=True):
+            if key == previous:
+                continue
+            previous = key
+            _, user_code, meal_terms = self._meals[key[1]]
+            if filtered and user_code != user_id:
+                continue
+            if all(any(t.startswith(term) for t in meal_terms) for term in others):
+                result.append(key[1])
+                if limit and len(result) >= limit:
+                    break
+        return result
+
+    def _sorted(self, term):
+        postings = self._postings[term]
+        if term in self._unsorted:
+            postings.sort()
+            self._unsorted.discard(term)
+        return postings
+
+    def _descending(self, term, bound):
+        postings = self._sorted(term)
+        end = bisect_left(postings, bound) if bound else len(postings)
+        return (postings[i] for i in range(end - 1, -1, -1))
+
@@ -0,0 +1,356 @@
+# Süreçler arası paylaşılabilen durum deposu
+#
+# Streamlit oturum durumu (st.session_state) ve cache.py'deki önbellekler tek
+# bir sürecin belleğindedir: uygulama birden fazla `streamlit run` kopyasıyla
+# (replika) yapışkan oturum olmadan ölçeklenemez ve her yeniden dağıtımda
+# oturumlar kaybolur. Bu modül anahtar-değer arayüzlü, değiştirilebilir bir
+# durum deposu sağlar:
+#   - memory: süreç içi sözlük (varsayılan; tek süreç)
+#   - sqlite: STATE_DB_PATH'teki WAL kipinde SQLite dosyası; aynı makinedeki
+#     ya da ortak bir birimi bağlayan tüm süreçler aynı veriyi görür ve veri
+#     yeniden başlatmalardan sağ çıkar
+# Depo ad alanlarına (namespace) bölünür: öğün önbelleği ("meals"), biten
+# rapor ve dışa aktarma çıktıları ("report_*") ve oturum geri yükleme
+# verileri ("sessions"). Değerler bayttır; süresi dolan kayıtlar okunmaz ve
+# yazmalar sırasında temizlenir.
+#
+# Oturum verisi (backend token'ı dahil) tarayıcı çerezindeki gizli değerle
+# bulunur ve şifrelenir: depoda yalnızca gizli değerden türetilen anahtar ile
+# şifreli ve doğrulanmış (HMAC-SHA256) veri durur; depoyu okuyan biri çerez
+# olmadan oturumu açamaz.
+#
+# SharedCache, cache.LRUCache ile aynı arayüzü depo üzerinde sağlar; anahtar
+# ve değerler JSON olarak saklanır. Bayt bütçesi aşılınca en eski yazılan
+# kayıtlar çıkarılır. İsabet/ıskalama sayaçları süreç başınadır.
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "diyet_state.db")
+SESSION_TTL = float(os.environ.get("SESSION_TTL", str(12 * 3600)))
+# Oturum çerezle geri yüklenebilir mi (varsayılan kapalı)
+SESSION_RESTORE = os.environ.get("SESSION_RESTORE", "false").lower() == "true"
+# Öğün önbelleği ve rapor çıktıları süreçler arasında paylaşılıyor mu
+SHARED_STATE = STATE_BACKEND != "memory"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kv_stored_at ON kv (namespace, stored_at);
+CREATE INDEX IF NOT EXISTS kv_expires_at ON kv (expires_at) WHERE expires_at IS NOT NULL;
+"""
+
+
+class MemoryStateStore:
+    """Süreç içi durum deposu (tek süreç; yeniden başlatmada kaybolur)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spaces = {}  # namespace -> {key: (value, stored_at, expires_at)}
+
+    def get(self, namespace, key):
+        """(değer, kaydedildiği an) ya da yoksa / süresi dolmuşsa None"""
+        with self._lock:
+            space = self._spaces.get(namespace, {})
+            entry = space.get(key)
+            if entry is None:
+                return None
+            value, stored_at, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del space[key]
+                return None
+            return value, stored_at
+
+    def set(self, namespace, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            space = self._spaces.setdefault(namespace, {})
+            for expired in [k for k, (_, _, expires_at) in space.items() if expires_at is not None and expires_at <= now]:
+                del space[expired]
+            space[key] = (value, now, now + ttl if ttl else None)
+
+    def delete(self, namespace, keys):
+        with self._lock:
+            space = self._spaces.get(namespace, {})
+            return sum(space.pop(key, None) is not None for key in keys)
+
+    def keys(self, namespace):
+        now = time.time()
+        with self._lock:
+            return [key for key, (_, _, expires_at) in self._spaces.get(namespace, {}).items()
+                    if expires_at is None or expires_at > now]
+
+    def trim(self, namespace, max_bytes):
+        """Ad alanı max_bytes'ı aşıyorsa en eski kayıtları sil; silinen sayısını döndür"""
+        with self._lock:
+            space = self._spaces.get(namespace, {})
+            total = sum(len(value) for value, _, _ in space.values())
+            removed = 0
+            for key, (value, _, _) in sorted(space.items(), key=lambda item: item[1][1]):
+                if total <= max_bytes:
+                    break
+                del space[key]
+                total -= len(value)
+                removed += 1
+            return removed
+
+    def clear(self, namespace):
+        with self._lock:
+            self._spaces.pop(namespace, None)
+
+    def usage(self, namespace):
+        """(kayıt sayısı, toplam bayt)"""
+        with self._lock:
+            space = self._spaces.get(namespace, {})
+            return len(space), sum(len(value) for value, _, _ in space.values())
+
+
+class SqliteStateStore:
+    """Süreçler arasında paylaşılan, SQLite (WAL) dosyasındaki durum deposu"""
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def connection(self):
+        """İş parçacığına özel bağlantı (WAL kipinde)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        """(değer, kaydedildiği an) ya da yoksa / süresi dolmuşsa None"""
+        row = self.connection().execute(
+            "SELECT value, stored_at FROM kv WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, namespace, key, value, ttl=None):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, size, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, len(value), now, now + ttl if ttl else None)
+            )
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+
+    def delete(self, namespace, keys):
+        with self.connection() as conn:
+            return conn.executemany(
+                "DELETE FROM kv WHERE namespace = ? AND key = ?", [(namespace, key) for key in keys]
+            ).rowcount
+
+    def keys(self, namespace):
+        rows = self.connection().execute(
+            "SELECT key FROM kv WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        )
+        return [row[0] for row in rows]
+
+    def trim(self, namespace, max_bytes):
+        """Ad alanı max_bytes'ı aşıyorsa en eski kayıtları sil; silinen sayısını döndür"""
+        with self.connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM kv WHERE namespace = ?", (namespace,)).fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM kv WHERE namespace = ? ORDER BY stored_at", (namespace,)):
+                if total <= max_bytes:
+                    break
+                doomed.append((namespace, key))
+                total -= size
+            conn.executemany("DELETE FROM kv WHERE namespace = ? AND key = ?", doomed)
+            return len(doomed)
+
+    def clear(self, namespace):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+    def usage(self, namespace):
+        """(kayıt sayısı, toplam bayt)"""
+        return tuple(self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchone())
+
+
+def get_state_store(backend=STATE_BACKEND, path=STATE_DB_PATH):
+    """STATE_BACKEND'e göre durum deposunu oluştur"""
+    if backend == "memory":
+        return MemoryStateStore()
+    if backend == "sqlite":
+        return SqliteStateStore(path)
+    raise ValueError(f"Bilinmeyen STATE_BACKEND: {backend}")
+
+
+def _encode(value):
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(data):
+    return json.loads(data)
+
+
+class SharedCache:
+    """Durum deposunda tutulan, TTL ve bayt bütçesi olan önbellek (LRUCache arayüzü)
+
+    Anahtarlar demet (tuple), değerler JSON'a çevrilebilir olmalıdır. Tazelik
+    duvar saatiyle (time.time()) ölçülür, böylece tüm süreçler aynı kaydı
+    aynı anda bayat sayar.
+    """
+
+    def __init__(self, store, namespace, max_bytes, ttl=None, stale_ttl=0):
+        self.store = store
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Önbellekteki değeri döndür, yoksa veya süresi dolmuşsa None"""
+        value = self.peek(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_stale(self, key):
+        """Süresi dolmuş olsa da bayatlık penceresindeki değer: (değer, kaydedildiği an) ya da None"""
+        entry = self.store.get(self.namespace, self._key(key))
+        if entry is None:
+            return None
+        with self._lock:
+            self.stale_hits += 1
+        return _decode(entry[0]), entry[1]
+
+    def peek(self, key):
+        """get() gibi, fakat sayaçları değiştirmez"""
+        entry = self.store.get(self.namespace, self._key(key))
+        if entry is None or (self.ttl and entry[1] + self.ttl <= time.time()):
+            return None
+        return _decode(entry[0])
+
+    def set(self, key, value):
+        """Değeri yaz; bütçe aşılırsa en eski kayıtları çıkar"""
+        data = _encode(value)
+        if len(data) > self.max_bytes:
+            return False
+        ttl = self.ttl + self.stale_ttl if self.ttl else None
+        self.store.set(self.namespace, self._key(key), data, ttl)
+        evicted = self.store.trim(self.namespace, self.max_bytes)
+        with self._lock:
+            self.evictions += evicted
+        return True
+
+    def invalidate(self, predicate):
+        """predicate(key) True dönen tüm kayıtları sil"""
+        keys = [key for key in self.store.keys(self.namespace) if predicate(tuple(_decode(key)))]
+        removed = self.store.delete(self.namespace, keys) if keys else 0
+        with self._lock:
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        """Tüm kayıtları sil (tüm süreçler için)"""
+        self.store.clear(self.namespace)
+
+    def stats(self):
+        """İsabet/ıskalama sayaçları (bu süreç) ve doluluk bilgisi (depo geneli)"""
+        entries, size = self.store.usage(self.namespace)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stale_hits": self.stale_hits,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _key(key):
+        return _encode(list(key)).decode("utf-8")
+
+
+# Süreç genelindeki durum deposu
+state_store = get_state_store()
+
+
+def _derive(secret, purpose):
+    return hmac.new(secret.encode("utf-8"), purpose, hashlib.sha256).digest()
+
+
+def _keystream(key, nonce, size):
+    blocks = (size + 31) // 32
+    return b"".join(hmac.new(key, nonce + i.to_bytes(8, "big"), hashlib.sha256).digest() for i in range(blocks))[:size]
+
+
+def _xor(data, stream):
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+
+def seal(secret, data):
+    """Baytları gizli değerden türetilen anahtarla şifrele ve doğrulama etiketi ekle"""
+    nonce = os.urandom(16)
+    ciphertext = _xor(data, _keystream(_derive(secret, b"enc"), nonce, len(data)))
+    tag = hmac.new(_derive(secret, b"mac"), nonce + ciphertext, hashlib.sha256).digest()
+    return nonce + tag + ciphertext
+
+
+def unseal(secret, sealed):
+    """seal() çıktısını çöz; gizli değer yanlışsa ya da veri bozulmuşsa None"""
+    nonce, tag, ciphertext = sealed[:16], sealed[16:48], sealed[48:]
+    expected = hmac.new(_derive(secret, b"mac"), nonce + ciphertext, hashlib.sha256).digest()
+    if not hmac.compare_digest(tag, expected):
+        return None
+    return _xor(ciphertext, _keystream(_derive(secret, b"enc"), nonce, len(ciphertext)))
+
+
+def _session_key(secret):
+    return _derive(secret, b"key").hex()
+
+
+def save_session(secret, data, ttl=SESSION_TTL):
+    """Oturum geri yükleme verisini (JSON'a çevrilebilir sözlük) çerezdeki gizli değerle şifreleyip sakla"""
+    state_store.set("sessions", _session_key(secret), seal(secret, _encode(data)), ttl)
+
+
+def load_session(secret):
+    """Saklanan oturum verisi ya da yoksa / süresi dolmuşsa / çözülemezse None"""
+    entry = state_store.get("sessions", _session_key(secret))
+    data = unseal(secret, bytes(entry[0])) if entry else None
+    return _decode(data) if data else None
+
+
+def drop_session(secret):
+    state_store.delete("sessions", [_session_key(secret)])
@@ -0,0 +1,5 @@
+# Testler uygulama modüllerini (api_client, meal_store, ...) doğrudan içe aktarır
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from breaker import BackendUnavailable, CircuitBreaker
+
+
+@pytest.fixture
+def breaker():
+    now = SimpleNamespace(value=0.0)
+    breaker = CircuitBreaker("meals", failures=3, cooldown=30, slow_ms=1000, clock=lambda: now.value)
+    breaker.now = now
+    return breaker
+
+
+def trip(breaker):
+    for _ in range(breaker.failures):
+        assert breaker.allow() is None
+        breaker.record(10, error=True)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record(10, error=True)
+    breaker.record(10, error=True)
+    breaker.record(10)  # başarı sayacı sıfırlar
+    breaker.record(10, error=True)
+    breaker.record(10, error=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(5000)  # yavaş yanıt da hata sayılır
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["trips"] == 1
+    with pytest.raises(BackendUnavailable):
+        breaker.allow()
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_half_open_lets_one_probe_and_closes_on_success(breaker):
+    trip(breaker)
+    breaker.now.value += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    probe = breaker.allow()
+    assert probe is not None
+    with pytest.raises(BackendUnavailable):
+        breaker.allow()  # deneme sürerken diğer istekler reddedilir
+    breaker.record(10, probe=probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() is None
+
+
+def test_failed_probe_reopens_for_another_cooldown(breaker):
+    trip(breaker)
+    breaker.now.value += 30
+    probe = breaker.allow()
+    breaker.record(10, error=True, probe=probe)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["trips"] == 2
+    breaker.now.value += 29
+    with pytest.raises(BackendUnavailable):
+        breaker.allow()
+    breaker.now.value += 1
+    assert breaker.allow() is not None
+
+
+def test_straggler_results_do_not_change_open_or_half_open_state(breaker):
+    # Devre açılmadan önce gönderilmiş istekler
+    for _ in range(3):
+        assert breaker.allow() is None
+    trip(breaker)
+
+    breaker.record(10)  # açıkken gelen geç başarı devreyi kapatmaz
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.now.value += 30
+    probe = breaker.allow()
+    breaker.record(10)  # yarı açıkken gelen geç başarı denemenin yerine geçmez
+    breaker.record(10, error=True)  # geç hata da devreyi yeniden açmaz
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(BackendUnavailable):
+        breaker.allow()
+
+    breaker.record(10, probe=probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_probe_token_is_ignored(breaker):
+    trip(breaker)
+    breaker.now.value += 30
+    old_probe = breaker.allow()
+    breaker.record(10, error=True, probe=old_probe)
+    breaker.now.value += 30
+    probe = breaker.allow()
+
+    breaker.record(10, probe=old_probe)  # önceki yarı açık dönemin yanıtı
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record(10, error=True, probe=probe)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker("meals", failures=0)
+    for _ in range(10):
+        assert breaker.allow() is None
+        breaker.record(10, error=True)
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,136 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import LRUCache, Revalidator, invalidate_meal, meal_cache_key, search_cache_key, summary_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """cache modülünün gördüğü saati elle ilerlet"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value))
+    return now
+
+
+def test_evicts_least_recently_used_within_byte_budget():
+    lru = LRUCache(max_bytes=10, sizeof=len)
+    lru.set("a", b"xxxx")
+    lru.set("b", b"xxxx")
+    assert lru.get("a") == b"xxxx"  # "a" artık en yeni
+    lru.set("c", b"xxxx")
+
+    assert lru.peek("b") is None
+    assert lru.get("a") == b"xxxx" and lru.get("c") == b"xxxx"
+    stats = lru.stats()
+    assert (stats["evictions"], stats["bytes"], stats["entries"]) == (1, 8, 2)
+
+
+def test_value_larger_than_budget_is_not_stored():
+    lru = LRUCache(max_bytes=3, sizeof=len)
+    assert lru.set("a", b"xxxx") is False
+    assert lru.stats()["entries"] == 0
+
+
+def test_expired_entry_is_served_only_as_stale_until_stale_ttl(clock):
+    lru = LRUCache(max_bytes=100, ttl=10, sizeof=len, stale_ttl=50)
+    lru.set("a", b"x")
+    clock.value += 10
+
+    assert lru.get("a") is None
+    assert lru.get_stale("a") == (b"x", 1000.0)
+    clock.value += 50
+    assert lru.get_stale("a") is None
+    assert lru.stats()["entries"] == 0
+
+
+def test_expired_entry_without_stale_ttl_is_dropped(clock):
+    lru = LRUCache(max_bytes=100, ttl=10, sizeof=len)
+    lru.set("a", b"x")
+    clock.value += 10
+    assert lru.get("a") is None
+    assert lru.stats()["entries"] == 0
+
+
+def test_peek_does_not_count_or_reorder():
+    lru = LRUCache(max_bytes=2, sizeof=len)
+    lru.set("a", b"x")
+    lru.set("b", b"x")
+    assert lru.peek("a") == b"x"
+    assert lru.peek("z") is None
+    lru.set("c", b"x")
+
+    assert lru.peek("a") is None  # peek "a"yı yenilemedi
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"]) == (0, 0)
+
+
+def test_revalidator_runs_one_refresh_per_key():
+    revalidator = Revalidator(workers=2)
+    release = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+
+    assert revalidator.submit("k", refresh) is True
+    assert revalidator.submit("k", refresh) is False
+    release.set()
+    deadline = time.monotonic() + 5
+    while revalidator.stats()["in_flight"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert calls == [1]
+    assert revalidator.stats()["skipped"] == 1
+    assert revalidator.submit("k", lambda: False) is True
+
+
+def test_revalidator_counts_failures():
+    revalidator = Revalidator(workers=1)
+
+    def boom():
+        raise RuntimeError("backend yok")
+
+    revalidator.submit("a", boom)
+    revalidator.submit("b", lambda: False)
+    revalidator.submit("c", lambda: None)
+    deadline = time.monotonic() + 5
+    while revalidator.stats()["refreshes"] < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert revalidator.stats()["failures"] == 2
+
+
+def test_cache_keys_separate_callers():
+    assert meal_cache_key("2026-01-01", "2026-01-07", "all", "A") != \
+        meal_cache_key("2026-01-01", "2026-01-07", "all", "B")
+    assert summary_cache_key("2026-01-01", "2026-01-07", "all", "A") != \
+        summary_cache_key("2026-01-01", "2026-01-07", "all", "B")
+    assert search_cache_key("2026-01-01", "2026-01-07", "all", "A", ["elma"]) != \
+        search_cache_key("2026-01-01", "2026-01-07", "all", "B", ["elma"])
+
+
+def test_invalidate_meal_drops_every_caller_seeing_the_day(monkeypatch):
+    lru = LRUCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(cache, "meal_cache", lru)
+    seen = [
+        meal_cache_key("2026-01-01", "2026-01-07", "all", "A"),
+        meal_cache_key("2026-01-01", "2026-01-07", "all", "B", limit=20, cursor="x|1"),
+        meal_cache_key("2026-01-03", "2026-01-03", "U1", "C"),
+        summary_cache_key("2026-01-01", "2026-01-31", "U1", "A"),
+        search_cache_key("2026-01-01", "2026-01-07", "all", "B", ["elma"]),
+    ]
+    unseen = [
+        meal_cache_key("2026-01-04", "2026-01-07", "all", "A"),  # başka günler
+        meal_cache_key("2026-01-01", "2026-01-07", "U2", "A"),  # başka kullanıcı
+    ]
+    for key in seen + unseen:
+        lru.set(key, [])
+
+    assert invalidate_meal("U1", "2026-01-03") == len(seen)
+    assert [key for key in seen + unseen if lru.peek(key) is not None] == unseen
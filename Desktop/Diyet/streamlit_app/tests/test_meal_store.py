@@ -0,0 +1,94 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from meal_frame import meal_cursor
+from meal_store import SqliteMealStore
+
+WRITERS = 8
+BATCHES = 20
+BATCH_SIZE = 5
+
+
+def meals(writer, batch):
+    taken_at = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=writer * 1000 + batch * 10)
+    return [{
+        "meal_type": "Öğle",
+        "note": f"yazar{writer} parti{batch} öğün{i}",
+        "taken_at": taken_at + timedelta(seconds=i),
+        "image_key": None,
+        "User": {"name": f"Kullanıcı {writer}", "code": f"U{writer}"},
+    } for i in range(BATCH_SIZE)]
+
+
+def rows(writer, batch):
+    return [(meal["User"]["code"], meal["User"]["name"], meal["meal_type"], meal["note"],
+             meal["taken_at"].strftime("%Y-%m-%dT%H:%M:%S.%fZ"), None, "2026-01-01T00:00:00.000000Z")
+            for meal in meals(writer, batch)]
+
+
+def run_writers(store, write):
+    errors = []
+    start = threading.Barrier(WRITERS)
+
+    def writer(index):
+        start.wait()
+        try:
+            for batch in range(BATCHES):
+                write(index, batch)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def assert_all_indexed(store):
+    conn = store.connection()
+    total = WRITERS * BATCHES * BATCH_SIZE
+    assert store.count() == total
+    assert conn.execute("SELECT COUNT(*) FROM meals_search").fetchone()[0] == total
+    assert conn.execute("SELECT COUNT(DISTINCT rowid) FROM meals_search").fetchone()[0] == total
+    assert conn.execute("SELECT SUM(meals) FROM daily_rollups WHERE user_code = '*'").fetchone()[0] == total
+    assert len(store.search(f"yazar{WRITERS - 1}")) == BATCHES * BATCH_SIZE
+
+
+def test_concurrent_insert_meals_loses_nothing(tmp_path):
+    store = SqliteMealStore(str(tmp_path / "meals.db"))
+    errors = run_writers(store, lambda writer, batch: store.insert_meals(meals(writer, batch)))
+    assert errors == []
+    assert_all_indexed(store)
+
+
+def test_concurrent_insert_rows_loses_nothing(tmp_path):
+    store = SqliteMealStore(str(tmp_path / "meals.db"))
+    errors = run_writers(store, lambda writer, batch: store.insert_rows(rows(writer, batch)))
+    assert errors == []
+    assert_all_indexed(store)
+
+
+def test_search_keeps_meals_with_equal_times(tmp_path):
+    store = SqliteMealStore(str(tmp_path / "meals.db"))
+    taken_at = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    meal = {"meal_type": "Öğle", "note": "tatlı", "taken_at": taken_at, "image_key": None,
+            "User": {"name": "Ben", "code": "A"}}
+    store.insert_meals([meal])
+    # Aynı saniyede, id'leri 10^7 farklı iki öğün (eski rowid formülünde çakışırdı)
+    with store.connection() as conn:
+        conn.execute("INSERT INTO meals (id, user_code, user_name, meal_type, taken_at, updated_at) "
+                     "VALUES (9999999, 'A', 'Ben', 'Ara', '2025-01-01T00:00:00.000000Z', '')")
+    store.insert_meals([meal, meal])
+
+    ids = [found["id"] for found in store.search("tatli")]
+    assert ids == ["10000001", "10000000", "1"]
+    pages, cursor = [], None
+    while True:
+        page = store.search("tatli", limit=2, cursor=cursor)
+        if not page:
+            break
+        pages.append([found["id"] for found in page])
+        cursor = meal_cursor(page[-1])
+    assert pages == [["10000001", "10000000"], ["1"]]
@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import Future
+
+import pytest
+
+from api_client import UploadPart
+from outbox import UploadOutbox
+
+USER = {"name": "Ayşe", "code": "A"}
+PHOTO = b"\xff\xd8 ayni fotograf"
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+class FakeBackend:
+    """upload_meals ve find_image'ı bellekte karşılayan istemci; aynı Idempotency-Key tek öğün kaydeder"""
+
+    def __init__(self, stored=None):
+        self.stored = dict(stored or {})  # içerik özeti -> image_key
+        self.meals = {}  # Idempotency-Key -> gönderilen veri
+        self.image_uploads = 0
+        self.lookups = 0
+
+    def find_image(self, token, content_hash):
+        self.lookups += 1
+        return self.stored.get(content_hash)
+
+    def upload_meals(self, token, parts, retries=0):
+        futures = []
+        for part in parts:
+            if part.files:
+                self.image_uploads += 1
+                image_key = f"img-{len(self.stored)}"
+                self.stored[part.data["imageHash"]] = image_key
+            else:
+                image_key = part.data["imageKey"]
+            self.meals.setdefault(part.idempotency_key, dict(part.data))
+            part.status = UploadPart.DONE
+            part.response = FakeResponse(201, {"image_key": image_key})
+            future = Future()
+            future.set_result(part)
+            futures.append(future)
+        return futures
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return UploadOutbox(str(tmp_path / "outbox"), batch_size=4, hash_lookup=False)
+
+
+def enqueue(outbox, note, data=PHOTO, **kwargs):
+    return outbox.enqueue("token-A", USER, "Öğle", note, "2026-01-01T12:00:00.000Z", "yemek.jpg", data, **kwargs)
+
+
+def drain(outbox, backend, rounds=10):
+    """Bekleyen kayıt kalmayana kadar (bekletilen ve geri bırakılanlar dahil) boşalt"""
+    sent = []
+    for _ in range(rounds):
+        outbox.drain_once(backend, on_sent=sent.append)
+        if not outbox.stats()["pending"]:
+            break
+    return sent
+
+
+def test_same_photo_is_uploaded_once(outbox):
+    backend = FakeBackend()
+    for note in ("bir", "iki", "üç"):
+        enqueue(outbox, note)
+
+    sent = drain(outbox, backend)
+
+    assert len(sent) == 3 and len(backend.meals) == 3
+    assert backend.image_uploads == 1
+    assert {entry["image_key"] for entry in sent} == {"img-0"}
+    stats = outbox.stats()
+    assert (stats["deduplicated"], stats["bytes_saved"], stats["bytes_sent"]) == (2, 2 * len(PHOTO), len(PHOTO))
+    assert stats["pending"] == stats["sending"] == stats["sent"] == 0
+    assert not [name for name in os.listdir(outbox.directory) if name.endswith(".img")]
+
+
+def test_photo_known_to_backend_is_sent_by_reference(tmp_path):
+    outbox = UploadOutbox(str(tmp_path / "outbox"), hash_lookup=True)
+    entry = enqueue(outbox, "bir")
+    backend = FakeBackend(stored={entry["content_hash"]: "eski"})
+
+    sent = drain(outbox, backend)
+
+    assert backend.lookups == 1 and backend.image_uploads == 0
+    assert [entry["image_key"] for entry in sent] == ["eski"]
+    assert list(backend.meals.values())[0]["imageKey"] == "eski"
+
+
+def test_same_idempotency_key_is_queued_and_sent_once(outbox):
+    backend = FakeBackend()
+    first = enqueue(outbox, "bir", idempotency_key="form-1")
+    second = enqueue(outbox, "bir", idempotency_key="form-1")
+
+    assert first["id"] == second["id"] == "form-1"
+    assert len(drain(outbox, backend)) == 1
+    assert list(backend.meals) == ["form-1"]
+    assert outbox.get("form-1") is None  # gönderilen satır silinir
+    assert [entry["id"] for entry in outbox.recent("A")] == ["form-1"]
+
+
+def test_rejected_reference_is_resent_with_photo(outbox):
+    backend = FakeBackend()
+    enqueue(outbox, "bir")
+    drain(outbox, backend)
+    upload_meals = backend.upload_meals
+
+    def reject_references(token, parts, retries=0):
+        futures = []
+        for part in parts:
+            if part.files:
+                futures.extend(upload_meals(token, [part], retries))
+                continue
+            part.status = UploadPart.FAILED
+            part.response = FakeResponse(404)
+            future = Future()
+            future.set_result(part)
+            futures.append(future)
+        return futures
+
+    backend.upload_meals = reject_references
+    enqueue(outbox, "iki")
+    sent = drain(outbox, backend)
+
+    assert [entry["note"] for entry in sent] == ["iki"]
+    assert backend.image_uploads == 2
+
+
+def test_resend_after_crash_reuses_idempotency_key(outbox, monkeypatch):
+    backend = FakeBackend()
+    entry = enqueue(outbox, "bir")
+    # Backend öğünü kaydetti, süreç yanıtı işleyemeden çöktü: kayıt "sending" kaldı
+    for claimed, _ in outbox._claim():
+        backend.upload_meals("token-A", [UploadPart({"imageHash": claimed["content_hash"]}, {"image": ()},
+                                                    claimed["id"])])
+    assert outbox.get(entry["id"])["status"] == UploadOutbox.SENDING
+
+    monkeypatch.setattr("outbox.OUTBOX_LEASE", -1.0)
+    outbox._recover()
+    drain(outbox, backend)
+
+    assert list(backend.meals) == [entry["id"]]
+    assert outbox.get(entry["id"]) is None
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from meal_frame import meal_cursor, select_meals
+from meal_store import SqliteMealStore
+from reports import iter_backend_meals
+
+PAGE_SIZE = 7
+
+
+def sample_meals():
+    """Üçerli gruplar hâlinde aynı anda alınmış 45 öğün (iki kullanıcı, yerel gece yarısı dahil)"""
+    start = datetime(2026, 1, 1, 20, tzinfo=timezone.utc)
+    return [{
+        "meal_type": "Öğle",
+        "note": f"öğün {i}",
+        "taken_at": start + timedelta(minutes=40 * (i // 3)),
+        "image_key": None,
+        "User": {"name": "Ayşe", "code": "A"} if i % 2 else {"name": "Bora", "code": "B"},
+    } for i in range(45)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteMealStore(str(tmp_path / "meals.db"))
+    store.insert_meals(sample_meals())
+    return store
+
+
+def pages(get_page):
+    """get_page(cursor) ile boş sayfaya kadar ilerle; sayfaların id listeleri"""
+    result, cursor = [], None
+    while True:
+        page = get_page(cursor)
+        if not page:
+            return result
+        assert len(page) <= PAGE_SIZE
+        result.append([meal["id"] for meal in page])
+        cursor = meal_cursor(page[-1])
+
+
+@pytest.mark.parametrize("user_id", ["all", "A"])
+def test_store_pages_cover_range_once_newest_first(store, user_id):
+    expected = [meal["id"] for meal in store.get_meals(user_id=user_id)]
+
+    found = pages(lambda cursor: store.get_meals(user_id=user_id, limit=PAGE_SIZE, cursor=cursor))
+
+    assert [meal_id for page in found for meal_id in page] == expected
+    assert len(expected) == (45 if user_id == "all" else 22)
+    assert all(len(page) == PAGE_SIZE for page in found[:-1])
+
+
+def test_frame_pages_match_store_pages(store):
+    meals = store.get_meals()
+    day_range = dict(start_date="2026-01-02", end_date="2026-01-02")
+
+    from_frame = pages(lambda cursor: select_meals(meals, limit=PAGE_SIZE, cursor=cursor, **day_range))
+    from_store = pages(lambda cursor: store.get_meals(limit=PAGE_SIZE, cursor=cursor, **day_range))
+
+    assert from_frame == from_store
+    assert 0 < sum(map(len, from_store)) < len(meals)
+
+
+class PagingBackend:
+    """get_meals'i depodan limit/cursor ile (paginate=False ise tek yanıtta) karşılayan istemci"""
+
+    def __init__(self, store, paginate=True):
+        self.store = store
+        self.paginate = paginate
+        self.requests = []
+
+    def get_meals(self, token, params):
+        self.requests.append(dict(params))
+        limit, cursor = (params["limit"], params.get("cursor")) if self.paginate else (None, None)
+        meals = self.store.get_meals(params["startDate"], params["endDate"], params["userId"], limit, cursor)
+        return FakeResponse(meals)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+@pytest.mark.parametrize("paginate", [True, False])
+def test_iter_backend_meals_follows_cursor(store, paginate):
+    backend = PagingBackend(store, paginate)
+    expected = [meal["id"] for meal in store.get_meals("2026-01-01", "2026-01-02")]
+
+    found = [meal["id"] for meal in iter_backend_meals(backend, "token", "2026-01-01", "2026-01-02",
+                                                       page_size=PAGE_SIZE)]
+
+    assert found == expected
+    if paginate:
+        assert len(backend.requests) == len(expected) // PAGE_SIZE + 1
+        assert backend.requests[1]["cursor"] == meal_cursor(store.get_meals(limit=PAGE_SIZE)[-1])
+    else:
+        assert len(backend.requests) == 1
+
+
+def test_iter_backend_meals_starts_after_cursor(store):
+    meals = store.get_meals()
+    found = [meal["id"] for meal in iter_backend_meals(PagingBackend(store), "token", "2026-01-01", "2026-01-02",
+                                                       page_size=PAGE_SIZE, cursor=meal_cursor(meals[9]))]
+    assert found == [meal["id"] for meal in meals[10:]]
@@ -0,0 +1,62 @@
+import time
+
+from prefetch import Prefetcher
+
+
+def drain(prefetcher, timeout=5):
+    deadline = time.monotonic() + timeout
+    while prefetcher.stats()["pending"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_byte_budget_is_shared_by_all_jobs():
+    prefetcher = Prefetcher(workers=1, max_bytes=100, budget_window=60)
+    fetched = []
+
+    def unit(job):
+        fetched.append(prefetcher.fetcher(job, lambda key: b"x" * 60)(job.key))
+
+    prefetcher.submit("a", [unit, unit])
+    prefetcher.submit("b", [unit])
+    drain(prefetcher)
+
+    # İlk iki indirme bütçeyi (100 bayt) doldurur; diğer işin birimi çalışmaz
+    assert [data is not None for data in fetched] == [True, True]
+    stats = prefetcher.stats()
+    assert stats["bytes"] == 120
+    assert stats["budget_stops"] == 1
+
+
+def test_byte_budget_resets_after_window():
+    prefetcher = Prefetcher(workers=1, max_bytes=50, budget_window=0.05)
+    fetched = []
+
+    def unit(job):
+        fetched.append(prefetcher.fetcher(job, lambda key: b"x" * 60)(job.key))
+
+    prefetcher.submit("a", [unit])
+    drain(prefetcher)
+    assert prefetcher.exhausted
+    time.sleep(0.06)
+    assert not prefetcher.exhausted
+    prefetcher.submit("b", [unit])
+    drain(prefetcher)
+    assert len(fetched) == 2
+
+
+def test_units_added_by_a_unit_run_before_queued_units():
+    prefetcher = Prefetcher(workers=1)
+    order = []
+
+    def record(name, more=()):
+        def unit(job):
+            order.append(name)
+            return list(more)
+        return unit
+
+    window = record("önceki pencere", [record("gün 1", [record("küçük resim")]), record("gün 2")])
+    prefetcher.submit("a", [window, record("sonraki pencere")])
+    drain(prefetcher)
+
+    assert order == ["önceki pencere", "gün 1", "küçük resim", "gün 2", "sonraki pencere"]
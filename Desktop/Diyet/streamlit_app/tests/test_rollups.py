@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+from meal_store import SqliteMealStore
+from rollups import DailyRollups
+
+USERS = [{"name": "Ayşe", "code": "A"}, {"name": "Bora", "code": "B"}]
+MEAL_TYPES = ["Kahvaltı", "Öğle", "Akşam"]
+
+
+def sample_meals():
+    """Ocak ortasından Mart başına, ay sınırlarını ve yerel gece yarısını aşan öğünler"""
+    start = datetime(2026, 1, 15, 6, tzinfo=timezone.utc)
+    meals = []
+    for i in range(120):
+        meals.append({
+            "meal_type": MEAL_TYPES[i % 3],
+            "note": "",
+            "taken_at": start + timedelta(hours=11 * i, minutes=i % 60),
+            "image_key": None,
+            "User": USERS[i % 2],
+        })
+    return meals
+
+
+def comparable(summary):
+    """Eşit sayılı kullanıcı ve öğün türlerinin sırası kaynağa göre değişebilir"""
+    return dict(summary, users=sorted(summary["users"]), meal_types=sorted(summary["meal_types"]))
+
+
+def test_summary_totals_match_meals():
+    rollups = DailyRollups()
+    meals = sample_meals()
+    for meal in meals:
+        rollups.add(meal)
+
+    summary = rollups.summary("2026-01-01", "2026-03-31")
+    assert summary["total"] == len(meals)
+    assert sum(count for _, count in summary["days"]) == len(meals)
+    assert summary["day_count"] == 90
+    assert dict((code, count) for code, _, count in summary["users"]) == {"A": 60, "B": 60}
+    assert sorted((meal_type, count) for meal_type, count, _ in summary["meal_types"]) == \
+        [("Akşam", 40), ("Kahvaltı", 40), ("Öğle", 40)]
+    assert summary["gaps"][0] == ("2026-01-01", "2026-01-14", 14)
+
+    only_a = rollups.summary("2026-01-01", "2026-03-31", user_id="A")
+    assert only_a["total"] == 60 and [code for code, _, _ in only_a["users"]] == ["A"]
+
+
+def test_removing_meals_restores_totals():
+    rollups = DailyRollups()
+    meals = sample_meals()
+    for meal in meals:
+        rollups.add(meal)
+    for meal in meals[:20]:
+        rollups.add(meal, sign=-1)
+
+    summary = rollups.summary("2026-01-01", "2026-03-31")
+    assert summary["total"] == len(meals) - 20
+    empty = DailyRollups()
+    empty.add(meals[0])
+    empty.add(meals[0], sign=-1)
+    assert empty.summary("2026-01-01", "2026-03-31")["total"] == 0
+
+
+def test_store_summary_matches_in_memory_rollups(tmp_path):
+    store = SqliteMealStore(str(tmp_path / "meals.db"))
+    rollups = DailyRollups()
+    meals = sample_meals()
+    store.insert_meals(meals)
+    for meal in meals:
+        rollups.add(meal)
+
+    # Tam aylar ve kenar günleri ayrı okunan aralıklar
+    for start, end in [("2026-01-01", "2026-03-31"), ("2026-01-20", "2026-03-02"), ("2026-02-01", "2026-02-28"),
+                       ("2026-02-10", "2026-02-12")]:
+        for user_id in ("all", "B"):
+            assert comparable(store.summary(start, end, user_id)) == comparable(rollups.summary(start, end, user_id)), \
+                (start, end, user_id)
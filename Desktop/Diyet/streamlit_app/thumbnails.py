@@ -0,0 +1,199 @@
+# Öğün kartları için küçük resimler
+#
+# Kartlar tam boy fotoğraf yerine sabit boyutlu küçük resimlerle çizilir.
+# Küçük resimler süreç genelindeki bayt bütçeli bir LRU önbellekte tutulur,
+# istenirse yerel bir dizine de yazılır (THUMBNAIL_CACHE_DIR). Önbellekte
+# olmayan fotoğraflar sınırlı bir havuzda eş zamanlı olarak indirilir. Tam
+# boy fotoğraf yalnızca kart büyütüldüğünde istenir. Pillow ilk küçük resimde
+# içe aktarılır.
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from cache import LRUCache
+
+THUMBNAIL_SIZE = (300, 200)
+THUMBNAIL_QUALITY = int(os.environ.get("THUMBNAIL_QUALITY", "75"))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("THUMBNAIL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+THUMBNAIL_CACHE_DIR = os.environ.get("THUMBNAIL_CACHE_DIR", "")
+FULL_IMAGE_CACHE_MAX_BYTES = int(os.environ.get("FULL_IMAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+IMAGE_FETCH_WORKERS = int(os.environ.get("IMAGE_FETCH_WORKERS", "8"))
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    """Fotoğrafı sabit boyuta kırparak küçült ve JPEG bayt olarak döndür"""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as img:
+        # JPEG, hedefe eşit ya da büyük en küçük ölçekte (1/2, 1/4, 1/8) çözülür
+        img.draft("RGB", size)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        thumb = ImageOps.fit(img, size, Image.LANCZOS)
+    out = BytesIO()
+    thumb.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def placeholder_image(label, size=(900, 600), color=(34, 197, 94)):
+    """Fotoğrafı olmayan (demo) öğünler için yer tutucu görüntü üret"""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", size, color)
+    draw = ImageDraw.Draw(img)
+    draw.text((size[0] // 2, size[1] // 2), label, fill=(255, 255, 255), anchor="mm")
+    out = BytesIO()
+    img.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+class ThumbnailStore:
+    """Küçük resim ve tam boy fotoğraf önbelleği, eş zamanlı indirme havuzu"""
+
+    def __init__(self, max_bytes=THUMBNAIL_CACHE_MAX_BYTES, cache_dir=THUMBNAIL_CACHE_DIR,
+                 full_max_bytes=FULL_IMAGE_CACHE_MAX_BYTES, workers=IMAGE_FETCH_WORKERS):
+        self.thumbnails = LRUCache(max_bytes, sizeof=len)
+        self.full_images = LRUCache(full_max_bytes, sizeof=len)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get_thumbnails(self, image_keys, fetch):
+        """image_key -> küçük resim sözlüğü; eksikleri fetch(image_key) ile eş zamanlı indir
+
+        İndirilemeyen fotoğraflar sonuçta yer almaz.
+        """
+        result = {}
+        missing = []
+        for key in dict.fromkeys(image_keys):
+            thumb = self.thumbnails.get(key)
+            if thumb is None:
+                thumb = self._read_disk(key)
+            if thumb is None:
+                missing.append(key)
+            else:
+                result[key] = thumb
+
+        futures = {key: self._executor.submit(self._load_thumbnail, key, fetch) for key in missing}
+        for key, future in futures.items():
+            thumb = future.result()
+            if thumb is not None:
+                result[key] = thumb
+        return result
+
+    def get_full(self, image_key, fetch):
+        """Tam boy fotoğrafı döndür (yalnızca kart büyütüldüğünde çağrılır)"""
+        data = self.full_images.get(image_key)
+        if data is None:
+            data = self._fetch(image_key, fetch)
+            if data is not None:
+                self.full_images.set(image_key, data)
+        return data
+
+    def put(self, image_key, data):
+        """Zaten elde olan bir fotoğrafın küçük resmini önbelleğe ekle
+
+        Aynı image_key aynı fotoğrafı gösterdiğinden (yüklemeler içerik
+        adreslidir) önbellekte olan küçük resim yeniden üretilmez.
+        """
+        thumb = self.thumbnails.peek(image_key) or self._read_disk(image_key)
+        if thumb is None:
+            thumb = self._make(image_key, data)
+        return thumb
+
+    def prefetch(self, image_key, fetch):
+        """Önbellekte (bellek ya da disk) olmayan küçük resmi fetch ile indirip ekle; eklendiyse True
+
+        Çağıran iş parçacığında çalışır, ön plandaki indirme havuzunu kullanmaz.
+        """
+        if self.thumbnails.peek(image_key) is not None:
+            return False
+        path = self._disk_path(image_key)
+        if path and os.path.exists(path):
+            return False
+        return self._load_thumbnail(image_key, fetch) is not None
+
+    def warm(self, image_keys, fetch):
+        """Bellekte olmayan küçük resimleri indirme havuzunda prefetch ile hazırla; future listesi döndür
+
+        Sonuç beklenmez; hazırlanan küçük resimler get_thumbnails'te
+        önbellekten gelir.
+        """
+        return [self._executor.submit(self.prefetch, key, fetch) for key in dict.fromkeys(image_keys)
+                if self.thumbnails.peek(key) is None]
+
+    def clear(self):
+        """Bellekteki küçük resim ve tam boy fotoğraf önbelleklerini boşalt (disk önbelleği kalır)"""
+        self.thumbnails.clear()
+        self.full_images.clear()
+
+    def stats(self):
+        stats = self.thumbnails.stats()
+        with self._lock:
+            stats.update(disk_hits=self.disk_hits, fetches=self.fetches, fetch_errors=self.fetch_errors)
+        return stats
+
+    def _load_thumbnail(self, image_key, fetch):
+        data = self._fetch(image_key, fetch)
+        if data is None:
+            return None
+        try:
+            return self._make(image_key, data)
+        except Exception:
+            with self._lock:
+                self.fetch_errors += 1
+            return None
+
+    def _make(self, image_key, data):
+        thumb = make_thumbnail(data)
+        self._store(image_key, thumb)
+        return thumb
+
+    def _fetch(self, image_key, fetch):
+        with self._lock:
+            self.fetches += 1
+        try:
+            return fetch(image_key)
+        except Exception:
+            with self._lock:
+                self.fetch_errors += 1
+            return None
+
+    def _store(self, image_key, thumb):
+        self.thumbnails.set(image_key, thumb)
+        path = self._disk_path(image_key)
+        if path:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(thumb)
+            os.replace(tmp_path, path)
+
+    def _read_disk(self, image_key):
+        path = self._disk_path(image_key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                thumb = f.read()
+        except OSError:
+            return None
+        self.thumbnails.set(image_key, thumb)
+        with self._lock:
+            self.disk_hits += 1
+        return thumb
+
+    def _disk_path(self, image_key):
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(str(image_key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.jpg")
+
+
+# Süreç genelindeki küçük resim deposu
+thumbnail_store = ThumbnailStore()